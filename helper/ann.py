@@ -0,0 +1,303 @@
+"""
+Approximate nearest neighbour (ANN) untuk katalog destinasi yang sangat besar.
+
+Backend ini memakai random-projection LSH (SimHash) di atas vektor TF-IDF:
+setiap tabel membagi katalog ke bucket berdasarkan tanda proyeksi acak,
+sehingga query hanya menilai kandidat dari bucket yang sama (plus bucket
+tetangga lewat multi-probe) alih-alih seluruh katalog. Kandidat tetap dinilai
+dengan cosine similarity exact, jadi yang dikorbankan hanya recall.
+
+Contoh laporan recall@k terhadap pencarian exact:
+    python -m helper.ann --tables 8 --bits 10 --probes 2 --k 10 --sample 200
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from .config import configure_logging, env_int, env_str
+from .functions import similarity_scores, top_k_indices
+
+class RandomProjectionLSH:
+    """
+    Index LSH berbasis proyeksi acak untuk cosine similarity.
+
+    Parameters:
+    -----------
+    n_tables : int
+        Jumlah tabel hash; lebih banyak = recall lebih tinggi, query lebih lambat
+    n_bits : int
+        Bit per tabel; lebih banyak = bucket lebih kecil, query lebih cepat, recall lebih rendah
+    n_probes : int
+        Jumlah bit paling tidak pasti yang di-flip per tabel (multi-probe)
+    seed : int
+        Seed proyeksi acak agar hasil dapat direproduksi
+    min_candidates : int
+        Jika kandidat lebih sedikit dari ini, query memakai pencarian exact
+        (katalog kecil tidak mendapat keuntungan dari ANN)
+    """
+
+    def __init__(self, n_tables=8, n_bits=10, n_probes=2, seed=0, min_candidates=256):
+        if not 1 <= n_bits <= 62:
+            raise ValueError("n_bits harus di antara 1 dan 62")
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.n_probes = min(n_probes, n_bits)
+        self.seed = seed
+        self.min_candidates = min_candidates
+        self._projection = None
+        self._matrix = None
+        self._codes = None
+        self._order = None
+        self._sorted_codes = None
+        self._weights = np.left_shift(np.int64(1), np.arange(n_bits, dtype=np.int64))
+
+    @classmethod
+    def from_env(cls):
+        """
+        Buat index sesuai RAVELY_ANN_TABLES, RAVELY_ANN_BITS, RAVELY_ANN_PROBES
+        dan RAVELY_ANN_MIN_CANDIDATES
+
+        Returns:
+        --------
+        RandomProjectionLSH
+            Index yang belum di-fit
+        """
+        return cls(
+            n_tables=env_int("RAVELY_ANN_TABLES", 8),
+            n_bits=env_int("RAVELY_ANN_BITS", 10),
+            n_probes=env_int("RAVELY_ANN_PROBES", 2),
+            min_candidates=env_int("RAVELY_ANN_MIN_CANDIDATES", 256),
+        )
+
+    def _project(self, vectors):
+        projected = vectors @ self._projection
+        return np.asarray(projected, dtype=np.float32).reshape(-1, self.n_tables, self.n_bits)
+
+    def _encode(self, projected):
+        return ((projected > 0).astype(np.int64) * self._weights).sum(axis=2)
+
+    def _sort_tables(self):
+        self._order = np.argsort(self._codes, axis=0, kind='stable').T.astype(np.int32)
+        self._sorted_codes = np.take_along_axis(self._codes.T, self._order, axis=1)
+
+    def fit(self, tfidf_matrix):
+        """
+        Bangun tabel hash untuk seluruh baris tfidf_matrix
+
+        Parameters:
+        -----------
+        tfidf_matrix : scipy.sparse.csr_matrix
+            Matriks TF-IDF (baris ternormalisasi L2)
+
+        Returns:
+        --------
+        RandomProjectionLSH
+            Index ini sendiri
+        """
+        rng = np.random.default_rng(self.seed)
+        n_features = tfidf_matrix.shape[1]
+        self._projection = rng.standard_normal((n_features, self.n_tables * self.n_bits)).astype(np.float32)
+        self._matrix = tfidf_matrix
+        self._codes = self._encode(self._project(tfidf_matrix))
+        self._sort_tables()
+        return self
+
+    def with_row(self, tfidf_matrix, row):
+        """
+        Salinan index setelah satu baris ditambahkan/diubah (proyeksi tetap)
+
+        Parameters:
+        -----------
+        tfidf_matrix : scipy.sparse.csr_matrix
+            Matriks TF-IDF terbaru
+        row : int
+            Posisi baris yang ditambahkan/diubah
+
+        Returns:
+        --------
+        RandomProjectionLSH
+            Index baru; index lama tidak diubah
+        """
+        updated = RandomProjectionLSH(self.n_tables, self.n_bits, self.n_probes, self.seed, self.min_candidates)
+        updated._projection = self._projection
+        updated._matrix = tfidf_matrix
+        codes = self._encode(self._project(tfidf_matrix[row]))
+        if row == self._codes.shape[0]:
+            updated._codes = np.vstack([self._codes, codes])
+        else:
+            updated._codes = self._codes.copy()
+            updated._codes[row] = codes[0]
+        updated._sort_tables()
+        return updated
+
+    def candidates(self, vector):
+        """
+        Baris kandidat yang berbagi bucket dengan vektor query
+
+        Parameters:
+        -----------
+        vector : scipy.sparse matrix
+            Vektor query 1 x n_features
+
+        Returns:
+        --------
+        numpy.ndarray
+            Posisi baris kandidat (unik)
+        """
+        projected = self._project(vector)[0]
+        codes = self._encode(projected[None, :, :])[0]
+
+        # Multi-probe: flip bit dengan proyeksi paling dekat ke nol (paling tidak pasti)
+        probe_codes = [codes[:, None]]
+        if self.n_probes:
+            uncertain = np.argsort(np.abs(projected), axis=1)[:, :self.n_probes]
+            probe_codes.append(codes[:, None] ^ self._weights[uncertain])
+        probe_codes = np.concatenate(probe_codes, axis=1)
+
+        found = []
+        for table in range(self.n_tables):
+            sorted_codes = self._sorted_codes[table]
+            starts = np.searchsorted(sorted_codes, probe_codes[table], side='left')
+            stops = np.searchsorted(sorted_codes, probe_codes[table], side='right')
+            for start, stop in zip(starts, stops):
+                if stop > start:
+                    found.append(self._order[table, start:stop])
+
+        if not found:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(np.concatenate(found))
+
+    def query_vector(self, vector, k, exclude=None):
+        """
+        Top-k perkiraan untuk vektor query sembarang
+
+        Parameters:
+        -----------
+        vector : scipy.sparse matrix
+            Vektor query 1 x n_features (ternormalisasi L2)
+        k : int
+            Jumlah hasil
+        exclude : array-like, optional
+            Baris yang tidak boleh ikut terpilih
+
+        Returns:
+        --------
+        tuple
+            (numpy.ndarray, numpy.ndarray) - (posisi baris, skor) terurut dari yang paling mirip
+        """
+        candidates = self.candidates(vector)
+        if exclude is not None:
+            candidates = candidates[~np.isin(candidates, exclude)]
+
+        if candidates.size < max(k, self.min_candidates):
+            # Bucket terlalu sepi; kembali ke pencarian exact agar tetap dapat k hasil yang baik
+            scores = (self._matrix @ vector.T).toarray().ravel()
+            top = top_k_indices(scores, k, exclude=exclude)
+            return top, scores[top]
+
+        scores = (self._matrix[candidates] @ vector.T).toarray().ravel()
+        top = top_k_indices(scores, k)
+        return candidates[top], scores[top]
+
+    def query_row(self, row, k):
+        """Top-k perkiraan untuk destinasi pada baris row (tanpa dirinya sendiri)."""
+        rows, _ = self.query_vector(self._matrix[row], k, exclude=[row])
+        return rows
+
+def ann_enabled():
+    """True jika RAVELY_ANN=lsh."""
+    return (env_str("RAVELY_ANN", "") or "").lower() == "lsh"
+
+def recall_at_k(tfidf_matrix, ann, k=10, sample=200, seed=0):
+    """
+    Ukur recall@k dan latensi ANN dibanding pencarian exact
+
+    Parameters:
+    -----------
+    tfidf_matrix : scipy.sparse.csr_matrix
+        Matriks TF-IDF yang sama dengan yang di-fit ke ann
+    ann : RandomProjectionLSH
+        Index ANN yang sudah di-fit
+    k : int, optional
+        Jumlah tetangga yang dibandingkan (default: 10)
+    sample : int, optional
+        Jumlah destinasi acak yang dipakai sebagai query (default: 200)
+    seed : int, optional
+        Seed pemilihan sampel
+
+    Returns:
+    --------
+    dict
+        recall_at_k, mean_candidates, exact_ms dan ann_ms rata-rata per query
+    """
+    n_rows = tfidf_matrix.shape[0]
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(n_rows, size=min(sample, n_rows), replace=False)
+
+    hits = 0
+    total = 0
+    candidates = 0
+    exact_seconds = 0.0
+    ann_seconds = 0.0
+    for row in rows:
+        started = time.perf_counter()
+        scores = similarity_scores(row, tfidf_matrix)
+        exact = top_k_indices(scores, k, exclude=row)
+        exact_seconds += time.perf_counter() - started
+
+        started = time.perf_counter()
+        approx = ann.query_row(row, k)
+        ann_seconds += time.perf_counter() - started
+
+        # Skor yang sama (ties) dihitung benar walaupun barisnya berbeda
+        threshold = scores[exact[-1]] if exact.size else np.inf
+        hits += int(np.sum(scores[approx] >= threshold - 1e-9))
+        total += exact.size
+        candidates += ann.candidates(tfidf_matrix[row]).size
+
+    return {
+        "k": k,
+        "queries": int(rows.size),
+        "n_tables": ann.n_tables,
+        "n_bits": ann.n_bits,
+        "n_probes": ann.n_probes,
+        "recall_at_k": round(hits / total, 4) if total else 0.0,
+        "mean_candidates": round(candidates / max(rows.size, 1), 1),
+        "exact_ms": round(exact_seconds * 1000 / max(rows.size, 1), 3),
+        "ann_ms": round(ann_seconds * 1000 / max(rows.size, 1), 3),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Laporan recall@k ANN (LSH) terhadap pencarian exact")
+    parser.add_argument("--index", default=None, help="Direktori artifact index (default: RAVELY_INDEX_PATH)")
+    parser.add_argument("--tables", type=int, nargs="+", default=[8], help="Satu atau beberapa nilai n_tables")
+    parser.add_argument("--bits", type=int, nargs="+", default=[10], help="Satu atau beberapa nilai n_bits")
+    parser.add_argument("--probes", type=int, nargs="+", default=[2], help="Satu atau beberapa nilai n_probes")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--sample", type=int, default=200)
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    from .artifact import ArtifactError, default_artifact_path, load_index_artifact
+    try:
+        snapshot = load_index_artifact(args.index or default_artifact_path(), verify=False)
+    except ArtifactError as e:
+        print(f"Artifact index tidak dapat dimuat: {e}")
+        return 1
+
+    print(f"{'tables':>6} {'bits':>4} {'probes':>6} {'recall@k':>9} {'candidates':>10} {'exact_ms':>9} {'ann_ms':>7}")
+    for n_tables in args.tables:
+        for n_bits in args.bits:
+            for n_probes in args.probes:
+                ann = RandomProjectionLSH(n_tables, n_bits, n_probes, min_candidates=0).fit(snapshot.tfidf_matrix)
+                report = recall_at_k(snapshot.tfidf_matrix, ann, k=args.k, sample=args.sample)
+                print(
+                    f"{n_tables:>6} {n_bits:>4} {n_probes:>6} {report['recall_at_k']:>9.3f} "
+                    f"{report['mean_candidates']:>10.1f} {report['exact_ms']:>9.3f} {report['ann_ms']:>7.3f}"
+                )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+# Naikkan setiap kali layout file artifact berubah; artifact lama akan ditolak
+SCHEMA_VERSION = 2
+
+MANIFEST_NAME = "manifest.json"
+
+class ArtifactError(Exception):
+    """Artifact index tidak ada, rusak, atau tidak cocok dengan versi skema."""
+
+def default_artifact_path():
+    """
+    Lokasi default artifact index (RAVELY_INDEX_PATH, default ./data/index)
+
+    Returns:
+    --------
+    str
+        Path direktori artifact
+    """
+    from .config import env_str
+    return env_str("RAVELY_INDEX_PATH", "./data/index")
+
+def _encode_strings(values):
+    # Simpan kolom string sebagai satu blob UTF-8 + offset agar bisa di-mmap
+    encoded = [
+        b"" if value is None or (isinstance(value, float) and math.isnan(value)) else str(value).encode("utf-8")
+        for value in values
+    ]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return blob, offsets
+
+def _decode_strings(blob, offsets):
+    raw = blob.tobytes()
+    return [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def save_index_artifact(snapshot, path):
+    """
+    Tulis snapshot index ke direktori artifact berversi
+
+    Artifact ditulis ke direktori sementara lalu di-rename, sehingga proses
+    lain tidak pernah membaca artifact setengah jadi.
+
+    Parameters:
+    -----------
+    snapshot : IndexSnapshot
+        Snapshot yang akan disimpan
+    path : str
+        Direktori tujuan artifact
+
+    Returns:
+    --------
+    dict
+        Isi manifest yang ditulis
+    """
+    path = os.path.abspath(path)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    store = snapshot.store
+    matrix = sparse.csr_matrix(snapshot.tfidf_matrix)
+
+    vectorizer = snapshot.vectorizer
+    terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+    # Term yang dipangkas max_features/max_df ikut disimpan untuk ukuran drift
+    pruned_terms = sorted(snapshot.known_terms.difference(vectorizer.vocabulary_))
+
+    # Kode kabupaten/kategori disimpan apa adanya agar worker bisa mem-mmap-nya
+    arrays = {
+        "tfidf_data": matrix.data,
+        "tfidf_indices": matrix.indices,
+        "tfidf_indptr": matrix.indptr,
+        "idf": np.asarray(vectorizer.idf_, dtype=np.float64),
+        "ids": np.asarray(store.ids, dtype=np.int64),
+        "district_codes": np.asarray(store.district_codes),
+        "category_offsets": np.asarray(store.category_offsets),
+        "category_codes": np.asarray(store.category_codes),
+    }
+    arrays["vocabulary_blob"], arrays["vocabulary_offsets"] = _encode_strings(terms)
+    arrays["pruned_term_blob"], arrays["pruned_term_offsets"] = _encode_strings(pruned_terms)
+    arrays["title_blob"], arrays["title_offsets"] = _encode_strings(store.titles)
+    arrays["district_name_blob"], arrays["district_name_offsets"] = _encode_strings(store.district_names)
+    arrays["category_name_blob"], arrays["category_name_offsets"] = _encode_strings(store.category_names)
+    if snapshot.neighbors is not None:
+        arrays["neighbor_ids"], arrays["neighbor_scores"] = snapshot.neighbors
+
+    files = {}
+    for name, array in arrays.items():
+        file_path = os.path.join(tmp_path, f"{name}.npy")
+        np.save(file_path, np.ascontiguousarray(array))
+        files[name] = {
+            "sha256": _file_sha256(file_path),
+            "dtype": str(array.dtype),
+            "shape": list(array.shape),
+        }
+
+    manifest = {
+        "schema_version": SCHEMA_VERSION,
+        "created_at": time.time(),
+        "build_seconds": snapshot.build_seconds,
+        "n_rows": int(matrix.shape[0]),
+        "n_features": int(matrix.shape[1]),
+        "top_k": int(snapshot.neighbors[0].shape[1]) if snapshot.neighbors is not None else 0,
+        # Checksum tabel saat build, agar artifact yang sudah basi terdeteksi refresher
+        "table_checksum": snapshot.table_checksum,
+        "vectorizer_params": {
+            "ngram_range": list(vectorizer.ngram_range),
+            "lowercase": vectorizer.lowercase,
+            "norm": vectorizer.norm,
+            "sublinear_tf": vectorizer.sublinear_tf,
+            "dtype": np.dtype(vectorizer.dtype).name,
+        },
+        "files": files,
+    }
+    # Checksum gabungan dipakai sebagai versi index
+    manifest["checksum"] = hashlib.sha256(
+        json.dumps(files, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+    with open(os.path.join(tmp_path, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    # Ganti artifact lama dengan yang baru
+    old_path = f"{path}.old-{os.getpid()}"
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+    logger.info("Artifact index ditulis ke %s (%s destinasi, checksum %s)", path, manifest['n_rows'], manifest['checksum'][:12])
+    return manifest
+
+def read_manifest(path):
+    """
+    Baca dan validasi manifest artifact
+
+    Parameters:
+    -----------
+    path : str
+        Direktori artifact
+
+    Returns:
+    --------
+    dict
+        Isi manifest
+
+    Raises:
+    -------
+    ArtifactError
+        Jika manifest tidak ada, tidak terbaca, atau versi skemanya berbeda
+    """
+    manifest_path = os.path.join(path, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        raise ArtifactError(f"Manifest tidak ditemukan di {path}")
+
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ArtifactError(f"Manifest tidak dapat dibaca: {e}")
+
+    if manifest.get("schema_version") != SCHEMA_VERSION:
+        raise ArtifactError(
+            f"Versi skema artifact {manifest.get('schema_version')} tidak cocok (diharapkan {SCHEMA_VERSION})"
+        )
+
+    return manifest
+
+def restore_vectorizer(terms, idf, params, pruned_terms=None):
+    """
+    Rekonstruksi TfidfVectorizer yang sudah di-fit dari vocabulary dan idf
+
+    Parameters:
+    -----------
+    terms : list
+        Term vocabulary, terurut sesuai indeks fitur
+    idf : numpy.ndarray
+        Bobot idf per fitur
+    params : dict
+        Parameter vectorizer dari manifest
+    pruned_terms : list, optional
+        Term yang dipangkas max_features/max_df saat fit (disimpan sebagai pruned_terms_)
+
+    Returns:
+    --------
+    TfidfVectorizer
+        Vectorizer yang siap dipakai untuk transform
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    vectorizer = TfidfVectorizer(
+        vocabulary={term: i for i, term in enumerate(terms)},
+        ngram_range=tuple(params.get("ngram_range", (1, 2))),
+        lowercase=params.get("lowercase", True),
+        norm=params.get("norm", "l2"),
+        sublinear_tf=params.get("sublinear_tf", False),
+        dtype=np.dtype(params.get("dtype", "float64")).type,
+    )
+    vectorizer.idf_ = np.asarray(idf)
+    if pruned_terms is not None:
+        vectorizer.pruned_terms_ = frozenset(pruned_terms)
+    return vectorizer
+
+def load_index_artifact(path, verify=True):
+    """
+    Muat artifact index dengan memory mapping
+
+    Array besar (matriks TF-IDF, daftar tetangga dan kode kabupaten/kategori) di-mmap read-only,
+    sehingga startup hampir instan dan beberapa worker berbagi page cache OS.
+
+    Parameters:
+    -----------
+    path : str
+        Direktori artifact
+    verify : bool, optional
+        Cocokkan checksum setiap file dengan manifest (default: True)
+
+    Returns:
+    --------
+    IndexSnapshot
+        Snapshot yang dibangun dari artifact
+
+    Raises:
+    -------
+    ArtifactError
+        Jika artifact tidak ada, skemanya berbeda, atau checksum tidak cocok
+    """
+    from .index import IndexSnapshot
+    from .store import DestinationStore
+
+    path = os.path.abspath(path)
+    manifest = read_manifest(path)
+
+    arrays = {}
+    for name, meta in manifest["files"].items():
+        file_path = os.path.join(path, f"{name}.npy")
+        if not os.path.exists(file_path):
+            raise ArtifactError(f"File artifact {name}.npy tidak ditemukan")
+        if verify and _file_sha256(file_path) != meta["sha256"]:
+            raise ArtifactError(f"Checksum {name}.npy tidak cocok dengan manifest")
+        try:
+            arrays[name] = np.load(file_path, mmap_mode="r")
+        except ValueError as e:
+            raise ArtifactError(f"File artifact {name}.npy tidak valid: {e}")
+
+    n_rows = manifest["n_rows"]
+    tfidf_matrix = sparse.csr_matrix(
+        (arrays["tfidf_data"], arrays["tfidf_indices"], arrays["tfidf_indptr"]),
+        shape=(n_rows, manifest["n_features"]),
+        copy=False,
+    )
+
+    store = DestinationStore(
+        ids=arrays["ids"],
+        titles=[sys.intern(title) for title in _decode_strings(arrays["title_blob"], arrays["title_offsets"])],
+        district_codes=arrays["district_codes"],
+        district_names=_decode_strings(arrays["district_name_blob"], arrays["district_name_offsets"]),
+        category_offsets=arrays["category_offsets"],
+        category_codes=arrays["category_codes"],
+        category_names=_decode_strings(arrays["category_name_blob"], arrays["category_name_offsets"]),
+    )
+
+    # Vectorizer (scikit-learn) baru dibuat saat dibutuhkan, misalnya untuk upsert
+    def vectorizer_factory():
+        terms = _decode_strings(arrays["vocabulary_blob"], arrays["vocabulary_offsets"])
+        pruned_terms = None
+        if "pruned_term_blob" in arrays:
+            pruned_terms = _decode_strings(arrays["pruned_term_blob"], arrays["pruned_term_offsets"])
+        return restore_vectorizer(terms, arrays["idf"], manifest.get("vectorizer_params", {}), pruned_terms)
+
+    neighbors = None
+    if "neighbor_ids" in arrays:
+        neighbors = (arrays["neighbor_ids"], arrays["neighbor_scores"])
+
+    # Index ANN tidak disimpan di artifact; membangunnya hanya O(nnz x bit)
+    from .ann import RandomProjectionLSH, ann_enabled
+    ann = RandomProjectionLSH.from_env().fit(tfidf_matrix) if ann_enabled() else None
+
+    return IndexSnapshot(
+        store=store,
+        vectorizer=None,
+        vectorizer_factory=vectorizer_factory,
+        tfidf_matrix=tfidf_matrix,
+        neighbors=neighbors,
+        built_at=manifest["created_at"],
+        build_seconds=manifest.get("build_seconds", 0.0),
+        version=manifest["checksum"][:16],
+        ann=ann,
+        table_checksum=manifest.get("table_checksum"),
+    )
@@ -0,0 +1,399 @@
+"""
+Benchmark offline untuk pipeline rekomendasi.
+
+Katalog sintetis ditulis ke database SQLite sementara (atau DATABASE_URL lain
+lewat --database-url), lalu skenario berikut diukur per ukuran katalog:
+build index, query tunggal, query batch, serialisasi response, paging
+/destinations, cold start (proses baru yang memuat artifact lalu menjawab
+satu query), memori per destinasi, dan waktu import server. Hasil ditulis
+sebagai JSON agar dapat dibandingkan antar commit.
+
+Contoh:
+    python -m helper.benchmark --sizes 1000 10000 100000 --output bench.json
+    python -m helper.benchmark --sizes 1000 --compare bench-main.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from .config import configure_logging
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _summary(samples):
+    # Ringkasan latensi dalam milidetik
+    values = np.asarray(samples, dtype=np.float64) * 1000
+    return {
+        "count": int(values.size),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def bench_build():
+    """Waktu build index penuh dari database (baca tabel, fit TF-IDF, tetangga)."""
+    from .index import build_snapshot
+    # Import sklearn/pandas/sqlalchemy yang lazy tidak ikut dihitung; itu bagian skenario startup
+    import pandas  # noqa: F401
+    import sklearn.feature_extraction.text  # noqa: F401
+    import sqlalchemy  # noqa: F401
+
+    started = time.perf_counter()
+    snapshot = build_snapshot()
+    seconds = time.perf_counter() - started
+    if snapshot is None:
+        raise RuntimeError("build_snapshot gagal")
+    return snapshot, {
+        "seconds": round(seconds, 4),
+        "rows": len(snapshot),
+        "features": int(snapshot.tfidf_matrix.shape[1]),
+    }
+
+def bench_single_query(snapshot, titles, limit=5):
+    """Latensi get_recommendations_by_name per query."""
+    from .recommendations import get_recommendations_by_name
+
+    samples = []
+    for title in titles:
+        started = time.perf_counter()
+        get_recommendations_by_name(title, limit, snapshot=snapshot)
+        samples.append(time.perf_counter() - started)
+    return _summary(samples)
+
+def bench_batch_query(snapshot, titles, batch_size=100, repeats=20, limit=5):
+    """Latensi get_batch_recommendations untuk batch_size nama sekaligus."""
+    from .index import RecommendationIndex
+    from .recommendations import get_batch_recommendations
+
+    index = RecommendationIndex(builder=lambda: snapshot)
+    index.rebuild()
+
+    samples = []
+    for i in range(repeats):
+        batch = [titles[(i * batch_size + j) % len(titles)] for j in range(batch_size)]
+        started = time.perf_counter()
+        get_batch_recommendations(batch, limit, index=index)
+        samples.append(time.perf_counter() - started)
+    result = _summary(samples)
+    result["batch_size"] = batch_size
+    return result
+
+def bench_serialization(snapshot, titles, limit=10):
+    """Biaya serialisasi response /recommendations: model Pydantic + response_model vs fragmen JSON."""
+    from server import RecommendationResponse
+
+    from .fast_json import RecommendationFragments, dumps, json_object
+    from .recommendations import format_recommendations, recommend_rows_by_name
+
+    results = []
+    for title in titles:
+        try:
+            results.append((title, recommend_rows_by_name(title, limit, snapshot)))
+        except Exception:
+            continue
+
+    # Jalur lama: dict per item, model response, lalu validasi ulang dan serialisasi oleh FastAPI
+    model_samples = []
+    for title, rows in results:
+        started = time.perf_counter()
+        items = format_recommendations(snapshot.store, rows)
+        response = RecommendationResponse(recommendations=items, total=len(items), query=title)
+        RecommendationResponse.model_validate(response.model_dump()).model_dump_json()
+        model_samples.append(time.perf_counter() - started)
+
+    # Jalur cepat, dengan cache fragmen kosong (cold) lalu terisi (warm)
+    fragments = RecommendationFragments(snapshot.store)
+    fragment_samples = {"cold": [], "warm": []}
+    for phase in ("cold", "warm"):
+        for title, rows in results:
+            started = time.perf_counter()
+            json_object(("recommendations", fragments.encode_rows(rows)), ("total", dumps(len(rows))), ("query", dumps(title)))
+            fragment_samples[phase].append(time.perf_counter() - started)
+
+    model_us = float(np.mean(model_samples)) * 1e6
+    warm_us = float(np.mean(fragment_samples["warm"])) * 1e6
+    return {
+        "limit": limit,
+        "requests": len(results),
+        "model_us": round(model_us, 2),
+        "fragments_cold_us": round(float(np.mean(fragment_samples["cold"])) * 1e6, 2),
+        "fragments_us": round(warm_us, 2),
+        "speedup": round(model_us / warm_us, 1) if warm_us else None,
+    }
+
+def bench_paging(page_size=100, max_pages=200):
+    """Paging /destinations dengan keyset cursor lewat TestClient FastAPI."""
+    from fastapi.testclient import TestClient
+
+    import server
+
+    # Tanpa context manager: lifespan (init database, index, refresher) tidak dijalankan
+    client = TestClient(server.app)
+    samples = []
+    rows = 0
+    after_id = None
+    for _ in range(max_pages):
+        params = {"limit": page_size}
+        if after_id is not None:
+            params["after_id"] = after_id
+        started = time.perf_counter()
+        response = client.get("/destinations", params=params)
+        samples.append(time.perf_counter() - started)
+        response.raise_for_status()
+        body = response.json()
+        rows += body["total"]
+        after_id = body["next_after_id"]
+        if after_id is None:
+            break
+
+    started = time.perf_counter()
+    response = client.get("/destinations", params={"format": "ndjson"})
+    export_seconds = time.perf_counter() - started
+    response.raise_for_status()
+    exported = response.text.count("\n")
+
+    result = _summary(samples)
+    result.update({
+        "page_size": page_size,
+        "pages": len(samples),
+        "rows": rows,
+        "ndjson_rows": exported,
+        "ndjson_seconds": round(export_seconds, 4),
+        "ndjson_rows_per_second": round(exported / export_seconds, 1) if export_seconds else None,
+    })
+    return result
+
+_COLD_START_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from helper.index import RecommendationIndex
+from helper.recommendations import get_recommendations_by_name
+imported = time.perf_counter()
+index = RecommendationIndex()
+if not index.load_or_build(sys.argv[1]):
+    sys.exit(1)
+loaded = time.perf_counter()
+get_recommendations_by_name(sys.argv[2], 5, index=index)
+done = time.perf_counter()
+print(json.dumps({
+    "import_seconds": imported - started,
+    "load_seconds": loaded - imported,
+    "first_query_seconds": done - loaded,
+}))
+"""
+
+def bench_cold_start(snapshot, artifact_path, title):
+    """Proses Python baru: import, muat artifact, lalu satu query pertama."""
+    from .artifact import save_index_artifact
+
+    save_index_artifact(snapshot, artifact_path)
+
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", _COLD_START_SCRIPT, artifact_path, title],
+        cwd=REPO_ROOT, capture_output=True, text=True, env=os.environ.copy(),
+    )
+    wall = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"proses cold start gagal: {completed.stderr.strip()[-500:]}")
+
+    # Baris terakhir stdout berisi hasil; baris lain adalah log helper
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    result = {name: round(value, 4) for name, value in timings.items()}
+    result["wall_seconds"] = round(wall, 4)
+    return result
+
+def bench_startup():
+    """Waktu import server di proses baru dan paket berat yang ikut terimpor."""
+    from .startup import import_report
+
+    report = import_report("server", top=5)
+    return {"import_ms": report["import_ms"], "heavy": report["heavy"], "packages": report["packages"]}
+
+def bench_memory(catalog):
+    """Byte per destinasi: DataFrame + TF-IDF float64 dibandingkan store ringkas + TF-IDF float32."""
+    from .recommendations import prepare_destinations
+    from .store import memory_report
+
+    df = catalog.copy()
+    df["id"] = np.arange(1, len(df) + 1)
+    report = memory_report(prepare_destinations(df))
+    return {
+        "bytes_per_destination": report["after"]["total"],
+        "bytes_per_destination_before": report["before"]["total"],
+        "before": report["before"],
+        "after": report["after"],
+        "ratio": report["ratio"],
+    }
+
+def run_size(n_rows, work_dir, database_url=None, queries=200, seed=0):
+    """
+    Jalankan semua skenario untuk satu ukuran katalog
+
+    Parameters:
+    -----------
+    n_rows : int
+        Jumlah destinasi sintetis
+    work_dir : str
+        Direktori untuk database SQLite dan artifact sementara
+    database_url : str, optional
+        Database tujuan; default-nya file SQLite baru di work_dir
+    queries : int, optional
+        Jumlah query tunggal yang diukur (default: 200)
+    seed : int, optional
+        Seed katalog dan pemilihan query
+
+    Returns:
+    --------
+    dict
+        Hasil per skenario; skenario yang gagal berisi key "error"
+    """
+    from .db_connection import configure_engine
+    from .synthetic import generate_destinations, write_catalog
+
+    url = database_url or f"sqlite:///{os.path.join(work_dir, f'bench-{n_rows}.db')}"
+    engine = configure_engine(url)
+
+    started = time.perf_counter()
+    catalog = generate_destinations(n_rows, seed=seed)
+    write_catalog(catalog, engine)
+    result = {"rows": n_rows, "seed_seconds": round(time.perf_counter() - started, 4), "scenarios": {}}
+    scenarios = result["scenarios"]
+
+    rng = np.random.default_rng(seed)
+    titles = list(catalog["title"].iloc[rng.integers(0, n_rows, size=queries)])
+
+    snapshot, scenarios["build"] = bench_build()
+
+    for name, run in (
+        ("single_query", lambda: bench_single_query(snapshot, titles)),
+        ("batch_query", lambda: bench_batch_query(snapshot, titles)),
+        ("serialization", lambda: bench_serialization(snapshot, titles)),
+        ("paging", bench_paging),
+        ("cold_start", lambda: bench_cold_start(snapshot, os.path.join(work_dir, f"index-{n_rows}"), titles[0])),
+        ("memory", lambda: bench_memory(catalog)),
+        ("startup", bench_startup),
+    ):
+        try:
+            scenarios[name] = run()
+        except Exception as e:
+            logger.error("Skenario %s gagal: %s", name, e)
+            scenarios[name] = {"error": str(e)}
+
+    return result
+
+# Metrik utama per skenario untuk perbandingan antar commit
+KEY_METRICS = {
+    "build": "seconds",
+    "single_query": "p95_ms",
+    "batch_query": "p95_ms",
+    "serialization": "fragments_us",
+    "paging": "p95_ms",
+    "cold_start": "wall_seconds",
+    "memory": "bytes_per_destination",
+    "startup": "import_ms",
+}
+
+def compare(baseline, current):
+    """
+    Bandingkan dua hasil benchmark pada metrik utama tiap skenario
+
+    Parameters:
+    -----------
+    baseline : dict
+        Hasil benchmark acuan (misalnya dari commit sebelumnya)
+    current : dict
+        Hasil benchmark saat ini
+
+    Returns:
+    --------
+    list
+        Satu dictionary per (ukuran, skenario) yang ada di kedua hasil:
+        {"rows", "scenario", "metric", "baseline", "current", "ratio"}
+    """
+    baseline_runs = {run["rows"]: run for run in baseline.get("runs", [])}
+    rows = []
+    for run in current.get("runs", []):
+        previous = baseline_runs.get(run["rows"])
+        if previous is None:
+            continue
+        for scenario, metric in KEY_METRICS.items():
+            old = previous["scenarios"].get(scenario, {}).get(metric)
+            new = run["scenarios"].get(scenario, {}).get(metric)
+            if old is None or new is None:
+                continue
+            rows.append({
+                "rows": run["rows"],
+                "scenario": scenario,
+                "metric": metric,
+                "baseline": old,
+                "current": new,
+                "ratio": round(new / old, 3) if old else None,
+            })
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark offline pipeline rekomendasi dengan katalog sintetis")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Ukuran katalog")
+    parser.add_argument("--queries", type=int, default=200, help="Jumlah query tunggal per ukuran")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", default=None, help="Database tujuan (default: SQLite sementara)")
+    parser.add_argument("--output", default="benchmark-results.json", help="File JSON hasil benchmark")
+    parser.add_argument("--compare", default=None, help="File JSON hasil sebelumnya untuk dibandingkan")
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+        },
+        "runs": [],
+    }
+
+    with tempfile.TemporaryDirectory(prefix="ravely-bench-") as work_dir:
+        for n_rows in args.sizes:
+            print(f"=== Benchmark {n_rows} destinasi ===")
+            results["runs"].append(run_size(n_rows, work_dir, args.database_url, args.queries, args.seed))
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Hasil benchmark ditulis ke {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"{'rows':>7} {'scenario':<13} {'metric':<13} {'baseline':>10} {'current':>10} {'ratio':>6}")
+        for row in compare(baseline, results):
+            print(
+                f"{row['rows']:>7} {row['scenario']:<13} {row['metric']:<13} "
+                f"{row['baseline']:>10} {row['current']:>10} {row['ratio'] or '-':>6}"
+            )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
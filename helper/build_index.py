@@ -0,0 +1,49 @@
+"""
+Bangun artifact index rekomendasi secara offline.
+
+Contoh:
+    python -m helper.build_index --output ./data/index --top-k 20
+    python -m helper.build_index --output ./data/index --shared   # generasi baru untuk RAVELY_SHARED_INDEX
+    python -m helper.build_index --neighbors-table                # tabel destination_neighbors untuk RAVELY_SERVING_MODE=table
+"""
+import argparse
+import sys
+
+from .artifact import default_artifact_path, save_index_artifact
+from .config import configure_logging
+from .index import build_snapshot
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bangun artifact index rekomendasi dari tabel destinations")
+    parser.add_argument("--output", default=default_artifact_path(), help="Direktori tujuan artifact")
+    parser.add_argument("--top-k", type=int, default=None, help="Jumlah tetangga yang diprekomputasi per destinasi")
+    parser.add_argument("--shared", action="store_true", help="Publikasikan sebagai generasi baru index bersama antar worker")
+    parser.add_argument("--neighbors-table", action="store_true",
+                        help="Tulis juga top-K tetangga ke tabel destination_neighbors (mode serving table)")
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    snapshot = build_snapshot(top_k=args.top_k)
+    if snapshot is None:
+        print("Index gagal dibangun: data destinasi tidak dapat dimuat.")
+        return 1
+
+    if args.shared:
+        from .shared_index import leader_lock, publish_generation
+        with leader_lock(args.output):
+            generation = publish_generation(snapshot, args.output)
+        print(f"Generasi {generation} dipublikasikan di {args.output}")
+    else:
+        save_index_artifact(snapshot, args.output)
+    if args.neighbors_table:
+        from .neighbor_table import materialize_neighbors
+        stats = materialize_neighbors(snapshot, top_k=args.top_k)
+        if stats is None:
+            print("Tabel tetangga gagal ditulis.")
+            return 1
+        print(f"Tabel tetangga: {stats['rows']} baris ({stats['top_k']} per destinasi) dalam {stats['seconds']:.2f}s")
+    print(f"Selesai: {len(snapshot)} destinasi dalam {snapshot.build_seconds:.2f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
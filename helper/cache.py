@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    Cache in-process dengan batas ukuran (LRU) dan masa berlaku (TTL).
+
+    Aman dipakai dari banyak thread. Entri yang paling lama tidak dipakai
+    dibuang saat cache penuh, dan entri yang lebih tua dari ttl dianggap
+    miss saat dibaca.
+
+    Parameters:
+    -----------
+    maxsize : int
+        Jumlah entri maksimum
+    ttl : float
+        Masa berlaku entri dalam detik
+    """
+
+    def __init__(self, maxsize=1024, ttl=300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        """
+        Ambil nilai dari cache
+
+        Parameters:
+        -----------
+        key : hashable
+            Kunci entri
+        default : any, optional
+            Nilai jika entri tidak ada atau sudah kedaluwarsa
+
+        Returns:
+        --------
+        any
+            Nilai yang tersimpan atau default
+        """
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Simpan nilai ke cache, membuang entri LRU jika cache penuh
+
+        Parameters:
+        -----------
+        key : hashable
+            Kunci entri
+        value : any
+            Nilai yang disimpan
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Kosongkan cache (counter tidak direset)."""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """
+        Counter cache untuk monitoring
+
+        Returns:
+        --------
+        dict
+            hits, misses, hit_rate, evictions, expirations, size, maxsize, ttl
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
+
+def etag_matches(if_none_match, etag):
+    """
+    Cek apakah header If-None-Match cocok dengan ETag (perbandingan lemah)
+
+    Parameters:
+    -----------
+    if_none_match : str or None
+        Nilai header If-None-Match dari request
+    etag : str
+        ETag resource saat ini
+
+    Returns:
+    --------
+    bool
+        True jika client sudah memiliki representasi terbaru
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    def opaque(tag):
+        tag = tag.strip()
+        return tag[2:] if tag.startswith("W/") else tag
+
+    return any(opaque(tag) == opaque(etag) for tag in if_none_match.split(","))
@@ -0,0 +1,100 @@
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+_environment_loaded = False
+
+def load_environment():
+    """
+    Muat variabel dari file .env sekali per proses
+
+    Dipanggil saat konfigurasi pertama kali dibaca, bukan saat import modul,
+    sehingga import tidak punya efek samping. Variabel yang sudah di-set di
+    environment tidak ditimpa.
+    """
+    global _environment_loaded
+    if _environment_loaded:
+        return
+    _environment_loaded = True
+    from dotenv import load_dotenv
+    load_dotenv()
+
+def env_str(name, default=None):
+    """
+    Baca environment variable sebagai string
+
+    Parameters:
+    -----------
+    name : str
+        Nama environment variable
+    default : str, optional
+        Nilai jika variable tidak di-set atau kosong
+
+    Returns:
+    --------
+    str or None
+        Nilai variable atau default
+    """
+    load_environment()
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip()
+
+def env_int(name, default):
+    """Baca environment variable sebagai int, fallback ke default jika tidak valid."""
+    value = env_str(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning("%s=%r bukan bilangan bulat, memakai default %s", name, value, default)
+        return default
+
+def env_float(name, default):
+    """Baca environment variable sebagai float, fallback ke default jika tidak valid."""
+    value = env_str(name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning("%s=%r bukan angka, memakai default %s", name, value, default)
+        return default
+
+def env_bool(name, default):
+    """Baca environment variable sebagai boolean (1/true/yes/on)."""
+    value = env_str(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+def configure_logging(default="INFO"):
+    """
+    Atur level logging aplikasi dari RAVELY_LOG_LEVEL
+
+    Nilai yang didukung: DEBUG, INFO, WARNING, ERROR, CRITICAL, atau OFF untuk
+    mematikan seluruh log aplikasi (misalnya di production).
+
+    Parameters:
+    -----------
+    default : str, optional
+        Level jika RAVELY_LOG_LEVEL tidak di-set (default: INFO)
+    """
+    name = env_str("RAVELY_LOG_LEVEL", default).upper()
+    if name in ("OFF", "NONE"):
+        logging.disable(logging.CRITICAL)
+        return
+
+    logging.disable(logging.NOTSET)
+    logging.basicConfig(format=LOG_FORMAT)
+    level = logging.getLevelName(name)
+    if not isinstance(level, int):
+        logger.warning("RAVELY_LOG_LEVEL=%r tidak dikenal, memakai INFO", name)
+        level = logging.INFO
+    for logger_name in ("helper", "server"):
+        logging.getLogger(logger_name).setLevel(level)
@@ -0,0 +1,85 @@
+"""
+Akses data untuk endpoint async, dengan mode sinkron atau async.
+
+RAVELY_DB_MODE=sync (default) menjalankan helper di db_connection lewat
+threadpool Starlette; RAVELY_DB_MODE=async memakai engine async SQLAlchemy
+sehingga request tidak memegang thread selama menunggu database. Kedua mode
+bisa dibandingkan di bawah beban tanpa mengubah kode endpoint.
+
+Modul database (SQLAlchemy, driver) baru diimpor saat fungsi pertama kali
+dipanggil, sehingga import modul ini tetap ringan.
+"""
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+
+from .config import env_str
+
+def db_mode():
+    """
+    Mode akses database yang aktif
+
+    Returns:
+    --------
+    str
+        "sync" atau "async"
+    """
+    mode = env_str("RAVELY_DB_MODE", "sync").lower()
+    return mode if mode in ("sync", "async") else "sync"
+
+async def read_table(table_name, limit=None):
+    from . import db_connection
+    if db_mode() == "async":
+        from . import async_db
+        return await async_db.read_table(table_name, limit=limit)
+    return await run_in_threadpool(db_connection.read_table, table_name, limit)
+
+async def read_destinations_page(after_id=None, limit=50, columns=None):
+    from . import db_connection
+    if db_mode() == "async":
+        from . import async_db
+        return await async_db.read_destinations_page(after_id, limit, columns)
+    return await run_in_threadpool(db_connection.read_destinations_page, after_id, limit, columns)
+
+async def iter_destinations(after_id=None, columns=None, batch_size=1000):
+    from . import db_connection
+    if db_mode() == "async":
+        from . import async_db
+        async for row in async_db.iter_destinations(after_id, columns, batch_size):
+            yield row
+    else:
+        async for row in iterate_in_threadpool(db_connection.iter_destinations(after_id, columns, batch_size)):
+            yield row
+
+async def search_destination_by_name(destination_name, table_name='destinations'):
+    from . import db_connection
+    if db_mode() == "async":
+        from . import async_db
+        return await async_db.search_destination_by_name(destination_name, table_name)
+    return await run_in_threadpool(db_connection.search_destination_by_name, destination_name, table_name)
+
+async def add_data_to_table(title, district, category, url, table_name):
+    from . import db_connection
+    if db_mode() == "async":
+        from . import async_db
+        return await async_db.add_data_to_table(title, district, category, url, table_name)
+    return await run_in_threadpool(db_connection.add_data_to_table, title, district, category, url, table_name)
+
+async def check_database_health():
+    from . import db_connection
+    if db_mode() == "async":
+        from . import async_db
+        return await async_db.check_database_health()
+    return await run_in_threadpool(db_connection.check_database_health)
+
+def pool_stats():
+    """Status connection pool engine yang dipakai mode aktif (lihat db_connection.pool_stats)."""
+    from . import db_connection
+    if db_mode() == "async":
+        from . import async_db
+        return db_connection.pool_stats(async_db.get_async_engine().pool)
+    return db_connection.pool_stats()
+
+async def close():
+    """Tutup engine async jika pernah dibuat."""
+    if db_mode() == "async":
+        from . import async_db
+        await async_db.dispose_async_engine()
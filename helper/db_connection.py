@@ -1,20 +1,117 @@
 from sqlalchemy import create_engine, inspect, text
-import pandas as pd
+import logging
 import os
 import sys
-from dotenv import load_dotenv
+import time
+from contextlib import contextmanager
 
-# Load environment variables from .env file
-load_dotenv()
+from .config import env_bool, env_float, env_int, load_environment
+from .metrics import POOL_CHECKOUT_SECONDS, observe_stage, stage
+# Diekspor ulang dari sini agar import lama tetap berlaku
+from .records import _notify_change, parse_categories
 
-# Database connection URL from environment variable
-URL = os.getenv("DATABASE_URL")
+logger = logging.getLogger(__name__)
 
-if not URL:
-    raise ValueError("DATABASE_URL environment variable is not set. Please check your .env file.")
+def get_database_url():
+    """
+    URL database dari environment variable DATABASE_URL
+
+    Returns:
+    --------
+    str
+        URL database
+
+    Raises:
+    -------
+    ValueError
+        Jika DATABASE_URL tidak di-set
+    """
+    # File .env dimuat saat URL pertama kali dibutuhkan, bukan saat import
+    load_environment()
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise ValueError("DATABASE_URL environment variable is not set. Please check your .env file.")
+    return url
+
+def engine_options(url):
+    """
+    Opsi connection pool untuk create_engine, dibaca dari environment
+
+    Parameters:
+    -----------
+    url : str
+        URL database (SQLite memakai pool bawaannya sendiri)
 
-# Create database engine
-engine = create_engine(URL)
+    Returns:
+    --------
+    dict
+        Keyword arguments untuk sqlalchemy.create_engine
+    """
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": env_int("RAVELY_DB_POOL_SIZE", 5),
+        "max_overflow": env_int("RAVELY_DB_MAX_OVERFLOW", 10),
+        "pool_timeout": env_float("RAVELY_DB_POOL_TIMEOUT", 30.0),
+        # Koneksi mati (misalnya setelah restart database) dideteksi saat checkout
+        "pool_pre_ping": env_bool("RAVELY_DB_POOL_PRE_PING", True),
+        # Daur ulang koneksi sebelum diputus oleh server/proxy
+        "pool_recycle": env_int("RAVELY_DB_POOL_RECYCLE", 1800),
+    }
+
+# Engine dibuat saat pertama kali dipakai, sehingga modul ini bisa di-import
+# tanpa DATABASE_URL (misalnya oleh benchmark offline atau CLI build index)
+_engine = None
+
+def get_engine():
+    """
+    Engine database bersama, dibuat saat pertama kali dipakai
+
+    Returns:
+    --------
+    sqlalchemy.Engine
+        Engine untuk DATABASE_URL dengan opsi pool dari engine_options
+    """
+    global _engine
+    if _engine is None:
+        url = get_database_url()
+        _engine = create_engine(url, **engine_options(url))
+    return _engine
+
+def configure_engine(url):
+    """
+    Ganti engine bersama dengan engine untuk URL lain
+
+    Dipakai misalnya oleh benchmark untuk mengarahkan semua helper ke
+    database SQLite lokal.
+
+    Parameters:
+    -----------
+    url : str
+        URL database baru
+
+    Returns:
+    --------
+    sqlalchemy.Engine
+        Engine baru
+    """
+    global _engine
+    if _engine is not None:
+        _engine.dispose()
+    os.environ["DATABASE_URL"] = url
+    _engine = create_engine(url, **engine_options(url))
+    return _engine
+
+@contextmanager
+def _checkout():
+    # Waktu checkout = menunggu slot pool + membuka koneksi baru bila perlu
+    started = time.perf_counter()
+    connection = get_engine().connect()
+    elapsed = time.perf_counter() - started
+    POOL_CHECKOUT_SECONDS.observe(elapsed)
+    observe_stage("db_connect", elapsed)
+    with connection:
+        yield connection
 
 def connect_to_db():
     """
@@ -27,15 +124,65 @@ def connect_to_db():
     """
     try:
         # Check connection
-        connection = engine.connect()
+        connection = get_engine().connect()
         connection.close()
-        print("Database connection successful!")
+        logger.info("Database connection successful!")
         return True
     except Exception as e:
-        print(f"Error connecting to database: {e}")
+        logger.error("Error connecting to database: %s", e)
         return False
 
-def init_database(dataset_path='./data/destinations.csv', table_name='destinations', engine= engine):
+def check_database_health():
+    """
+    Periksa koneksi database dengan satu query ringan
+
+    Returns:
+    --------
+    dict
+        {"ok": bool, "latency_ms": float, "pool": str, "error": str or None}
+    """
+    engine = get_engine()
+    started = time.perf_counter()
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        return {
+            "ok": True,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+            "pool": engine.pool.status(),
+            "error": None,
+        }
+    except Exception as e:
+        return {
+            "ok": False,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+            "pool": engine.pool.status(),
+            "error": str(e),
+        }
+
+def pool_stats(pool=None):
+    """
+    Jumlah koneksi connection pool menurut statusnya
+
+    Parameters:
+    -----------
+    pool : sqlalchemy.pool.Pool, optional
+        Pool yang diperiksa; default-nya pool engine bersama
+
+    Returns:
+    --------
+    dict
+        {"checked_out": int, "idle": int, "overflow": int}; pool yang tidak
+        menyediakan angka tertentu (misalnya pool SQLite) dilewati
+    """
+    pool = pool if pool is not None else get_engine().pool
+    stats = {}
+    for name, method in (("checked_out", "checkedout"), ("idle", "checkedin"), ("overflow", "overflow")):
+        if hasattr(pool, method):
+            stats[name] = getattr(pool, method)()
+    return stats
+
+def init_database(dataset_path='./data/destinations.csv', table_name='destinations', engine=None):
     """
     Initialize database with data from a CSV file, but skip if table already exists.
 
@@ -45,8 +192,8 @@ def init_database(dataset_path='./data/destinations.csv', table_name='destinatio
         Path to the CSV file containing the data
     table_name : str
         Name of the table to create
-    engine : sqlalchemy.Engine
-        SQLAlchemy engine object (PostgreSQL)
+    engine : sqlalchemy.Engine, optional
+        SQLAlchemy engine object (PostgreSQL); default-nya engine bersama
 
     Returns:
     --------
@@ -54,9 +201,7 @@ def init_database(dataset_path='./data/destinations.csv', table_name='destinatio
         True if successful or skipped (already initialized), False otherwise
     """
     try:
-        if not engine:
-            print("Error: SQLAlchemy engine is required.")
-            return False
+        engine = engine or get_engine()
 
         # Cek apakah tabel sudah ada dan memiliki data
         inspector = inspect(engine)
@@ -66,64 +211,41 @@ def init_database(dataset_path='./data/destinations.csv', table_name='destinatio
                 result = conn.execute(text(f"SELECT COUNT(*) FROM {table_name}"))
                 count = result.scalar()
                 if count > 0:
-                    print(f"Table '{table_name}' already exists with {count} rows. Using existing data.")
+                    logger.info("Table '%s' already exists with %s rows. Using existing data.", table_name, count)
                     return True
                 else:
-                    print(f"Table '{table_name}' exists but is empty.")
+                    logger.info("Table '%s' exists but is empty.", table_name)
         
         # Jika file CSV tidak ada, coba cari data existing di database
         if not os.path.exists(dataset_path):
-            print(f"Dataset file not found at {dataset_path}")
+            logger.warning("Dataset file not found at %s", dataset_path)
             # Jika tabel ada dan memiliki data, itu sudah cukup
             if table_name in inspector.get_table_names():
                 with engine.connect() as conn:
                     result = conn.execute(text(f"SELECT COUNT(*) FROM {table_name}"))
                     count = result.scalar()
                     if count > 0:
-                        print(f"Using existing data from table '{table_name}' ({count} rows).")
+                        logger.info("Using existing data from table '%s' (%s rows).", table_name, count)
                         return True
-            print("No existing data found and no CSV file to initialize from.")
+            logger.info("No existing data found and no CSV file to initialize from.")
             return False
 
-        print(f"Loading dataset from {dataset_path}...")
-        df = pd.read_csv(dataset_path)
-
-        if df.empty:
-            print("Error: Dataset is empty")
+        # Muat CSV per chunk lewat COPY (PostgreSQL) atau executemany
+        logger.info("Loading dataset from %s...", dataset_path)
+        from .ingest import ingest_csv
+        stats = ingest_csv(dataset_path, table_name, engine=engine)
+        if stats is None:
             return False
 
-        print(f"Dataset loaded with {df.shape[0]} rows and {df.shape[1]} columns")
-
-        # Format kolom 'categories' menjadi list Python agar cocok dengan TEXT[]
-        if 'categories' in df.columns:
-            df['categories'] = df['categories'].apply(
-                lambda x: [i.strip() for i in str(x).split(',')] if pd.notnull(x) else []
-            )
-
-        # Buat tabel baru secara eksplisit
-        with engine.connect() as conn:
-            print(f"Creating table '{table_name}' with proper schema...")
-            create_sql = f"""
-                CREATE TABLE {table_name} (
-                    id SERIAL PRIMARY KEY,
-                    title TEXT,
-                    district TEXT,
-                    url TEXT,
-                    categories TEXT[]
-                );
-            """
-            conn.execute(text(create_sql))
-            conn.commit()
-
-        # Masukkan data ke dalam tabel
-        print(f"Inserting data into '{table_name}'...")
-        df.to_sql(table_name, engine, if_exists='append', index=False)
+        if stats["inserted"] == 0:
+            logger.error("Dataset is empty")
+            return False
 
-        print("Database initialized successfully!")
+        logger.info("Database initialized successfully!")
         return True
 
     except Exception as e:
-        print(f"Error initializing database: {e}")
+        logger.error("Error initializing database: %s", e)
         return False
 
 # Function to read data from table
@@ -143,20 +265,113 @@ def read_table(table_name, limit=None):
     pandas.DataFrame
         DataFrame containing the table data
     """
+    import pandas as pd
+
     try:
+        query = f"SELECT * FROM {table_name}"
         if limit:
-            query = f"SELECT * FROM {table_name} LIMIT {limit}"
-            df = pd.read_sql(query, engine)
-        else:
-            df = pd.read_sql(f"SELECT * FROM {table_name}", engine)
+            query += f" LIMIT {limit}"
+
+        with _checkout() as connection, stage("table_read"):
+            df = pd.read_sql(text(query), connection)
+            if 'categories' in df.columns:
+                df['categories'] = df['categories'].apply(parse_categories)
         
-        print(f"Successfully read {df.shape[0]} rows from '{table_name}'")
+        logger.debug("Successfully read %s rows from '%s'", df.shape[0], table_name)
         return df
     
     except Exception as e:
-        print(f"Error reading from table '{table_name}': {e}")
+        logger.error("Error reading from table '%s': %s", table_name, e)
+        return None
+
+# Kolom yang boleh diproyeksikan dari tabel destinations
+DESTINATION_COLUMNS = ("id", "title", "district", "categories", "url")
+
+def _projection(columns):
+    columns = [column for column in (columns or DESTINATION_COLUMNS) if column in DESTINATION_COLUMNS]
+    # id selalu ikut karena dipakai sebagai cursor
+    if "id" not in columns:
+        columns.insert(0, "id")
+    return columns
+
+def _page_query(columns, table_name, after_id, limit=None):
+    query = f"SELECT {', '.join(_projection(columns))} FROM {table_name}"
+    params = {}
+    if after_id is not None:
+        query += " WHERE id > :after_id"
+        params["after_id"] = int(after_id)
+    query += " ORDER BY id"
+    if limit is not None:
+        query += " LIMIT :limit"
+        params["limit"] = int(limit)
+    return text(query), params
+
+def _parse_row(row):
+    row = dict(row)
+    if "categories" in row:
+        row["categories"] = parse_categories(row["categories"])
+    return row
+
+def read_destinations_page(after_id=None, limit=50, columns=None, table_name='destinations'):
+    """
+    Baca satu halaman destinasi dengan keyset pagination pada kolom id
+
+    Tidak seperti OFFSET, biaya query tetap konstan di halaman mana pun karena
+    database langsung melompat ke id > after_id lewat primary key.
+
+    Parameters:
+    -----------
+    after_id : int, optional
+        Id terakhir dari halaman sebelumnya (None untuk halaman pertama)
+    limit : int
+        Jumlah baris per halaman
+    columns : list, optional
+        Kolom yang diambil (subset dari DESTINATION_COLUMNS); id selalu ikut
+    table_name : str
+        Nama tabel destinasi
+
+    Returns:
+    --------
+    list or None
+        List dictionary satu per baris, atau None jika gagal
+    """
+    try:
+        query, params = _page_query(columns, table_name, after_id, limit)
+        with _checkout() as connection, stage("table_read"):
+            return [_parse_row(row) for row in connection.execute(query, params).mappings()]
+    except Exception as e:
+        logger.error("Error reading from table '%s': %s", table_name, e)
         return None
 
+def iter_destinations(after_id=None, columns=None, batch_size=1000, table_name='destinations'):
+    """
+    Iterasi seluruh destinasi memakai server-side cursor
+
+    Baris diambil dari database per batch_size, sehingga memori tetap
+    konstan berapa pun ukuran katalog dan tidak ada DataFrame yang dibuat.
+
+    Parameters:
+    -----------
+    after_id : int, optional
+        Mulai dari id setelah nilai ini
+    columns : list, optional
+        Kolom yang diambil (subset dari DESTINATION_COLUMNS); id selalu ikut
+    batch_size : int, optional
+        Jumlah baris yang diambil per round-trip (default: 1000)
+    table_name : str
+        Nama tabel destinasi
+
+    Yields:
+    -------
+    dict
+        Satu baris destinasi
+    """
+    query, params = _page_query(columns, table_name, after_id)
+    with _checkout() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(query, params)
+        for row in result.mappings():
+            yield _parse_row(row)
+
 # Function to add data to existing table
 def add_data_to_table(title, district, category, url, table_name):
     """
@@ -176,9 +391,9 @@ def add_data_to_table(title, district, category, url, table_name):
     """
     try:
         # Check if table exists
-        inspector = inspect(engine)
+        inspector = inspect(get_engine())
         if table_name not in inspector.get_table_names():
-            print(f"Error: Table '{table_name}' does not exist")
+            logger.error("Table '%s' does not exist", table_name)
             return False
         
         # Create URL if not provided
@@ -190,23 +405,118 @@ def add_data_to_table(title, district, category, url, table_name):
         stmt = text("""
             INSERT INTO destinations (title, district, categories, url) 
             VALUES (:title, :district, :categories, :url)
+            RETURNING id
         """)
-        
+        record = {
+            'title': title,
+            'district': district,
+            'categories': category,
+            'url': url,
+        }
+
         # Execute the statement with parameters
-        with engine.connect() as connection:
-            connection.execute(stmt, {
-                'title': title,
-                'district': district,
-                'categories': category,
-                'url': url,
-            })
+        with _checkout() as connection:
+            record['id'] = connection.execute(stmt, record).scalar()
             connection.commit()
-        
+
+        _notify_change(record)
+        return True
+    except Exception as e:
+        logger.error("Error adding destination: %s", e)
+        return False
+    
+def update_destination(destination_id, title, district, category, url=None, table_name='destinations'):
+    """
+    Ubah data destinasi yang sudah ada
+
+    Parameters:
+    -----------
+    destination_id : int
+        Id destinasi yang diubah
+    title, district : str
+        Nama dan kabupaten destinasi
+    category : list
+        Daftar kategori destinasi
+    url : str, optional
+        URL Google Maps; dibuat otomatis jika kosong
+    table_name : str
+        Nama tabel destinasi
+
+    Returns:
+    --------
+    bool
+        True jika ada baris yang diubah, False otherwise
+    """
+    try:
+        if not url:
+            query = f"{title}, {district}"
+            url = f"https://www.google.com/maps/search/?api=1&query={query.replace(' ', '+')}"
+
+        stmt = text(f"""
+            UPDATE {table_name}
+            SET title = :title, district = :district, categories = :categories, url = :url
+            WHERE id = :id
+        """)
+        record = {
+            'id': destination_id,
+            'title': title,
+            'district': district,
+            'categories': category,
+            'url': url,
+        }
+
+        with _checkout() as connection:
+            updated = connection.execute(stmt, record).rowcount
+            connection.commit()
+
+        if not updated:
+            logger.warning("Destinasi dengan id %s tidak ditemukan", destination_id)
+            return False
+
+        _notify_change(record)
         return True
     except Exception as e:
-        print(f"Error adding destination: {str(e)}")
+        logger.error("Error updating destination: %s", e)
         return False
     
+def probe_table_state(table_name='destinations', checksum=False):
+    """
+    Ambil ringkasan murah isi tabel untuk mendeteksi perubahan
+
+    Parameters:
+    -----------
+    table_name : str
+        Nama tabel yang diperiksa
+    checksum : bool, optional
+        Sertakan md5 seluruh isi baris (PostgreSQL) agar perubahan data
+        yang tidak mengubah jumlah baris/id maksimum juga terdeteksi
+
+    Returns:
+    --------
+    dict or None
+        {"count": int, "max_id": int, "checksum": str or None}, atau None jika gagal
+    """
+    try:
+        with _checkout() as connection:
+            count, max_id = connection.execute(
+                text(f"SELECT COUNT(*), COALESCE(MAX(id), 0) FROM {table_name}")
+            ).one()
+
+            digest = None
+            if checksum:
+                digest = connection.execute(text(f"""
+                    SELECT md5(string_agg(
+                        id::text || ':' || coalesce(title, '') || ':' || coalesce(district, '')
+                        || ':' || coalesce(array_to_string(categories, ','), ''),
+                        '|' ORDER BY id
+                    )) FROM {table_name}
+                """)).scalar()
+
+        return {"count": int(count), "max_id": int(max_id), "checksum": digest}
+    except Exception as e:
+        logger.error("Error saat memeriksa tabel '%s': %s", table_name, e)
+        return None
+
 def search_destination_by_name(destination_name, table_name='destinations'):
     """
     Cari destinasi berdasarkan nama (case-insensitive, partial match)
@@ -223,9 +533,11 @@ def search_destination_by_name(destination_name, table_name='destinations'):
     pandas.DataFrame or None
         DataFrame berisi hasil pencarian, atau None jika gagal
     """
+    import pandas as pd
+
     try:
         if not destination_name:
-            print("Error: Nama destinasi tidak boleh kosong.")
+            logger.error("Nama destinasi tidak boleh kosong.")
             return None
 
         # Gunakan ILIKE untuk pencarian tidak sensitif huruf (case-insensitive)
@@ -234,17 +546,60 @@ def search_destination_by_name(destination_name, table_name='destinations'):
             WHERE title ILIKE :search_pattern
         """)
 
-        with engine.connect() as connection:
+        with _checkout() as connection:
             result = connection.execute(query, {'search_pattern': f'%{destination_name}%'})
             df = pd.DataFrame(result.fetchall(), columns=result.keys())
 
+        if 'categories' in df.columns:
+            df['categories'] = df['categories'].apply(parse_categories)
+
         if df.empty:
-            print(f"Tidak ditemukan destinasi dengan nama mengandung: '{destination_name}'")
+            logger.debug("Tidak ditemukan destinasi dengan nama mengandung: '%s'", destination_name)
             return pd.DataFrame()  # kosong, tapi valid
 
-        print(f"Ditemukan {df.shape[0]} hasil untuk: '{destination_name}'")
+        logger.debug("Ditemukan %s hasil untuk: '%s'", df.shape[0], destination_name)
         return df
 
     except Exception as e:
-        print(f"Error saat mencari destinasi: {str(e)}")
+        logger.error("Error saat mencari destinasi: %s", e)
         return None
+
+def ensure_trigram_index(table_name='destinations', engine=None):
+    """
+    Buat index GIN pg_trgm pada kolom title (hanya PostgreSQL)
+
+    Index ini mempercepat pencarian ILIKE '%...%' di search_destination_by_name,
+    yang tanpa index selalu memindai seluruh tabel.
+
+    Parameters:
+    -----------
+    table_name : str
+        Nama tabel destinasi
+    engine : sqlalchemy.Engine, optional
+        Engine database; default-nya engine bersama
+
+    Returns:
+    --------
+    bool
+        True jika index tersedia, False jika backend bukan PostgreSQL atau gagal
+    """
+    try:
+        engine = engine or get_engine()
+        if engine.dialect.name != "postgresql":
+            logger.info("Index pg_trgm dilewati: backend %s bukan PostgreSQL.", engine.dialect.name)
+            return False
+
+        with engine.connect() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS {table_name}_title_trgm_idx "
+                f"ON {table_name} USING gin (title gin_trgm_ops)"
+            ))
+            conn.commit()
+
+        logger.info("Index pg_trgm %s_title_trgm_idx tersedia.", table_name)
+        return True
+
+    except Exception as e:
+        logger.error("Error saat membuat index pg_trgm: %s", e)
+        return False
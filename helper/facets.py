@@ -0,0 +1,206 @@
+import numpy as np
+
+from .functions import normalize_district_name
+
+def category_key(category):
+    """
+    Kunci pencocokan kategori (tidak peka huruf besar/kecil dan spasi)
+
+    Parameters:
+    -----------
+    category : str
+        Nama kategori
+
+    Returns:
+    --------
+    str
+        Kunci kategori yang dinormalisasi
+    """
+    return " ".join(str(category).lower().split())
+
+def district_key(district):
+    """
+    Kunci pencocokan kabupaten, memakai normalize_district_name
+
+    "sleman", "Kabupaten Sleman" dan "kabupaten  sleman" menghasilkan kunci yang sama.
+
+    Parameters:
+    -----------
+    district : str
+        Nama kabupaten/kota
+
+    Returns:
+    --------
+    str
+        Kunci kabupaten yang dinormalisasi
+    """
+    return normalize_district_name(" ".join(str(district).split()))
+
+def _group_rows(codes, rows, names, key_fn):
+    # Kelompokkan posisi baris per kode, lalu gabungkan kode yang kuncinya sama
+    postings = {}
+    display = {}
+    order = np.argsort(codes, kind='stable')
+    codes, rows = codes[order], rows[order]
+    bounds = np.flatnonzero(np.diff(codes)) + 1
+    for start, stop in zip(np.r_[0, bounds], np.r_[bounds, codes.size]):
+        if start == stop or codes[start] < 0:
+            continue
+        name = names[codes[start]]
+        key = key_fn(name)
+        display.setdefault(key, name)
+        postings.setdefault(key, []).append(rows[start:stop])
+    merged = {
+        key: parts[0].astype(np.int32) if len(parts) == 1 else np.unique(np.concatenate(parts)).astype(np.int32)
+        for key, parts in postings.items()
+    }
+    return merged, display
+
+def _move_row(postings, display, row, old_names, new_names, key_fn):
+    # Salinan postings dengan baris row dipindah dari nilai lama ke nilai baru
+    postings, display = dict(postings), dict(display)
+    old_keys = {key_fn(name) for name in old_names}
+    new_keys = {}
+    for name in new_names:
+        new_keys.setdefault(key_fn(name), name)
+    for key in old_keys - set(new_keys):
+        rows = postings[key]
+        rows = rows[rows != row]
+        if rows.size:
+            postings[key] = rows
+        else:
+            del postings[key]
+            del display[key]
+    for key, name in new_keys.items():
+        if key in old_keys:
+            continue
+        rows = postings.get(key)
+        if rows is None:
+            postings[key] = np.asarray([row], dtype=np.int32)
+            display[key] = name
+        else:
+            postings[key] = np.insert(rows, np.searchsorted(rows, row), row).astype(np.int32)
+    return postings, display
+
+class FacetIndex:
+    """
+    Index kategori dan kabupaten -> posisi baris destinasi.
+
+    Setiap nilai menyimpan array posisi baris yang terurut, sehingga filter
+    rekomendasi cukup mengiris beberapa array kecil, tanpa memindai seluruh
+    katalog per request. Daftar kategori untuk endpoint /categories juga
+    diambil dari index ini.
+
+    Parameters:
+    -----------
+    store : DestinationStore
+        Metadata destinasi; kode kabupaten/kategori-nya dikelompokkan langsung
+    """
+
+    def __init__(self, store):
+        n_rows = len(store)
+        self._districts, self._district_names = _group_rows(
+            np.asarray(store.district_codes), np.arange(n_rows), store.district_names, district_key
+        )
+        # Baris pemilik setiap kode kategori dalam layout CSR
+        category_rows = np.repeat(np.arange(n_rows), np.diff(store.category_offsets))
+        self._categories, self._category_names = _group_rows(
+            np.asarray(store.category_codes), category_rows, store.category_names, category_key
+        )
+
+    def with_row(self, row, district, categories, old_district=None, old_categories=()):
+        """
+        Index baru dengan satu baris ditambahkan atau diganti, tanpa membangun ulang
+
+        Parameters:
+        -----------
+        row : int
+            Posisi baris
+        district : str
+            Kabupaten baris tersebut ("" jika kosong)
+        categories : list
+            Kategori baris tersebut
+        old_district : str, optional
+            Kabupaten lama jika baris diganti
+        old_categories : list, optional
+            Kategori lama jika baris diganti
+
+        Returns:
+        --------
+        FacetIndex
+            Index baru (index ini tidak diubah)
+        """
+        index = FacetIndex.__new__(FacetIndex)
+        index._districts, index._district_names = _move_row(
+            self._districts, self._district_names, row,
+            [old_district] if old_district else [], [district] if district else [], district_key,
+        )
+        index._categories, index._category_names = _move_row(
+            self._categories, self._category_names, row, old_categories, categories, category_key,
+        )
+        return index
+
+    def category_rows(self, category):
+        """Posisi baris destinasi dengan kategori tersebut (array kosong jika tidak ada)."""
+        return self._categories.get(category_key(category), np.empty(0, dtype=np.int32))
+
+    def district_rows(self, district):
+        """Posisi baris destinasi di kabupaten tersebut (array kosong jika tidak ada)."""
+        return self._districts.get(district_key(district), np.empty(0, dtype=np.int32))
+
+    def candidates(self, category=None, district=None):
+        """
+        Posisi baris yang lolos semua filter
+
+        Parameters:
+        -----------
+        category : str, optional
+            Hanya destinasi dengan kategori ini
+        district : str, optional
+            Hanya destinasi di kabupaten ini
+
+        Returns:
+        --------
+        numpy.ndarray or None
+            Posisi baris terurut, atau None jika tidak ada filter
+        """
+        selected = []
+        if category:
+            selected.append(self.category_rows(category))
+        if district:
+            selected.append(self.district_rows(district))
+        if not selected:
+            return None
+
+        rows = selected[0]
+        for other in selected[1:]:
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows
+
+    def categories(self):
+        """
+        Daftar kategori beserta jumlah destinasinya, terurut menurut nama
+
+        Returns:
+        --------
+        list
+            [{"name": str, "count": int}, ...]
+        """
+        return [
+            {"name": self._category_names[key], "count": int(self._categories[key].size)}
+            for key in sorted(self._categories)
+        ]
+
+    def districts(self):
+        """
+        Daftar kabupaten beserta jumlah destinasinya, terurut menurut nama
+
+        Returns:
+        --------
+        list
+            [{"name": str, "count": int}, ...]
+        """
+        return [
+            {"name": self._district_names[key], "count": int(self._districts[key].size)}
+            for key in sorted(self._districts)
+        ]
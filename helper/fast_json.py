@@ -0,0 +1,123 @@
+"""
+Serialisasi JSON cepat untuk response yang datanya berasal dari index.
+
+Endpoint yang memakai ``response_model`` membuat model Pydantic per item,
+lalu FastAPI memvalidasi dan men-serialisasi ulang semuanya. Untuk data yang
+bentuknya sudah pasti (hasil index), endpoint mengembalikan JSONBytesResponse
+berisi byte jadi: FastAPI tidak memvalidasi Response, sedangkan
+``response_model`` tetap mendokumentasikan skema OpenAPI.
+
+orjson dipakai jika terpasang; jika tidak, json bawaan dengan output yang sama
+(UTF-8, tanpa spasi).
+"""
+import json
+
+from starlette.responses import Response
+
+from .config import env_int
+from .recommendations import recommendation_item
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - fallback ke json bawaan
+    orjson = None
+
+def dumps(content):
+    """
+    Encode objek menjadi JSON (bytes UTF-8, tanpa spasi)
+
+    Parameters:
+    -----------
+    content : object
+        dict/list/str/angka; nilai lain (mis. Decimal, datetime) dijadikan string
+
+    Returns:
+    --------
+    bytes
+        JSON hasil encode
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+def json_object(*fields):
+    """
+    Rangkai objek JSON dari pasangan (key, nilai) yang nilainya sudah di-encode
+
+    Parameters:
+    -----------
+    *fields : tuple
+        Pasangan (key, bytes JSON) sesuai urutan field di response model
+
+    Returns:
+    --------
+    bytes
+        Objek JSON
+    """
+    return b"{" + b",".join(dumps(key) + b":" + value for key, value in fields) + b"}"
+
+class JSONBytesResponse(Response):
+    """
+    Response JSON yang melewati validasi response_model FastAPI.
+
+    Isi berupa bytes dikirim apa adanya; objek lain di-encode dengan dumps().
+    """
+
+    media_type = "application/json"
+
+    def render(self, content):
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+class RecommendationFragments:
+    """
+    Cache fragmen JSON per destinasi untuk item rekomendasi.
+
+    Satu cache dimiliki satu snapshot index, sehingga rebuild atau upsert
+    (yang membuat snapshot baru) otomatis memakai fragmen baru. Fragmen dibuat
+    saat baris pertama kali direkomendasikan, sampai RAVELY_JSON_FRAGMENTS
+    entri (default 100000, 0 menonaktifkan cache); setelah itu fragmen tetap
+    di-encode per request tanpa disimpan.
+
+    Parameters:
+    -----------
+    store : DestinationStore
+        Metadata destinasi milik snapshot
+    max_entries : int, optional
+        Jumlah fragmen maksimum (default: RAVELY_JSON_FRAGMENTS)
+    """
+
+    def __init__(self, store, max_entries=None):
+        self.store = store
+        self.max_entries = env_int("RAVELY_JSON_FRAGMENTS", 100000) if max_entries is None else max_entries
+        self._fragments = {}
+
+    def __len__(self):
+        return len(self._fragments)
+
+    def encode(self, row):
+        """Fragmen JSON satu item rekomendasi (format sama dengan RecommendationItem)."""
+        fragment = self._fragments.get(row)
+        if fragment is None:
+            fragment = dumps(recommendation_item(self.store, row))
+            # Assignment dict atomik; dua request yang membuat fragmen sama tidak masalah
+            if len(self._fragments) < self.max_entries:
+                self._fragments[row] = fragment
+        return fragment
+
+    def encode_rows(self, rows):
+        """
+        Array JSON item rekomendasi untuk baris-baris tersebut
+
+        Parameters:
+        -----------
+        rows : array-like
+            Posisi baris destinasi, sesuai urutan rekomendasi
+
+        Returns:
+        --------
+        bytes
+            Array JSON
+        """
+        return b"[" + b",".join(self.encode(int(row)) for row in rows) + b"]"
@@ -1,20 +1,361 @@
-import pandas as pd
+import numpy as np
 
-def destination_recommendations(title, similarity_data, items, k=5):
+from .metrics import stage
+
+def top_k_indices(scores, k, exclude=None):
+    """
+    Pilih k indeks dengan skor tertinggi memakai seleksi parsial (argpartition)
+
+    Parameters:
+    -----------
+    scores : numpy.ndarray
+        Array 1 dimensi berisi skor similarity
+    k : int
+        Jumlah indeks yang diambil
+    exclude : int or array-like, optional
+        Indeks yang tidak boleh ikut terpilih (misalnya destinasi itu sendiri)
+
+    Returns:
+    --------
+    numpy.ndarray
+        Indeks terpilih, terurut dari skor tertinggi
+    """
+    if exclude is not None:
+        scores = scores.astype(np.float64, copy=True)
+        scores[exclude] = -np.inf
+
+    n_candidates = scores.shape[0] if exclude is None else scores.shape[0] - np.size(exclude)
+    k = min(k, max(n_candidates, 0))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    if k < scores.shape[0]:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.shape[0])
+
+    # Urutkan hanya k kandidat, bukan seluruh katalog
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+def similarity_scores(row, tfidf_matrix):
+    """
+    Hitung cosine similarity satu destinasi terhadap seluruh katalog
+
+    Vektor TF-IDF sudah ternormalisasi L2, sehingga cosine similarity cukup
+    dihitung sebagai perkalian satu baris sparse dengan transpose matriks.
+
+    Parameters:
+    -----------
+    row : int
+        Posisi baris destinasi di tfidf_matrix
+    tfidf_matrix : scipy.sparse.csr_matrix
+        Matriks TF-IDF seluruh destinasi
+
+    Returns:
+    --------
+    numpy.ndarray
+        Skor similarity dengan panjang sama dengan jumlah destinasi
+    """
+    return (tfidf_matrix[row] @ tfidf_matrix.T).toarray().ravel()
+
+def compute_top_k_neighbors(tfidf_matrix, k, batch_size=1024):
+    """
+    Prekomputasi k tetangga terdekat untuk setiap destinasi
+
+    Similarity dihitung per blok baris sehingga memori puncak sebesar
+    batch_size x N, dan hasil akhirnya hanya N x k.
+
+    Parameters:
+    -----------
+    tfidf_matrix : scipy.sparse.csr_matrix
+        Matriks TF-IDF seluruh destinasi
+    k : int
+        Jumlah tetangga yang disimpan per destinasi
+    batch_size : int, optional
+        Jumlah baris yang diproses per blok (default: 1024)
+
+    Returns:
+    --------
+    tuple
+        (numpy.ndarray, numpy.ndarray) - (neighbor_ids int32 N x k, neighbor_scores float32 N x k)
+    """
+    n_rows = tfidf_matrix.shape[0]
+    k = min(k, max(n_rows - 1, 0))
+    neighbor_ids = np.zeros((n_rows, k), dtype=np.int32)
+    neighbor_scores = np.zeros((n_rows, k), dtype=np.float32)
+    if k == 0:
+        return neighbor_ids, neighbor_scores
+
+    matrix_t = tfidf_matrix.T.tocsc()
+    for start in range(0, n_rows, batch_size):
+        stop = min(start + batch_size, n_rows)
+        block = (tfidf_matrix[start:stop] @ matrix_t).toarray()
+        # Destinasi tidak boleh menjadi tetangga dirinya sendiri
+        block[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+
+        candidates = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        candidate_scores = np.take_along_axis(block, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind='stable')
+
+        neighbor_ids[start:stop] = np.take_along_axis(candidates, order, axis=1)
+        neighbor_scores[start:stop] = np.take_along_axis(candidate_scores, order, axis=1)
+
+    return neighbor_ids, neighbor_scores
+
+def batch_top_k(rows, tfidf_matrix, k):
+    """
+    Hitung top-k tetangga untuk banyak destinasi sekaligus
+
+    Skor dihitung dengan satu perkalian sparse x sparse (B x N) dan seleksi
+    top-k dilakukan secara tervektorisasi untuk semua baris.
+
+    Parameters:
+    -----------
+    rows : array-like
+        Posisi baris destinasi di tfidf_matrix
+    tfidf_matrix : scipy.sparse.csr_matrix
+        Matriks TF-IDF seluruh destinasi
+    k : int
+        Jumlah tetangga per destinasi
+
+    Returns:
+    --------
+    tuple
+        (numpy.ndarray, numpy.ndarray) - (neighbor_ids B x k, neighbor_scores B x k)
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    k = min(k, max(tfidf_matrix.shape[0] - 1, 0))
+    if rows.size == 0 or k == 0:
+        return np.zeros((rows.size, 0), dtype=np.int64), np.zeros((rows.size, 0))
+
+    with stage("similarity"):
+        block = (tfidf_matrix[rows] @ tfidf_matrix.T).toarray()
+        block[np.arange(rows.size), rows] = -np.inf
+
+    with stage("top_k"):
+        candidates = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        candidate_scores = np.take_along_axis(block, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind='stable')
+        return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(candidate_scores, order, axis=1)
+
+def update_neighbors_for_row(neighbor_ids, neighbor_scores, row, scores, tfidf_matrix):
+    """
+    Perbarui daftar top-K setelah satu destinasi ditambahkan atau diubah
+
+    Hanya baris yang terdampak yang disentuh: baris yang skornya terhadap
+    destinasi baru melebihi tetangga terakhirnya, serta baris yang sebelumnya
+    menyimpan destinasi tersebut (dihitung ulang karena skornya bisa turun).
+
+    Parameters:
+    -----------
+    neighbor_ids : numpy.ndarray
+        Array N x K id tetangga (sudah mencakup baris baru jika ditambahkan)
+    neighbor_scores : numpy.ndarray
+        Array N x K skor tetangga, sejajar dengan neighbor_ids
+    row : int
+        Posisi baris destinasi yang ditambahkan/diubah
+    scores : numpy.ndarray
+        Similarity baris tersebut terhadap seluruh katalog
+    tfidf_matrix : scipy.sparse.csr_matrix
+        Matriks TF-IDF terbaru
+
+    Returns:
+    --------
+    tuple
+        (neighbor_ids, neighbor_scores) yang sudah diperbarui (in-place)
+    """
+    k = neighbor_ids.shape[1]
+    if k == 0:
+        return neighbor_ids, neighbor_scores
+
+    # Baris yang sebelumnya menyimpan destinasi ini harus dihitung ulang penuh
+    stale = np.flatnonzero((neighbor_ids == row).any(axis=1))
+    stale = stale[stale != row]
+    for other in stale:
+        other_scores = similarity_scores(other, tfidf_matrix)
+        top = top_k_indices(other_scores, k, exclude=other)
+        neighbor_ids[other, :len(top)] = top
+        neighbor_scores[other, :len(top)] = other_scores[top]
+
+    # Baris lain cukup menyisipkan destinasi baru jika skornya masuk top-K
+    affected = np.flatnonzero(scores > neighbor_scores[:, -1])
+    affected = affected[(affected != row) & ~np.isin(affected, stale)]
+    if affected.size:
+        merged_ids = np.concatenate(
+            [neighbor_ids[affected], np.full((affected.size, 1), row, dtype=neighbor_ids.dtype)], axis=1
+        )
+        merged_scores = np.concatenate(
+            [neighbor_scores[affected], scores[affected, None].astype(neighbor_scores.dtype)], axis=1
+        )
+        order = np.argsort(-merged_scores, axis=1, kind='stable')[:, :k]
+        neighbor_ids[affected] = np.take_along_axis(merged_ids, order, axis=1)
+        neighbor_scores[affected] = np.take_along_axis(merged_scores, order, axis=1)
+
+    # Top-K milik destinasi itu sendiri
+    top = top_k_indices(scores, k, exclude=row)
+    neighbor_ids[row, :len(top)] = top
+    neighbor_scores[row, :len(top)] = scores[top]
+
+    return neighbor_ids, neighbor_scores
+
+def recommend_rows(row, tfidf_matrix, k=5, neighbors=None, ann=None, candidates=None):
+    """
+    Posisi baris k destinasi paling mirip dengan destinasi pada baris row
+
+    Parameters:
+    -----------
+    row : int
+        Posisi baris destinasi acuan
+    tfidf_matrix : scipy.sparse.csr_matrix
+        TF-IDF matrix with one row per destination
+    k : int, optional
+        Jumlah rekomendasi (default: 5)
+    neighbors : tuple, optional
+        Precomputed (neighbor_ids, neighbor_scores) from compute_top_k_neighbors,
+        used when it holds at least k neighbours per destination
+    ann : RandomProjectionLSH, optional
+        Index ANN; jika ada, hanya kandidat dari bucket yang sama yang dinilai
+    candidates : numpy.ndarray, optional
+        Posisi baris terurut yang boleh direkomendasikan (hasil filter
+        kategori/kabupaten); hanya baris ini yang dinilai
+
+    Returns:
+    --------
+    numpy.ndarray
+        Posisi baris rekomendasi, terurut dari yang paling mirip
+    """
+    if candidates is not None:
+        return filtered_top_k(row, tfidf_matrix, candidates, k, neighbors)
+
+    if neighbors is not None and neighbors[0].shape[1] >= k:
+        # Pakai daftar tetangga yang sudah diprekomputasi
+        with stage("top_k"):
+            return neighbors[0][row, :k]
+
+    if ann is not None:
+        with stage("ann_query"):
+            return ann.query_row(row, k)
+
+    # Hitung similarity satu baris secara on-demand
+    with stage("similarity"):
+        scores = similarity_scores(row, tfidf_matrix)
+    with stage("top_k"):
+        return top_k_indices(scores, k, exclude=row)
+
+def filtered_top_k(row, tfidf_matrix, candidates, k, neighbors=None):
+    """
+    Top-k destinasi paling mirip yang termasuk dalam himpunan kandidat
+
+    Daftar tetangga prekomputasi diperiksa lebih dulu: jika minimal k di
+    antaranya lolos filter, hasilnya sudah pasti top-k yang benar. Jika tidak,
+    similarity hanya dihitung terhadap baris kandidat, bukan seluruh katalog,
+    sehingga filter tetap menghasilkan tepat k rekomendasi (atau semua
+    kandidat jika jumlahnya kurang dari k).
+
+    Parameters:
+    -----------
+    row : int
+        Posisi baris destinasi acuan
+    tfidf_matrix : scipy.sparse.csr_matrix
+        Matriks TF-IDF seluruh destinasi
+    candidates : numpy.ndarray
+        Posisi baris terurut yang lolos filter
+    k : int
+        Jumlah rekomendasi
+    neighbors : tuple, optional
+        (neighbor_ids, neighbor_scores) hasil compute_top_k_neighbors
+
+    Returns:
+    --------
+    numpy.ndarray
+        Posisi baris rekomendasi, terurut dari yang paling mirip
+    """
+    if neighbors is not None:
+        with stage("top_k"):
+            neighbor_ids = np.asarray(neighbors[0][row])
+            position = np.searchsorted(candidates, neighbor_ids)
+            position[position == candidates.size] = 0
+            allowed = neighbor_ids[candidates[position] == neighbor_ids] if candidates.size else neighbor_ids[:0]
+            if allowed.size >= k:
+                return allowed[:k]
+
+    # Destinasi acuan tidak boleh merekomendasikan dirinya sendiri
+    candidates = candidates[candidates != row]
+    with stage("similarity"):
+        scores = (tfidf_matrix[row] @ tfidf_matrix[candidates].T).toarray().ravel()
+    with stage("top_k"):
+        return candidates[top_k_indices(scores, k)]
+
+def centroid_top_k(rows, weights, tfidf_matrix, k, candidates=None):
+    """
+    Top-k destinasi paling mirip dengan centroid berbobot beberapa destinasi
+
+    Baris TF-IDF semua seed digabung menjadi satu vektor query (rata-rata
+    berbobot, lalu dinormalisasi L2), kemudian seluruh katalog dinilai dengan
+    satu perkalian matriks sparse-vektor. Seed sendiri tidak ikut direkomendasikan.
+
+    Parameters:
+    -----------
+    rows : array-like
+        Posisi baris destinasi seed (boleh berulang; bobotnya dijumlahkan)
+    weights : array-like
+        Bobot positif per seed, sepanjang rows
+    tfidf_matrix : scipy.sparse.csr_matrix
+        Matriks TF-IDF seluruh destinasi
+    k : int
+        Jumlah rekomendasi
+    candidates : numpy.ndarray, optional
+        Posisi baris terurut yang boleh direkomendasikan (hasil filter
+        kategori/kabupaten); hanya baris ini yang dinilai
+
+    Returns:
+    --------
+    tuple
+        (numpy.ndarray, numpy.ndarray) - posisi baris rekomendasi dan skor
+        cosine-nya terhadap centroid, terurut dari yang paling mirip
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    weights = np.asarray(weights, dtype=tfidf_matrix.dtype)
+    seeds = np.unique(rows)
+
+    with stage("similarity"):
+        centroid = tfidf_matrix[rows].T @ (weights / weights.sum())
+        norm = np.linalg.norm(centroid)
+        if norm > 0:
+            centroid /= norm
+        if candidates is None:
+            scores = tfidf_matrix @ centroid
+        else:
+            candidates = candidates[~np.isin(candidates, seeds)]
+            scores = tfidf_matrix[candidates] @ centroid
+
+    with stage("top_k"):
+        if candidates is None:
+            top = top_k_indices(scores, k, exclude=seeds)
+            return top, scores[top]
+        top = top_k_indices(scores, k)
+        return candidates[top], scores[top]
+
+def destination_recommendations(title, tfidf_matrix, items, k=5, neighbors=None, title_index=None):
     """
     Generate destination recommendations based on content similarity
-    
+
     Parameters:
     -----------
     title : str
         Name of the destination to find recommendations for
-    similarity_data : pandas.DataFrame
-        DataFrame containing similarity scores between destinations
+    tfidf_matrix : scipy.sparse.csr_matrix
+        TF-IDF matrix with one row per destination (same order as items)
     items : pandas.DataFrame
         DataFrame containing destination details
     k : int, optional
         Number of recommendations to return (default: 5)
-    
+    neighbors : tuple, optional
+        Precomputed (neighbor_ids, neighbor_scores) from compute_top_k_neighbors
+    title_index : TitleIndex, optional
+        Index judul untuk lookup O(1) dan saran nama mirip; tanpa index ini
+        judul dicari secara linear dan harus sama persis
+
     Returns:
     --------
     pandas.DataFrame or str
@@ -24,20 +365,25 @@ def destination_recommendations(title, similarity_data, items, k=5):
     title = str(title).strip()
 
     # Validasi keberadaan
-    if title not in similarity_data.columns:
+    if title_index is not None:
+        row = title_index.lookup(title)
+    else:
+        positions = np.flatnonzero(items['title'].to_numpy() == title)
+        row = int(positions[0]) if positions.size else None
+
+    if row is None:
         # Coba bantu user dengan menyarankan nama mirip
-        suggestions = [name for name in similarity_data.columns if title.lower() in name.lower()]
+        if title_index is not None:
+            suggestions = title_index.suggest(title)
+        else:
+            suggestions = [name for name in items['title'] if title.lower() in str(name).lower()]
         if suggestions:
             return f"❌ '{title}' tidak ditemukan.\n🔍 Mungkin maksud Anda: {', '.join(suggestions)}"
         else:
             return f"❌ '{title}' tidak ditemukan dalam database."
 
-    # Cari similarity
-    similarity_series = similarity_data[title].sort_values(ascending=False)
-    top_k = similarity_series.drop(labels=[title]).head(k)
-
-    # Kembalikan detail dari items
-    return items[items['title'].isin(top_k.index)]
+    # Kembalikan detail dari items, terurut dari yang paling mirip
+    return items.iloc[recommend_rows(row, tfidf_matrix, k, neighbors)]
 
 def search_destinations(keyword, items):
     """
@@ -57,14 +403,13 @@ def search_destinations(keyword, items):
     """
     keyword = str(keyword).strip().lower()
     
-    # Search in both name and descriptions if available
-    name_matches = items[items['title'].str.lower().str.contains(keyword)]
+    # Satu mask gabungan (substring literal, bukan regex) agar tabel hanya dipindai sekali per kolom
+    mask = items['title'].str.lower().str.contains(keyword, regex=False, na=False)
     
     if 'descriptions' in items.columns:
-        desc_matches = items[items['descriptions'].str.lower().str.contains(keyword)]
-        return pd.concat([name_matches, desc_matches]).drop_duplicates()
+        mask |= items['descriptions'].str.lower().str.contains(keyword, regex=False, na=False)
     
-    return name_matches
+    return items[mask]
 
 def get_destination_details(title, items):
     """
@@ -0,0 +1,747 @@
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+from scipy import sparse
+
+from .ann import RandomProjectionLSH, ann_enabled
+from .config import configure_logging, env_float, env_int, env_str
+from .facets import FacetIndex
+from .fast_json import RecommendationFragments
+from .functions import compute_top_k_neighbors, similarity_scores, update_neighbors_for_row
+from .metrics import INDEX_BUILD_SECONDS, INDEX_BUILD_WAITS, observe_stage, record_stages, stage
+from .recommendations import fit_tfidf, load_destinations, prepare_destinations
+from .store import DestinationStore
+from .title_index import TitleIndex
+
+logger = logging.getLogger(__name__)
+
+# Nomor urut snapshot di proses ini; next() atomik sehingga aman dari banyak thread
+_snapshot_sequence = itertools.count(1)
+
+def _new_version(built_at):
+    # Waktu build saja bisa sama untuk dua snapshot dalam milidetik yang sama
+    # (misalnya upsert tepat setelah build), padahal versi dipakai sebagai
+    # ETag dan kunci cache; nomor urut dan pid membuatnya unik antar snapshot
+    # dan antar worker
+    return f"{int(built_at * 1000):x}-{os.getpid():x}-{next(_snapshot_sequence):x}"
+
+def _search_terms(store):
+    # Teks tambahan untuk pencarian: kabupaten dan kategori setiap destinasi
+    return [
+        " ".join([district] + categories)
+        for district, categories in zip(store.districts(), store.category_lists())
+    ]
+
+class IndexSnapshot:
+    """
+    Hasil satu kali build model rekomendasi. Objek ini tidak pernah diubah
+    setelah dibuat, sehingga request yang sedang berjalan tetap aman memakai
+    snapshot lama ketika index dibangun ulang.
+
+    Attributes:
+    -----------
+    store : DestinationStore
+        Metadata destinasi (id, judul, kabupaten, kategori) dalam bentuk kolom ringkas
+    vectorizer : TfidfVectorizer
+        Vectorizer yang sudah di-fit pada deskripsi destinasi; snapshot dari
+        artifact membuatnya saat pertama kali dibutuhkan (lewat vectorizer_factory)
+        agar jalur serving tidak perlu mengimpor scikit-learn
+    tfidf_matrix : scipy.sparse.csr_matrix
+        Matriks TF-IDF dengan satu baris per destinasi
+    neighbors : tuple or None
+        (neighbor_ids, neighbor_scores) berukuran N x K jika top-K diprekomputasi
+    titles : TitleIndex
+        Index judul untuk lookup exact dan saran "did you mean"
+    facets : FacetIndex
+        Posisi baris per kategori dan kabupaten untuk filter rekomendasi
+    ann : RandomProjectionLSH or None
+        Index ANN jika mode RAVELY_ANN=lsh aktif
+    fragments : RecommendationFragments
+        Cache fragmen JSON item rekomendasi per destinasi untuk response cepat
+    known_terms : frozenset
+        Semua term hasil analyzer saat fit, termasuk yang dipangkas
+        max_features/max_df; dasar pengukuran drift vocabulary
+    table_checksum : str or None
+        Checksum tabel destinations saat data snapshot dibaca (hanya jika
+        RAVELY_REFRESH_PROBE=checksum); dibandingkan oleh IndexRefresher
+    version : str
+        Penanda unik untuk snapshot ini (checksum artifact, atau waktu build
+        + pid + nomor urut untuk snapshot yang dibangun di proses ini)
+    built_at : float
+        Waktu build selesai (epoch seconds)
+    build_seconds : float
+        Lama proses build dalam detik
+    """
+
+    def __init__(self, store, vectorizer, tfidf_matrix, neighbors, built_at, build_seconds, version=None, ann=None,
+                 vectorizer_factory=None, titles=None, facets=None, known_terms=None, table_checksum=None):
+        self.store = store
+        self._vectorizer = vectorizer
+        self._vectorizer_factory = vectorizer_factory
+        self._vectorizer_lock = threading.Lock()
+        self._known_terms = known_terms
+        self.tfidf_matrix = tfidf_matrix
+        self.neighbors = neighbors
+        self.ann = ann
+        self.built_at = built_at
+        self.build_seconds = build_seconds
+        self.table_checksum = table_checksum
+        self.version = version or _new_version(built_at)
+        # Lookup judul O(1), saran nama mirip dan pencarian berbasis token/trigram;
+        # upsert_snapshot memberikan index yang sudah diperbarui per baris
+        self.titles = titles if titles is not None else TitleIndex(store.titles, _search_terms(store))
+        # Posisi baris per kategori/kabupaten untuk filter tanpa scan katalog
+        self.facets = facets if facets is not None else FacetIndex(store)
+        # Fragmen JSON per destinasi, dibuat saat pertama kali direkomendasikan
+        self.fragments = RecommendationFragments(store)
+
+    def __len__(self):
+        return len(self.store)
+
+    @property
+    def vectorizer(self):
+        """Vectorizer TF-IDF snapshot ini (dibuat dari factory saat pertama kali diakses)."""
+        if self._vectorizer is None and self._vectorizer_factory is not None:
+            with self._vectorizer_lock:
+                if self._vectorizer is None:
+                    self._vectorizer = self._vectorizer_factory()
+        return self._vectorizer
+
+    @property
+    def known_terms(self):
+        """Term yang terlihat saat fit: vocabulary ditambah term yang dipangkas (pruned_terms_)."""
+        if self._known_terms is None:
+            vectorizer = self.vectorizer
+            pruned = getattr(vectorizer, "pruned_terms_", None) or ()
+            self._known_terms = frozenset(vectorizer.vocabulary_).union(pruned)
+        return self._known_terms
+
+    @property
+    def max_id(self):
+        """Id destinasi terbesar di snapshot ini (0 jika kosong)."""
+        if len(self.store) == 0:
+            return 0
+        return int(self.store.ids.max())
+
+    @property
+    def nbytes(self):
+        """Ukuran index (matriks TF-IDF, tetangga dan store metadata) dalam byte."""
+        matrix = self.tfidf_matrix
+        total = matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+        if self.neighbors is not None:
+            total += sum(array.nbytes for array in self.neighbors)
+        return int(total + self.store.nbytes)
+
+def _build_parts(top_k=None):
+    # Bagian build yang berat CPU; hasilnya bisa di-pickle sehingga dapat
+    # dijalankan di proses build terpisah (lihat build_snapshot_in_pool).
+    # Durasi tiap tahap ikut dikembalikan lewat "stages", karena metrik yang
+    # dicatat di proses build tidak terlihat di /metrics proses server.
+    started = time.perf_counter()
+    with record_stages() as stages:
+        # Checksum diambil sebelum tabel dibaca: perubahan di antaranya paling
+        # buruk memicu satu rebuild tambahan, tidak pernah terlewat
+        table_checksum = None
+        if env_str("RAVELY_REFRESH_PROBE", "count") == "checksum":
+            from .db_connection import probe_table_state
+            state = probe_table_state(checksum=True)
+            table_checksum = state["checksum"] if state else None
+
+        success, df = load_destinations()
+        if not success:
+            return None
+
+        vectorizer, tfidf_matrix = fit_tfidf(df['description'])
+
+        ann = None
+        if ann_enabled():
+            with stage("ann_fit"):
+                ann = RandomProjectionLSH.from_env().fit(tfidf_matrix)
+
+        neighbors = None
+        if top_k is None:
+            top_k = env_int("RAVELY_PRECOMPUTE_TOP_K", 0 if ann is not None else 20)
+        if top_k > 0:
+            with stage("neighbors"):
+                neighbors = compute_top_k_neighbors(tfidf_matrix, top_k)
+
+    # Kolom object DataFrame (url, description) tidak disimpan; hanya store ringkas
+    return {
+        "store": DestinationStore.from_frame(df),
+        "vectorizer": vectorizer,
+        "tfidf_matrix": tfidf_matrix,
+        "neighbors": neighbors,
+        "ann": ann,
+        "build_seconds": time.perf_counter() - started,
+        "table_checksum": table_checksum,
+        "stages": stages,
+    }
+
+def build_snapshot(top_k=None):
+    """
+    Bangun snapshot baru dari data di database
+
+    Jumlah tetangga yang diprekomputasi diatur lewat RAVELY_PRECOMPUTE_TOP_K
+    (default 20, sesuai limit maksimum endpoint; 0 untuk menonaktifkan).
+    Memori yang dipakai sebanding dengan N x K, bukan N x N. Pada mode ANN
+    (RAVELY_ANN=lsh) prekomputasi yang kuadratik dilewati secara default dan
+    query dijawab lewat index LSH.
+
+    Parameters:
+    -----------
+    top_k : int, optional
+        Override jumlah tetangga yang diprekomputasi
+
+    Returns:
+    --------
+    IndexSnapshot or None
+        Snapshot baru, atau None jika data tidak dapat dimuat
+    """
+    parts = _build_parts(top_k)
+    if parts is None:
+        return None
+    # Di thread ini durasi tahap sudah tercatat langsung oleh stage()
+    parts.pop("stages")
+    return IndexSnapshot(built_at=time.time(), **parts)
+
+def build_executor(processes=1):
+    """
+    Pool proses khusus untuk build index
+
+    Memakai start method "spawn" agar proses build membuat koneksi database
+    sendiri, tidak mewarisi socket connection pool dari proses server.
+
+    Parameters:
+    -----------
+    processes : int, optional
+        Jumlah proses build (default: 1)
+
+    Returns:
+    --------
+    concurrent.futures.ProcessPoolExecutor
+        Executor untuk build_snapshot_in_pool
+    """
+    return ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=configure_logging,
+    )
+
+def build_snapshot_in_pool(executor, top_k=None):
+    """
+    Bangun snapshot dengan pekerjaan berat (baca tabel, fit TF-IDF, tetangga) di proses build
+
+    Thread pemanggil hanya menunggu hasil; index judul dan kategori dibangun
+    di proses ini dari store hasil build.
+
+    Parameters:
+    -----------
+    executor : concurrent.futures.ProcessPoolExecutor
+        Pool dari build_executor
+    top_k : int, optional
+        Override jumlah tetangga yang diprekomputasi
+
+    Returns:
+    --------
+    IndexSnapshot or None
+        Snapshot baru, atau None jika data tidak dapat dimuat
+    """
+    parts = executor.submit(_build_parts, top_k).result()
+    if parts is None:
+        return None
+    # Durasi tahap dari proses build dicatat ke registry proses ini
+    for name, seconds in parts.pop("stages").items():
+        observe_stage(name, seconds)
+    return IndexSnapshot(built_at=time.time(), **parts)
+
+def upsert_snapshot(snapshot, record):
+    """
+    Lipat satu destinasi baru/berubah ke dalam snapshot tanpa refit penuh
+
+    Deskripsi destinasi di-transform dengan vocabulary yang sudah ada, baris
+    TF-IDF-nya ditambahkan (atau menggantikan baris lama dengan id yang sama),
+    lalu hanya daftar top-K tetangga yang terdampak yang diperbarui. Biayanya
+    O(nnz + N x K) per destinasi, bukan O(N^2).
+
+    Parameters:
+    -----------
+    snapshot : IndexSnapshot
+        Snapshot aktif (tidak diubah)
+    record : dict
+        Data destinasi dengan key id, title, district, categories, url
+
+    Returns:
+    --------
+    IndexSnapshot
+        Snapshot baru yang sudah memuat destinasi tersebut
+    """
+    import pandas as pd
+
+    started = time.perf_counter()
+    new_item = prepare_destinations(pd.DataFrame([record]))
+    vector = sparse.csr_matrix(snapshot.vectorizer.transform(new_item['description']))
+    vector = vector.astype(snapshot.tfidf_matrix.dtype)
+
+    matrix = snapshot.tfidf_matrix
+    existing = np.flatnonzero(snapshot.store.ids == record.get('id'))
+
+    old_district, old_categories = "", []
+    if len(existing):
+        # Destinasi diubah: ganti baris lama
+        row = int(existing[0])
+        matrix = sparse.vstack([matrix[:row], vector, matrix[row + 1:]], format='csr')
+        old_district, old_categories = snapshot.store.district(row), snapshot.store.categories(row)
+        store = snapshot.store.with_record(record, row)
+    else:
+        # Destinasi baru: tambahkan di akhir
+        row = matrix.shape[0]
+        matrix = sparse.vstack([matrix, vector], format='csr')
+        store = snapshot.store.with_record(record)
+
+    # Index judul dan kategori/kabupaten diperbarui untuk baris ini saja
+    district, categories = store.district(row), store.categories(row)
+    titles = snapshot.titles.with_row(
+        row, store.titles[row], " ".join([district] + categories), " ".join([old_district] + old_categories)
+    )
+    facets = snapshot.facets.with_row(row, district, categories, old_district, old_categories)
+
+    neighbors = None
+    if snapshot.neighbors is not None:
+        neighbor_ids = np.array(snapshot.neighbors[0])
+        neighbor_scores = np.array(snapshot.neighbors[1])
+        if row == neighbor_ids.shape[0]:
+            neighbor_ids = np.vstack([neighbor_ids, np.zeros((1, neighbor_ids.shape[1]), dtype=neighbor_ids.dtype)])
+            neighbor_scores = np.vstack([neighbor_scores, np.full((1, neighbor_scores.shape[1]), -np.inf, dtype=neighbor_scores.dtype)])
+        scores = similarity_scores(row, matrix)
+        neighbors = update_neighbors_for_row(neighbor_ids, neighbor_scores, row, scores, matrix)
+
+    return IndexSnapshot(
+        store=store,
+        vectorizer=snapshot.vectorizer,
+        tfidf_matrix=matrix,
+        neighbors=neighbors,
+        built_at=time.time(),
+        build_seconds=time.perf_counter() - started,
+        ann=snapshot.ann.with_row(matrix, row) if snapshot.ann is not None else None,
+        titles=titles,
+        facets=facets,
+        known_terms=snapshot.known_terms,
+    )
+
+class RecommendationIndex:
+    """
+    Index rekomendasi yang hidup sepanjang umur proses.
+
+    Index dibangun sekali (biasanya saat startup aplikasi) lalu dipakai ulang
+    oleh setiap request. ``rebuild()`` aman dipanggil dari beberapa thread:
+    build dijalankan berurutan dan snapshot baru dipasang dengan satu
+    assignment, jadi pembaca tidak pernah melihat index setengah jadi.
+
+    Dengan use_build_processes() build dijalankan di pool proses khusus,
+    sehingga fit TF-IDF dan perhitungan tetangga tidak memakan thread
+    request. Saat index belum ada, semua pemanggil ensure_built() menunggu
+    satu build yang sama (single-flight).
+    """
+
+    def __init__(self, builder=build_snapshot, build_processes=0):
+        self._builder = builder
+        self._snapshot = None
+        self._build_lock = threading.Lock()
+        # Lock singkat untuk memasang snapshot; upsert tidak menunggu build yang berjalan
+        self._snapshot_lock = threading.Lock()
+        # Destinasi yang di-upsert selama build berjalan (None jika tidak ada build)
+        self._pending_upserts = None
+        # 0: build di thread pemanggil (aman untuk skrip tanpa guard __main__)
+        self._build_processes = build_processes
+        self._executor = None
+        # Build yang sedang berjalan untuk ensure_built dan jumlah penunggunya
+        self._flight = None
+        self._flight_lock = threading.Lock()
+        self._waiters = 0
+        # Term baru (di luar vocabulary) yang terlihat sejak fit terakhir
+        self._unseen_terms = set()
+        # Generasi index bersama yang sedang dipakai (lihat shared_index.py)
+        self.generation = None
+
+    @property
+    def snapshot(self):
+        """Snapshot aktif saat ini, atau None jika index belum dibangun."""
+        return self._snapshot
+
+    @property
+    def is_ready(self):
+        return self._snapshot is not None
+
+    @property
+    def is_building(self):
+        """True jika build single-flight sedang berjalan."""
+        return self._flight is not None
+
+    @property
+    def build_waiters(self):
+        """Jumlah pemanggil yang sedang menunggu build single-flight."""
+        return self._waiters
+
+    def use_build_processes(self, processes):
+        """
+        Atur jumlah proses build (0 untuk build di thread pemanggil)
+
+        Proses build memakai start method "spawn", sehingga skrip yang memakai
+        index dengan proses build harus menjalankan kodenya di bawah
+        ``if __name__ == "__main__":``.
+
+        Parameters:
+        -----------
+        processes : int
+            Jumlah proses build
+        """
+        with self._build_lock:
+            if processes != self._build_processes:
+                self.close()
+                self._build_processes = max(int(processes), 0)
+
+    def close(self):
+        """Hentikan pool proses build (dipanggil saat shutdown)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _run_builder(self):
+        if self._builder is not build_snapshot:
+            return self._builder()
+
+        if self._build_processes <= 0:
+            return build_snapshot()
+
+        if self._executor is None:
+            self._executor = build_executor(self._build_processes)
+        try:
+            return build_snapshot_in_pool(self._executor)
+        except BrokenProcessPool:
+            # Proses build mati (misalnya kehabisan memori); build berikutnya memakai pool baru
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            raise
+
+    def rebuild(self):
+        """
+        Bangun ulang index dan pasang snapshot baru
+
+        Returns:
+        --------
+        bool
+            True jika build berhasil, False jika gagal (snapshot lama dipertahankan)
+        """
+        with self._build_lock:
+            return self._rebuild_locked()
+
+    def _install(self, snapshot):
+        # Pasang snapshot baru; destinasi yang di-upsert selama build dilipat
+        # ulang agar tidak hilang jika build membaca tabel sebelum insert-nya
+        with self._snapshot_lock:
+            for record in self._pending_upserts or ():
+                try:
+                    snapshot = upsert_snapshot(snapshot, record)
+                except Exception as e:
+                    logger.error("Error saat melipat ulang destinasi %s: %s", record.get('id'), e)
+            # Drift dihitung ulang terhadap term hasil fit baru: hanya destinasi
+            # yang dilipat ulang (tidak ikut fit) yang masih bisa membawa term baru
+            self._unseen_terms = set()
+            if self._pending_upserts:
+                try:
+                    self._unseen_terms = self._unseen_terms_of(snapshot, self._pending_upserts)
+                except Exception as e:
+                    logger.error("Error saat menghitung drift vocabulary: %s", e)
+            self._pending_upserts = None
+            self._snapshot = snapshot
+
+    def _rebuild_locked(self):
+        with self._snapshot_lock:
+            self._pending_upserts = []
+        try:
+            snapshot = self._run_builder()
+        except Exception as e:
+            logger.error("Error saat membangun index rekomendasi: %s", e)
+            snapshot = None
+        else:
+            if snapshot is None:
+                logger.warning("Index rekomendasi gagal dibangun; snapshot lama dipertahankan.")
+
+        if snapshot is None:
+            with self._snapshot_lock:
+                self._pending_upserts = None
+            return False
+
+        self._install(snapshot)
+        INDEX_BUILD_SECONDS.observe(snapshot.build_seconds)
+        logger.info("Index rekomendasi dibangun: %s destinasi dalam %.2fs", len(snapshot), snapshot.build_seconds)
+        return True
+
+    def load_or_build(self, path, verify=True):
+        """
+        Muat index dari artifact di disk; bangun ulang dari database jika gagal
+
+        Artifact yang tidak ada, versi skemanya berbeda, atau checksum-nya
+        tidak cocok ditolak. Index kemudian dibangun dari database dan
+        artifact baru ditulis agar startup berikutnya cukup memuat file.
+
+        Parameters:
+        -----------
+        path : str
+            Direktori artifact index
+        verify : bool, optional
+            Cocokkan checksum file artifact (default: True)
+
+        Returns:
+        --------
+        bool
+            True jika index siap dipakai
+        """
+        from .artifact import ArtifactError, load_index_artifact, save_index_artifact
+
+        with self._build_lock:
+            try:
+                started = time.perf_counter()
+                self._install(load_index_artifact(path, verify=verify))
+                logger.info("Index rekomendasi dimuat dari %s dalam %.2fs", path, time.perf_counter() - started)
+                return True
+            except ArtifactError as e:
+                logger.warning("Artifact index ditolak (%s); membangun ulang dari database.", e)
+
+            if not self._rebuild_locked():
+                return False
+
+            try:
+                save_index_artifact(self._snapshot, path)
+            except Exception as e:
+                logger.warning("Artifact index gagal ditulis: %s", e)
+            return True
+
+    def attach_generation(self, root, verify=False):
+        """
+        Pasang generasi index bersama yang aktif jika berbeda dari yang dipakai
+
+        Parameters:
+        -----------
+        root : str
+            Direktori induk index bersama
+        verify : bool, optional
+            Cocokkan checksum file artifact (default: False)
+
+        Returns:
+        --------
+        bool
+            True jika generasi baru dipasang
+        """
+        from .artifact import ArtifactError, load_index_artifact
+        from .shared_index import current_generation, generation_path
+
+        generation = current_generation(root)
+        if generation is None or generation == self.generation:
+            return False
+
+        try:
+            started = time.perf_counter()
+            snapshot = load_index_artifact(generation_path(root, generation), verify=verify)
+        except ArtifactError as e:
+            logger.warning("Generasi index %s tidak dapat dipasang: %s", generation, e)
+            return False
+
+        with self._build_lock:
+            self._install(snapshot)
+            self.generation = generation
+        logger.info("Generasi index %s dipasang dalam %.2fs", generation, time.perf_counter() - started)
+        return True
+
+    def load_or_build_shared(self, root, verify=True):
+        """
+        Pasang index bersama; bangun dan publikasikan jika belum ada
+
+        Dipakai ketika beberapa worker proses berbagi satu index. Hanya proses
+        yang memegang leader lock yang membangun index; worker lain menunggu
+        lock lalu cukup memasang generasi yang sudah dipublikasikan.
+
+        Parameters:
+        -----------
+        root : str
+            Direktori induk index bersama
+        verify : bool, optional
+            Cocokkan checksum file artifact (default: True)
+
+        Returns:
+        --------
+        bool
+            True jika index siap dipakai
+        """
+        from .shared_index import leader_lock, publish_generation
+
+        if self.attach_generation(root, verify=verify):
+            return True
+
+        with leader_lock(root):
+            # Leader lain mungkin sudah mempublikasikan selama kita menunggu lock
+            if self.attach_generation(root, verify=verify):
+                return True
+            if not self.rebuild():
+                return False
+            try:
+                self.generation = publish_generation(self._snapshot, root)
+            except Exception as e:
+                logger.warning("Generasi index gagal dipublikasikan: %s", e)
+            return True
+
+    @staticmethod
+    def _unseen_terms_of(snapshot, records):
+        # Term deskripsi destinasi yang tidak terlihat saat fit snapshot ini
+        import pandas as pd
+
+        analyzer = snapshot.vectorizer.build_analyzer()
+        known = snapshot.known_terms
+        descriptions = prepare_destinations(pd.DataFrame(list(records)))['description']
+        return {term for description in descriptions for term in analyzer(description) if term not in known}
+
+    def upsert_destination(self, record):
+        """
+        Masukkan destinasi baru atau yang diubah ke index secara inkremental
+
+        Dipanggil di jalur insert/update, jadi hanya melakukan upsert murah dan
+        tidak menunggu build yang sedang berjalan. Jika jumlah term baru di
+        luar term hasil fit terakhir melebihi RAVELY_REFIT_DRIFT (rasio terhadap
+        jumlah term yang terlihat saat fit, termasuk yang dipangkas
+        max_features; default 0.05), refit penuh dijadwalkan di latar lewat
+        start_build().
+
+        Parameters:
+        -----------
+        record : dict
+            Data destinasi dengan key id, title, district, categories, url
+
+        Returns:
+        --------
+        bool
+            True jika index berhasil diperbarui
+        """
+        with self._snapshot_lock:
+            snapshot = self._snapshot
+            if snapshot is None:
+                # Belum ada index; build pertama akan memuat destinasi ini
+                return False
+
+            try:
+                # Term yang hanya dipangkas max_features bukan term baru; refit
+                # tidak akan memasukkannya ke vocabulary
+                self._unseen_terms.update(self._unseen_terms_of(snapshot, [record]))
+                drift = len(self._unseen_terms) / max(len(snapshot.known_terms), 1)
+
+                self._snapshot = upsert_snapshot(snapshot, record)
+                if self._pending_upserts is not None:
+                    self._pending_upserts.append(record)
+            except Exception as e:
+                logger.error("Error saat memperbarui index secara inkremental: %s", e)
+                return False
+
+        if drift > env_float("RAVELY_REFIT_DRIFT", 0.05):
+            # Refit penuh berjalan di latar; request insert tidak menunggunya
+            logger.info("Drift vocabulary %.1f%% melewati ambang; refit penuh index dijadwalkan.", drift * 100)
+            self.start_build(refit=True)
+        return True
+
+    def start_build(self, refit=False):
+        """
+        Mulai build di thread latar, atau ikut build yang sedang berjalan
+
+        Parameters:
+        -----------
+        refit : bool, optional
+            Bangun ulang walaupun snapshot sudah ada (default: False, hanya
+            membangun jika index belum ada)
+
+        Returns:
+        --------
+        concurrent.futures.Future
+            Selesai dengan snapshot aktif (None jika build gagal)
+        """
+        with self._flight_lock:
+            if self._flight is None:
+                self._flight = Future()
+                threading.Thread(
+                    target=self._run_flight, args=(self._flight, refit), name="index-build", daemon=True
+                ).start()
+            return self._flight
+
+    def _run_flight(self, flight, refit=False):
+        snapshot = None
+        try:
+            with self._build_lock:
+                # Refresher atau load_or_build mungkin sudah membangun selama kita menunggu lock
+                # Refit drift dilewati jika build lain sudah me-refit vocabulary
+                if self._snapshot is None or (refit and self._unseen_terms):
+                    self._rebuild_locked()
+                snapshot = self._snapshot
+        finally:
+            # Lepas dulu agar pemanggil berikutnya memulai build baru jika build ini gagal
+            with self._flight_lock:
+                self._flight = None
+            flight.set_result(snapshot)
+
+    def ensure_built(self, timeout=None, max_waiters=None):
+        """
+        Kembalikan snapshot aktif, menunggu build terlebih dahulu jika belum ada
+
+        Pemanggil yang datang bersamaan menunggu satu build yang sama. Dengan
+        timeout/max_waiters, request tidak menumpuk menunggu build yang lama:
+        None langsung dikembalikan agar endpoint bisa menjawab 503.
+
+        Parameters:
+        -----------
+        timeout : float, optional
+            Detik maksimum menunggu build (None: tunggu sampai selesai, 0: tidak menunggu)
+        max_waiters : int, optional
+            Jumlah penunggu maksimum; pemanggil berikutnya langsung mendapat None
+
+        Returns:
+        --------
+        IndexSnapshot or None
+            Snapshot aktif, atau None jika build gagal atau belum selesai dalam batas kebijakan
+        """
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+
+        flight = self.start_build()
+        with self._flight_lock:
+            if max_waiters is not None and self._waiters >= max_waiters:
+                INDEX_BUILD_WAITS.inc(result="rejected")
+                return None
+            self._waiters += 1
+        try:
+            snapshot = flight.result(timeout=timeout)
+            INDEX_BUILD_WAITS.inc(result="ready" if snapshot is not None else "failed")
+            return snapshot
+        except FutureTimeoutError:
+            INDEX_BUILD_WAITS.inc(result="timeout")
+            return None
+        finally:
+            with self._flight_lock:
+                self._waiters -= 1
+
+_default_index = RecommendationIndex()
+
+def get_index():
+    """
+    Index rekomendasi bersama untuk proses ini
+
+    Returns:
+    --------
+    RecommendationIndex
+        Instance index default
+    """
+    return _default_index
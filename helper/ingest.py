@@ -0,0 +1,334 @@
+"""
+Ingest massal CSV destinasi ke database.
+
+CSV dibaca per potongan (chunk) sehingga memori tetap konstan berapa pun
+ukuran file. Kolom categories diubah ke TEXT[] secara tervektorisasi. Pada
+PostgreSQL setiap chunk dimuat lewat ``COPY FROM STDIN`` ke tabel staging,
+lalu digabung ke tabel tujuan; backend lain memakai executemany multi-baris.
+
+Mode ``upsert`` memperlakukan (title, district) sebagai kunci: baris yang
+sudah ada diperbarui, baris baru ditambahkan, dan duplikat di dalam file
+diambil yang terakhir. Dengan begitu impor ulang dataset tidak menggandakan
+destinasi.
+
+Contoh:
+    python -m helper.ingest ./data/destinations.csv --mode upsert --chunksize 10000
+"""
+import argparse
+import io
+import logging
+import sys
+import time
+
+import pandas as pd
+from sqlalchemy import bindparam, inspect, text
+
+from .config import configure_logging
+from .metrics import stage
+
+logger = logging.getLogger(__name__)
+
+INGEST_COLUMNS = ["title", "district", "url", "categories"]
+
+MAPS_SEARCH_URL = "https://www.google.com/maps/search/?api=1&query="
+
+def destinations_ddl(table_name, dialect_name):
+    """
+    DDL tabel destinasi untuk dialect database tertentu
+
+    Parameters:
+    -----------
+    table_name : str
+        Nama tabel
+    dialect_name : str
+        Nama dialect SQLAlchemy, misalnya "postgresql" atau "sqlite"
+
+    Returns:
+    --------
+    str
+        Pernyataan CREATE TABLE; backend tanpa tipe array menyimpan
+        categories sebagai TEXT dipisah koma
+    """
+    is_postgres = dialect_name == "postgresql"
+    return f"""
+        CREATE TABLE {table_name} (
+            id {"SERIAL PRIMARY KEY" if is_postgres else "INTEGER PRIMARY KEY"},
+            title TEXT,
+            district TEXT,
+            url TEXT,
+            categories {"TEXT[]" if is_postgres else "TEXT"}
+        )
+    """
+
+def split_categories(categories):
+    """
+    Ubah kolom categories "a, b, c" menjadi list secara tervektorisasi
+
+    Parameters:
+    -----------
+    categories : pandas.Series
+        String kategori dipisah koma (boleh kosong/NaN)
+
+    Returns:
+    --------
+    pandas.Series
+        List kategori per baris (list kosong jika tidak ada)
+    """
+    cleaned = categories.fillna("").astype(str).str.strip().str.strip(",")
+    split = cleaned.str.split(r"\s*,\s*", regex=True)
+    # "".split(...) menghasilkan [""]; kosongkan agar menjadi list kosong
+    return split.where(cleaned != "", pd.Series([[]] * len(cleaned), index=cleaned.index))
+
+def _array_literal(categories):
+    # Literal array PostgreSQL {"a","b"}; elemen di-escape sesuai aturan array
+    escaped = (
+        categories.fillna("").astype(str).str.strip().str.strip(",")
+        .str.replace("\\", "\\\\", regex=False)
+        .str.replace('"', '\\"', regex=False)
+        .str.replace(r"\s*,\s*", '","', regex=True)
+    )
+    return ('{"' + escaped + '"}').where(escaped != "", "{}")
+
+def prepare_chunk(chunk, upsert=False):
+    """
+    Normalisasi satu chunk CSV ke kolom tabel destinasi
+
+    Parameters:
+    -----------
+    chunk : pandas.DataFrame
+        Potongan CSV dengan kolom title, district, categories, dan opsional url
+    upsert : bool, optional
+        True untuk mode upsert: duplikat (title, district) di dalam chunk
+        dibuang, yang terakhir dipertahankan (default: False, semua baris dipakai)
+
+    Returns:
+    --------
+    pandas.DataFrame
+        Kolom title, district, url, categories (masih string dipisah koma),
+        tanpa baris tanpa judul
+    """
+    chunk = chunk.rename(columns=str.strip)
+    frame = pd.DataFrame(index=chunk.index)
+    frame["title"] = chunk["title"].astype("string").str.strip()
+    frame["district"] = chunk["district"].astype("string").str.strip() if "district" in chunk else pd.NA
+    frame["categories"] = chunk["categories"].astype("string") if "categories" in chunk else ""
+
+    # URL Google Maps dibuat tervektorisasi untuk baris yang tidak punya URL
+    query = frame["title"].str.replace(" ", "+", regex=False)
+    query = query.where(frame["district"].isna(), query + "," + frame["district"].str.replace(" ", "+", regex=False))
+    generated = MAPS_SEARCH_URL + query
+    if "url" in chunk:
+        url = chunk["url"].astype("string").str.strip()
+        frame["url"] = url.where(url.notna() & (url != ""), generated)
+    else:
+        frame["url"] = generated
+
+    frame = frame[frame["title"].notna() & (frame["title"] != "")]
+    if upsert:
+        # Satu statement upsert tidak boleh menyentuh baris yang sama dua kali;
+        # duplikat antar chunk ditangani oleh upsert chunk berikutnya
+        frame = frame.drop_duplicates(subset=["title", "district"], keep="last")
+    return frame[INGEST_COLUMNS]
+
+def _copy_payload(frame):
+    # CSV untuk COPY ... FORMAT csv: quoting CSV menangani koma dan tanda kutip
+    payload = frame.assign(categories=_array_literal(frame["categories"]))
+    buffer = io.StringIO()
+    payload.to_csv(buffer, header=False, index=False, na_rep="\\N")
+    buffer.seek(0)
+    return buffer
+
+def _ensure_table(engine, table_name):
+    if table_name in inspect(engine).get_table_names():
+        return False
+    with engine.begin() as conn:
+        conn.execute(text(destinations_ddl(table_name, engine.dialect.name)))
+    return True
+
+def _load_postgres(engine, chunks, table_name, upsert):
+    staging = f"_ingest_{table_name}"
+    columns = ", ".join(INGEST_COLUMNS)
+    stats = {"rows": 0, "inserted": 0, "updated": 0}
+
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute(f"""
+            CREATE TEMP TABLE {staging} (
+                seq BIGSERIAL, title TEXT, district TEXT, url TEXT, categories TEXT[]
+            ) ON COMMIT DROP
+        """)
+        for chunk in chunks:
+            with stage("ingest_copy"):
+                cursor.copy_expert(
+                    f"COPY {staging} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                    _copy_payload(chunk),
+                )
+            stats["rows"] += len(chunk)
+
+        with stage("ingest_merge"):
+            # Upsert: duplikat lintas chunk diambil baris terakhir per (title, district)
+            latest = f"""
+                SELECT DISTINCT ON (title, district) {columns}
+                FROM {staging}
+                ORDER BY title, district, seq DESC
+            """
+            if upsert:
+                cursor.execute(f"""
+                    UPDATE {table_name} AS t
+                    SET url = s.url, categories = s.categories
+                    FROM ({latest}) AS s
+                    WHERE t.title = s.title AND t.district IS NOT DISTINCT FROM s.district
+                """)
+                stats["updated"] = cursor.rowcount
+                cursor.execute(f"""
+                    INSERT INTO {table_name} ({columns})
+                    SELECT {columns} FROM ({latest}) AS s
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM {table_name} AS t
+                        WHERE t.title = s.title AND t.district IS NOT DISTINCT FROM s.district
+                    )
+                """)
+            else:
+                cursor.execute(f"INSERT INTO {table_name} ({columns}) SELECT {columns} FROM {staging} ORDER BY seq")
+            stats["inserted"] = cursor.rowcount
+        raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+    return stats
+
+def _load_executemany(engine, chunks, table_name, upsert):
+    is_array = engine.dialect.name == "postgresql"
+    stats = {"rows": 0, "inserted": 0, "updated": 0}
+    insert = text(f"""
+        INSERT INTO {table_name} (title, district, url, categories)
+        VALUES (:title, :district, :url, :categories)
+    """)
+    # Dua varian agar kondisi tetap bisa memakai index (title, district)
+    update = text(f"""
+        UPDATE {table_name} SET url = :url, categories = :categories
+        WHERE title = :title AND district = :district
+    """)
+    update_null_district = text(f"""
+        UPDATE {table_name} SET url = :url, categories = :categories
+        WHERE title = :title AND district IS NULL
+    """)
+    existing_query = text(
+        f"SELECT title, district FROM {table_name} WHERE title IN :titles"
+    ).bindparams(bindparam("titles", expanding=True))
+
+    with engine.begin() as conn:
+        for chunk in chunks:
+            with stage("ingest_executemany"):
+                frame = chunk.astype(object).where(chunk.notna(), None)
+                categories = split_categories(chunk["categories"])
+                frame["categories"] = categories if is_array else categories.str.join(",")
+                records = frame.to_dict("records")
+                stats["rows"] += len(records)
+
+                to_insert = records
+                if upsert and records:
+                    found = conn.execute(existing_query, {"titles": list({r["title"] for r in records})})
+                    keys = {(title, district) for title, district in found}
+                    to_update = [r for r in records if (r["title"], r["district"]) in keys]
+                    to_insert = [r for r in records if (r["title"], r["district"]) not in keys]
+                    for statement, batch in (
+                        (update, [r for r in to_update if r["district"] is not None]),
+                        (update_null_district, [r for r in to_update if r["district"] is None]),
+                    ):
+                        if batch:
+                            conn.execute(statement, batch)
+                    stats["updated"] += len(to_update)
+
+                if to_insert:
+                    # Satu executemany per chunk; driver mengirimnya sebagai batch
+                    conn.execute(insert, to_insert)
+                    stats["inserted"] += len(to_insert)
+    return stats
+
+def ingest_csv(dataset_path, table_name='destinations', engine=None, mode='append', chunksize=10000):
+    """
+    Muat CSV destinasi ke tabel secara massal
+
+    Parameters:
+    -----------
+    dataset_path : str
+        Path file CSV (kolom title, district, categories, opsional url)
+    table_name : str, optional
+        Tabel tujuan; dibuat jika belum ada (default: destinations)
+    engine : sqlalchemy.Engine, optional
+        Engine tujuan; default-nya engine bersama db_connection
+    mode : str, optional
+        "append" untuk menambah semua baris, "upsert" untuk memperbarui baris
+        dengan (title, district) yang sama (default: append)
+    chunksize : int, optional
+        Jumlah baris CSV per chunk (default: 10000)
+
+    Returns:
+    --------
+    dict or None
+        {"rows", "inserted", "updated", "seconds", "method"}, atau None jika gagal
+    """
+    if mode not in ("append", "upsert"):
+        raise ValueError("mode harus 'append' atau 'upsert'")
+
+    try:
+        if engine is None:
+            from .db_connection import get_engine
+            engine = get_engine()
+
+        started = time.perf_counter()
+        if _ensure_table(engine, table_name):
+            logger.info("Tabel '%s' dibuat.", table_name)
+
+        reader = pd.read_csv(dataset_path, chunksize=chunksize, dtype=str, keep_default_na=True)
+        upsert = mode == "upsert"
+        chunks = (prepare_chunk(chunk, upsert) for chunk in reader)
+        if upsert:
+            # Pencocokan (title, district) per baris butuh index agar tidak full scan
+            with engine.begin() as conn:
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS {table_name}_title_district_idx ON {table_name} (title, district)"
+                ))
+        use_copy = engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2"
+        if use_copy:
+            stats = _load_postgres(engine, chunks, table_name, upsert)
+        else:
+            stats = _load_executemany(engine, chunks, table_name, upsert)
+
+        stats["method"] = "copy" if use_copy else "executemany"
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        logger.info(
+            "Ingest %s selesai: %s baris dibaca, %s ditambahkan, %s diperbarui dalam %.2fs (%s)",
+            dataset_path, stats["rows"], stats["inserted"], stats["updated"], stats["seconds"], stats["method"],
+        )
+        return stats
+
+    except Exception as e:
+        logger.error("Error saat ingest %s: %s", dataset_path, e)
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest massal CSV destinasi ke database")
+    parser.add_argument("csv", help="File CSV dengan kolom title, district, categories (opsional url)")
+    parser.add_argument("--table", default="destinations", help="Tabel tujuan")
+    parser.add_argument("--mode", choices=["append", "upsert"], default="append",
+                        help="upsert: perbarui destinasi dengan title+district yang sama")
+    parser.add_argument("--chunksize", type=int, default=10000, help="Baris CSV per chunk")
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    stats = ingest_csv(args.csv, args.table, mode=args.mode, chunksize=args.chunksize)
+    if stats is None:
+        return 1
+    print(
+        f"{stats['rows']} baris dibaca, {stats['inserted']} ditambahkan, "
+        f"{stats['updated']} diperbarui dalam {stats['seconds']:.2f}s ({stats['method']})"
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,523 @@
+"""
+Load test server:app dengan generator beban async.
+
+Katalog sintetis ditulis ke database SQLite sementara (atau DATABASE_URL lain
+lewat --database-url, misalnya PostgreSQL lokal), artifact index dibangun
+lebih dulu, lalu aplikasi dijalankan in-process (ASGI, tanpa socket) atau di
+bawah uvicorn. Request dikirim open-loop pada laju tetap (--rps): request ke-i
+dijadwalkan pada detik i / rps, dan latensi dihitung dari waktu jadwal itu,
+sehingga antrean di server ikut terukur walaupun generator tertahan.
+
+Campuran endpoint diatur lewat --mix; nama destinasi, halaman /destinations
+dan kata kunci /search dipilih dengan distribusi Zipf (sedikit destinasi
+populer menerima sebagian besar request), seperti trafik sebenarnya.
+
+Hasil berisi throughput, persentil latensi, dan error rate per endpoint
+dalam JSON. Mode threshold (--max-p99-ms, --max-error-rate, atau --compare
+dengan --max-regression) mengembalikan exit code 1 jika dilanggar, sehingga
+bisa dipakai membandingkan antar commit.
+
+Contoh:
+    python -m helper.loadtest --rows 10000 --rps 200 --duration 30
+    python -m helper.loadtest --server uvicorn --workers 4 --rps 400 --output load.json
+    python -m helper.loadtest --compare load-main.json --max-regression 1.2 --max-error-rate 0.01
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+
+import numpy as np
+
+from .benchmark import REPO_ROOT, _git_commit, _summary
+from .config import configure_logging
+
+logger = logging.getLogger(__name__)
+
+ENDPOINTS = ("recommendations", "destinations", "search")
+
+DEFAULT_MIX = "recommendations=0.8,destinations=0.2"
+
+PAGE_SIZE = 50
+
+# Di atas ini, latensi ikut mencerminkan generator yang jenuh, bukan hanya server
+SEND_LAG_WARNING_MS = 10.0
+
+def parse_mix(value):
+    """
+    Parse campuran endpoint "recommendations=0.8,destinations=0.2"
+
+    Parameters:
+    -----------
+    value : str
+        Pasangan endpoint=bobot dipisah koma
+
+    Returns:
+    --------
+    dict
+        Bobot ternormalisasi per endpoint
+
+    Raises:
+    -------
+    ValueError
+        Jika endpoint tidak dikenal atau bobot tidak valid
+    """
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Endpoint '{name}' tidak dikenal; pilih dari {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight) if weight else 1.0
+        if mix[name] < 0:
+            raise ValueError(f"Bobot endpoint '{name}' tidak boleh negatif")
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError("Total bobot campuran endpoint harus positif")
+    return {name: weight / total for name, weight in mix.items()}
+
+def build_plan(titles, n_requests, mix, zipf=1.1, seed=0):
+    """
+    Daftar request yang akan dikirim, ditentukan lebih dulu agar run dapat diulang
+
+    Parameters:
+    -----------
+    titles : list
+        Judul destinasi di katalog (id 1..N sesuai urutan)
+    n_requests : int
+        Jumlah request
+    mix : dict
+        Bobot per endpoint dari parse_mix
+    zipf : float, optional
+        Eksponen distribusi Zipf popularitas destinasi/halaman (default: 1.1)
+    seed : int, optional
+        Seed pemilihan request
+
+    Returns:
+    --------
+    list
+        Tuple (endpoint, path, params) per request
+    """
+    from .synthetic import _zipf_weights
+
+    rng = np.random.default_rng(seed)
+    names = list(mix)
+    endpoints = rng.choice(len(names), size=n_requests, p=[mix[name] for name in names])
+
+    # Popularitas tidak berkorelasi dengan id: peringkat Zipf diacak ke judul
+    popularity = rng.permutation(len(titles))
+    title_choice = popularity[rng.choice(len(titles), size=n_requests, p=_zipf_weights(len(titles), zipf))]
+    n_pages = max((len(titles) + PAGE_SIZE - 1) // PAGE_SIZE, 1)
+    page_choice = rng.choice(n_pages, size=n_requests, p=_zipf_weights(n_pages, zipf))
+
+    plan = []
+    for i in range(n_requests):
+        endpoint = names[endpoints[i]]
+        title = titles[title_choice[i]]
+        if endpoint == "recommendations":
+            plan.append((endpoint, "/recommendations", {"destination_name": title, "limit": 5}))
+        elif endpoint == "destinations":
+            params = {"limit": PAGE_SIZE}
+            if page_choice[i]:
+                params["after_id"] = int(page_choice[i]) * PAGE_SIZE
+            plan.append((endpoint, "/destinations", params))
+        else:
+            # Kata nama tempat (tanpa jenis tempat), misalnya "prambanan"
+            words = title.split()
+            plan.append((endpoint, "/search", {"q": words[-1] if len(words) > 1 else title, "limit": 10}))
+    return plan
+
+async def run_load(client, plan, rps, max_inflight=256):
+    """
+    Kirim request sesuai rencana pada laju tetap (open-loop)
+
+    Parameters:
+    -----------
+    client : httpx.AsyncClient
+        Client ke aplikasi (in-process atau uvicorn)
+    plan : list
+        Hasil build_plan
+    rps : float
+        Laju request per detik
+    max_inflight : int, optional
+        Batas request yang berjalan bersamaan (default: 256); request yang
+        menunggu slot tetap dihitung latensinya sejak waktu jadwal
+
+    Returns:
+    --------
+    tuple
+        (list of (endpoint, latency_seconds, status atau None, send_lag_seconds), elapsed_seconds);
+        send_lag adalah keterlambatan generator mengirim request dari jadwalnya
+    """
+    semaphore = asyncio.Semaphore(max_inflight)
+    records = []
+    started = time.perf_counter()
+
+    async def fire(scheduled, endpoint, path, params):
+        async with semaphore:
+            sent = time.perf_counter()
+            try:
+                status = (await client.get(path, params=params)).status_code
+            except Exception as e:
+                logger.debug("Request %s gagal: %s", path, e)
+                status = None
+        records.append((endpoint, time.perf_counter() - scheduled, status, sent - scheduled))
+
+    tasks = []
+    for i, (endpoint, path, params) in enumerate(plan):
+        scheduled = started + i / rps
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(fire(scheduled, endpoint, path, params)))
+    await asyncio.gather(*tasks)
+    return records, time.perf_counter() - started
+
+def _is_error(status):
+    return status is None or status >= 400
+
+def summarize(records, elapsed):
+    """
+    Throughput, persentil latensi, dan error rate per endpoint
+
+    Parameters:
+    -----------
+    records : list
+        Hasil run_load
+    elapsed : float
+        Durasi run dalam detik
+
+    Returns:
+    --------
+    dict
+        {"endpoints": {endpoint: {...}}, "overall": {...}}
+    """
+    def stats(items):
+        errors = sum(1 for _, _, status, _ in items if _is_error(status))
+        statuses = {}
+        for _, _, status, _ in items:
+            key = str(status) if status is not None else "exception"
+            statuses[key] = statuses.get(key, 0) + 1
+        return {
+            "requests": len(items),
+            "errors": errors,
+            "error_rate": round(errors / len(items), 4) if items else 0.0,
+            "throughput_rps": round(len(items) / elapsed, 1) if elapsed else None,
+            "status": statuses,
+            "latency": _summary([latency for _, latency, _, _ in items]) if items else None,
+        }
+
+    by_endpoint = {}
+    for record in records:
+        by_endpoint.setdefault(record[0], []).append(record)
+    lags = np.asarray([lag for _, _, _, lag in records], dtype=np.float64) * 1000
+    return {
+        "endpoints": {endpoint: stats(items) for endpoint, items in sorted(by_endpoint.items())},
+        "overall": stats(records),
+        # Keterlambatan kirim yang besar berarti generator (bukan server) yang jenuh
+        "send_lag_p95_ms": round(float(np.percentile(lags, 95)), 3) if lags.size else None,
+    }
+
+def prepare_catalog(work_dir, n_rows, database_url=None, seed=0):
+    """
+    Tulis katalog sintetis ke database dan bangun artifact index
+
+    Environment proses diatur agar server:app memakai database dan artifact
+    ini, tanpa inisialisasi CSV dan tanpa refresher latar. Dengan
+    RAVELY_SERVING_MODE=table, tabel destination_neighbors juga ditulis.
+
+    Parameters:
+    -----------
+    work_dir : str
+        Direktori untuk database SQLite dan artifact
+    n_rows : int
+        Jumlah destinasi sintetis
+    database_url : str, optional
+        Database tujuan; default-nya file SQLite baru di work_dir
+    seed : int, optional
+        Seed katalog
+
+    Returns:
+    --------
+    list
+        Judul destinasi sesuai urutan id
+    """
+    from .artifact import save_index_artifact
+    from .db_connection import configure_engine
+    from .index import build_snapshot
+    from .synthetic import generate_destinations, write_catalog
+
+    url = database_url or f"sqlite:///{os.path.join(work_dir, f'load-{n_rows}.db')}"
+    artifact_path = os.path.join(work_dir, "index")
+    os.environ.update({
+        "DATABASE_URL": url,
+        "RAVELY_INDEX_PATH": artifact_path,
+        "RAVELY_INIT_DB": "false",
+        "RAVELY_REFRESH_INTERVAL": "0",
+    })
+
+    catalog = generate_destinations(n_rows, seed=seed)
+    write_catalog(catalog, configure_engine(url))
+    snapshot = build_snapshot()
+    if snapshot is None:
+        raise RuntimeError("Index gagal dibangun dari katalog sintetis")
+    save_index_artifact(snapshot, artifact_path)
+    if os.getenv("RAVELY_SERVING_MODE", "memory").lower() == "table":
+        from .neighbor_table import materialize_neighbors
+        if materialize_neighbors(snapshot) is None:
+            raise RuntimeError("Tabel tetangga gagal ditulis")
+    return list(catalog["title"])
+
+@asynccontextmanager
+async def inprocess_client(timeout=10.0):
+    """
+    Client ASGI ke server:app di proses ini; lifespan dijalankan seperti di uvicorn.
+
+    Tanpa socket tidak ada connection pool yang perlu dibatasi; jumlah request
+    yang berjalan bersamaan dibatasi oleh semaphore di run_load.
+    """
+    import httpx
+
+    import server
+
+    async with server.app.router.lifespan_context(server.app):
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://ravely.test", timeout=timeout) as client:
+            yield client
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@asynccontextmanager
+async def uvicorn_client(workers=1, max_inflight=256, timeout=10.0, startup_timeout=120.0):
+    """Jalankan uvicorn server:app di subprocess, tunggu /health, lalu kembalikan client HTTP."""
+    import httpx
+
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=REPO_ROOT, env=os.environ.copy(),
+    )
+    try:
+        limits = httpx.Limits(max_connections=max_inflight, max_keepalive_connections=max_inflight)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=timeout, limits=limits) as client:
+            deadline = time.monotonic() + startup_timeout
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"uvicorn berhenti saat startup (exit code {process.returncode})")
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn tidak siap dalam batas waktu startup")
+                await asyncio.sleep(0.25)
+            yield client
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+async def run_loadtest(titles, rps, duration, mix, zipf=1.1, server="inprocess", workers=1, max_inflight=256,
+                       warmup=50, seed=0):
+    """
+    Jalankan satu load test terhadap server:app
+
+    Parameters:
+    -----------
+    titles : list
+        Judul destinasi katalog (hasil prepare_catalog)
+    rps : float
+        Laju request per detik
+    duration : float
+        Durasi pengukuran dalam detik
+    mix : dict
+        Bobot per endpoint dari parse_mix
+    zipf : float, optional
+        Eksponen Zipf popularitas (default: 1.1)
+    server : str, optional
+        "inprocess" (ASGI tanpa socket) atau "uvicorn" (default: inprocess)
+    workers : int, optional
+        Jumlah worker uvicorn (default: 1)
+    max_inflight : int, optional
+        Batas request bersamaan (default: 256)
+    warmup : int, optional
+        Jumlah request pemanasan yang tidak diukur (default: 50)
+    seed : int, optional
+        Seed rencana request
+
+    Returns:
+    --------
+    dict
+        Ringkasan dari summarize ditambah target dan laju yang tercapai
+    """
+    plan = build_plan(titles, int(rps * duration), mix, zipf, seed)
+    warmup_plan = build_plan(titles, warmup, mix, zipf, seed + 1)
+    context = inprocess_client() if server == "inprocess" else uvicorn_client(workers, max_inflight)
+    async with context as client:
+        if warmup_plan:
+            await run_load(client, warmup_plan, rps, max_inflight)
+        records, elapsed = await run_load(client, plan, rps, max_inflight)
+
+    result = summarize(records, elapsed)
+    result.update({
+        "target_rps": rps,
+        "achieved_rps": round(len(records) / elapsed, 1) if elapsed else None,
+        "elapsed_seconds": round(elapsed, 3),
+    })
+    return result
+
+def check_thresholds(result, max_p99_ms=None, max_error_rate=None, baseline=None, max_regression=None):
+    """
+    Periksa hasil load test terhadap batas absolut dan hasil acuan
+
+    Parameters:
+    -----------
+    result : dict
+        Hasil run_loadtest
+    max_p99_ms : float, optional
+        Batas p99 per endpoint dalam milidetik
+    max_error_rate : float, optional
+        Batas error rate per endpoint (0-1)
+    baseline : dict, optional
+        Hasil run_loadtest acuan (misalnya dari commit sebelumnya)
+    max_regression : float, optional
+        Rasio p99 saat ini / acuan maksimum yang diizinkan, misalnya 1.2
+
+    Returns:
+    --------
+    list
+        Pesan pelanggaran; kosong jika semua batas terpenuhi
+    """
+    violations = []
+    for endpoint, stats in result["endpoints"].items():
+        p99 = stats["latency"]["p99_ms"] if stats["latency"] else None
+        if max_p99_ms is not None and p99 is not None and p99 > max_p99_ms:
+            violations.append(f"{endpoint}: p99 {p99} ms > {max_p99_ms} ms")
+        if max_error_rate is not None and stats["error_rate"] > max_error_rate:
+            violations.append(f"{endpoint}: error rate {stats['error_rate']} > {max_error_rate}")
+        if baseline is not None and max_regression is not None:
+            previous = baseline.get("endpoints", {}).get(endpoint, {}).get("latency")
+            if previous and p99 is not None and previous["p99_ms"] and p99 / previous["p99_ms"] > max_regression:
+                violations.append(
+                    f"{endpoint}: p99 {p99} ms adalah {p99 / previous['p99_ms']:.2f}x acuan "
+                    f"{previous['p99_ms']} ms (> {max_regression}x)"
+                )
+    return violations
+
+def _print_report(result, baseline=None):
+    print(
+        f"target {result['target_rps']} rps, tercapai {result['achieved_rps']} rps "
+        f"dalam {result['elapsed_seconds']}s (send lag p95 {result['send_lag_p95_ms']} ms)"
+    )
+    if result["send_lag_p95_ms"] is not None and result["send_lag_p95_ms"] > SEND_LAG_WARNING_MS:
+        print("PERINGATAN: generator tertinggal dari jadwal; jalankan di core terpisah atau turunkan --rps")
+    print(f"{'endpoint':<16} {'requests':>8} {'rps':>7} {'errors':>7} {'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8} {'max_ms':>8}")
+    for endpoint, stats in list(result["endpoints"].items()) + [("overall", result["overall"])]:
+        latency = stats["latency"] or {}
+        print(
+            f"{endpoint:<16} {stats['requests']:>8} {stats['throughput_rps']:>7} {stats['error_rate']:>7} "
+            f"{latency.get('p50_ms', '-'):>8} {latency.get('p95_ms', '-'):>8} "
+            f"{latency.get('p99_ms', '-'):>8} {latency.get('max_ms', '-'):>8}"
+        )
+
+    if baseline is not None:
+        print(f"{'endpoint':<16} {'metric':<8} {'baseline':>10} {'current':>10} {'ratio':>6}")
+        for endpoint, stats in result["endpoints"].items():
+            previous = baseline.get("endpoints", {}).get(endpoint, {}).get("latency")
+            if not previous or not stats["latency"]:
+                continue
+            for metric in ("p50_ms", "p95_ms", "p99_ms"):
+                old, new = previous[metric], stats["latency"][metric]
+                ratio = round(new / old, 3) if old else "-"
+                print(f"{endpoint:<16} {metric:<8} {old:>10} {new:>10} {ratio:>6}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test server:app dengan katalog sintetis")
+    parser.add_argument("--rows", type=int, default=10000, help="Ukuran katalog sintetis")
+    parser.add_argument("--rps", type=float, default=200, help="Laju request per detik")
+    parser.add_argument("--duration", type=float, default=30, help="Durasi pengukuran (detik)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Campuran endpoint (default: {DEFAULT_MIX})")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Eksponen Zipf popularitas destinasi")
+    parser.add_argument("--server", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--workers", type=int, default=1, help="Worker uvicorn (hanya --server uvicorn)")
+    parser.add_argument("--max-inflight", type=int, default=256, help="Batas request bersamaan")
+    parser.add_argument("--warmup", type=int, default=50, help="Request pemanasan yang tidak diukur")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", default=None, help="Database tujuan (default: SQLite sementara)")
+    parser.add_argument("--output", default=None, help="File JSON hasil load test")
+    parser.add_argument("--compare", default=None, help="File JSON hasil sebelumnya untuk dibandingkan")
+    parser.add_argument("--max-p99-ms", type=float, default=None, help="Gagal jika p99 endpoint melebihi batas ini")
+    parser.add_argument("--max-error-rate", type=float, default=None, help="Gagal jika error rate endpoint melebihi batas ini")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="Dengan --compare: gagal jika p99 endpoint melebihi rasio ini terhadap acuan")
+    args = parser.parse_args(argv)
+    os.environ.setdefault("RAVELY_LOG_LEVEL", "WARNING")
+    configure_logging()
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    with tempfile.TemporaryDirectory(prefix="ravely-load-") as work_dir:
+        print(f"Menyiapkan katalog {args.rows} destinasi...")
+        titles = prepare_catalog(work_dir, args.rows, args.database_url, args.seed)
+        print(f"Load test {args.server}: {args.rps} rps selama {args.duration}s, campuran {args.mix}")
+        result = asyncio.run(run_loadtest(
+            titles, args.rps, args.duration, mix, args.zipf, args.server, args.workers,
+            args.max_inflight, args.warmup, args.seed,
+        ))
+
+    output = {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "config": {
+            "rows": args.rows,
+            "rps": args.rps,
+            "duration": args.duration,
+            "mix": mix,
+            "zipf": args.zipf,
+            "server": args.server,
+            "workers": args.workers,
+            "serving_mode": os.getenv("RAVELY_SERVING_MODE", "memory"),
+            "database": "sqlite" if args.database_url is None else args.database_url.split(":", 1)[0],
+        },
+        **result,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+        print(f"Hasil load test ditulis ke {args.output}")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    _print_report(output, baseline)
+
+    violations = check_thresholds(output, args.max_p99_ms, args.max_error_rate, baseline, args.max_regression)
+    for violation in violations:
+        print(f"GAGAL {violation}")
+    return 1 if violations else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+"""
+Metrik proses dalam format teks Prometheus.
+
+Registry kecil tanpa dependency: Counter, Gauge dan Histogram dengan label,
+aman dipakai dari banyak thread. Setiap tahap pipeline (koneksi database,
+baca tabel, fit TF-IDF, similarity, top-k, serialisasi) diukur dengan
+``stage()`` ke histogram ``ravely_stage_duration_seconds``.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metrik {self.name} membutuhkan label {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+class Counter(_Metric):
+    """Nilai yang hanya bertambah, misalnya jumlah request."""
+    kind = "counter"
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+class Gauge(_Metric):
+    """Nilai yang bisa naik turun, misalnya jumlah baris index."""
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+class Histogram(_Metric):
+    """Distribusi nilai (misalnya durasi) dalam bucket kumulatif."""
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [count per bucket (+Inf terakhir), sum, count]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _render_sample(self, key, value):
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class Registry:
+    """Kumpulan metrik yang dirender bersama untuk endpoint /metrics."""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def render(self):
+        """
+        Render semua metrik dalam format teks Prometheus (versi 0.0.4)
+
+        Returns:
+        --------
+        str
+            Isi response /metrics
+        """
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = Histogram(
+    "ravely_stage_duration_seconds",
+    "Durasi tiap tahap pipeline rekomendasi",
+    ["stage"],
+)
+REQUEST_SECONDS = Histogram(
+    "ravely_request_duration_seconds",
+    "Latensi request HTTP per endpoint",
+    ["method", "endpoint", "status"],
+)
+INDEX_BUILD_SECONDS = Histogram(
+    "ravely_index_build_seconds",
+    "Durasi build index rekomendasi penuh",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0),
+)
+INDEX_BUILD_WAITS = Counter(
+    "ravely_index_build_waits_total",
+    "Request yang menunggu build index: ready, failed, timeout, atau rejected (antrean penuh)",
+    ["result"],
+)
+INDEX_ROWS = Gauge("ravely_index_rows", "Jumlah destinasi di index aktif")
+INDEX_BYTES = Gauge("ravely_index_bytes", "Ukuran array index aktif dalam byte")
+CACHE_REQUESTS = Counter(
+    "ravely_cache_requests_total",
+    "Lookup cache response /recommendations menurut hasilnya",
+    ["result"],
+)
+POOL_CHECKOUT_SECONDS = Histogram(
+    "ravely_db_pool_checkout_seconds",
+    "Waktu menunggu koneksi dari connection pool",
+)
+POOL_CONNECTIONS = Gauge(
+    "ravely_db_pool_connections",
+    "Koneksi connection pool menurut statusnya",
+    ["state"],
+)
+
+# Penampung durasi tahap per thread; dipakai build di proses terpisah agar
+# durasinya bisa dikirim kembali ke registry proses server
+_stage_recorder = threading.local()
+
+def observe_stage(name, seconds):
+    """
+    Catat durasi satu tahap ke ravely_stage_duration_seconds
+
+    Parameters:
+    -----------
+    name : str
+        Nama tahap
+    seconds : float
+        Durasi tahap dalam detik
+    """
+    STAGE_SECONDS.observe(seconds, stage=name)
+    recorded = getattr(_stage_recorder, "stages", None)
+    if recorded is not None:
+        recorded[name] = recorded.get(name, 0.0) + seconds
+
+@contextmanager
+def record_stages():
+    """
+    Kumpulkan durasi tahap yang dicatat di thread ini selama blok berjalan
+
+    Yields:
+    -------
+    dict
+        {tahap: total detik}, terisi saat blok berjalan
+    """
+    previous = getattr(_stage_recorder, "stages", None)
+    recorded = {}
+    _stage_recorder.stages = recorded
+    try:
+        yield recorded
+    finally:
+        _stage_recorder.stages = previous
+
+@contextmanager
+def stage(name):
+    """
+    Ukur durasi satu tahap pipeline ke ravely_stage_duration_seconds
+
+    Parameters:
+    -----------
+    name : str
+        Nama tahap, misalnya "tfidf_fit" atau "top_k"
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - started)
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI yang mencatat latensi setiap request HTTP
+
+    Label endpoint memakai template path route (misalnya /destinations),
+    bukan path mentah, agar jumlah seri metrik tetap terbatas.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=scope.get("method", ""),
+                endpoint=getattr(route, "path", "unmatched"),
+                status=status["code"],
+            )
@@ -0,0 +1,521 @@
+"""
+Tabel tetangga termaterialisasi sebagai mode serving alternatif.
+
+Build index menulis top-K tetangga setiap destinasi beserta skornya ke tabel
+``destination_neighbors(destination_id, rank, neighbor_id, score)``. Dengan
+RAVELY_SERVING_MODE=table, API tidak memegang model apa pun di memori:
+/recommendations cukup satu join terindeks ke tabel ini, sedangkan /search
+dan /categories dibaca langsung dari tabel destinasi (read_search,
+read_facets), sehingga replika API bisa stateless dan ringan.
+
+Tabel ditulis ulang lewat tabel bayangan (shadow): data dimuat massal
+(``COPY`` di PostgreSQL, executemany di backend lain) ke
+``destination_neighbors_shadow``, index komposit dibuat setelah data masuk,
+lalu kedua tabel ditukar dengan rename dalam satu transaksi. Pembaca selalu
+melihat tabel lama atau tabel baru yang lengkap, tidak pernah setengah jadi.
+
+Contoh:
+    python -m helper.build_index --neighbors-table
+"""
+import io
+import logging
+import time
+
+import numpy as np
+from sqlalchemy import inspect, text
+
+from .facets import category_key, district_key
+from .functions import compute_top_k_neighbors
+from .metrics import stage
+from .recommendations import build_maps_url
+from .records import parse_categories
+from .title_index import DestinationNotFoundError, normalize_title
+
+logger = logging.getLogger(__name__)
+
+NEIGHBOR_TABLE = "destination_neighbors"
+
+NEIGHBOR_COLUMNS = ["destination_id", "rank", "neighbor_id", "score"]
+
+def neighbors_ddl(table_name, dialect_name):
+    """
+    DDL tabel tetangga untuk dialect database tertentu
+
+    Parameters:
+    -----------
+    table_name : str
+        Nama tabel
+    dialect_name : str
+        Nama dialect SQLAlchemy, misalnya "postgresql" atau "sqlite"
+
+    Returns:
+    --------
+    str
+        Pernyataan CREATE TABLE. Di PostgreSQL primary key ditambahkan setelah
+        COPY (lihat _primary_key_ddl); SQLite memakai tabel WITHOUT ROWID
+        sehingga baris satu destinasi tersimpan berdampingan menurut (destination_id, rank)
+    """
+    if dialect_name == "postgresql":
+        return f"""
+            CREATE TABLE {table_name} (
+                destination_id INTEGER NOT NULL,
+                rank SMALLINT NOT NULL,
+                neighbor_id INTEGER NOT NULL,
+                score REAL NOT NULL
+            )
+        """
+    return f"""
+        CREATE TABLE {table_name} (
+            destination_id INTEGER NOT NULL,
+            rank INTEGER NOT NULL,
+            neighbor_id INTEGER NOT NULL,
+            score REAL NOT NULL,
+            PRIMARY KEY (destination_id, rank)
+        ) WITHOUT ROWID
+    """
+
+def _primary_key_ddl(table_name):
+    # INCLUDE membuat lookup per destinasi menjadi index-only scan (PostgreSQL 11+)
+    return (
+        f"ALTER TABLE {table_name} ADD CONSTRAINT {table_name}_pkey "
+        f"PRIMARY KEY (destination_id, rank) INCLUDE (neighbor_id, score)"
+    )
+
+def neighbor_chunks(snapshot, top_k=None, chunk_rows=10000):
+    """
+    Baris tabel tetangga dari snapshot, per potongan destinasi
+
+    Parameters:
+    -----------
+    snapshot : IndexSnapshot
+        Snapshot index; tetangga prekomputasi dipakai jika cukup lebar,
+        jika tidak dihitung dari matriks TF-IDF
+    top_k : int, optional
+        Jumlah tetangga per destinasi (default: lebar tetangga snapshot, atau 20)
+    chunk_rows : int, optional
+        Jumlah destinasi per potongan (default: 10000)
+
+    Yields:
+    -------
+    numpy.ndarray
+        Array terstruktur dengan field destination_id, rank, neighbor_id, score
+    """
+    neighbors = snapshot.neighbors
+    if top_k is None:
+        top_k = neighbors[0].shape[1] if neighbors is not None and neighbors[0].shape[1] else 20
+    if neighbors is None or neighbors[0].shape[1] < top_k:
+        with stage("neighbors"):
+            neighbors = compute_top_k_neighbors(snapshot.tfidf_matrix, top_k)
+    neighbor_ids, neighbor_scores = neighbors[0][:, :top_k], neighbors[1][:, :top_k]
+
+    ids = np.asarray(snapshot.store.ids, dtype=np.int64)
+    k = neighbor_ids.shape[1]
+    dtype = [("destination_id", np.int64), ("rank", np.int16), ("neighbor_id", np.int64), ("score", np.float32)]
+    for start in range(0, len(ids), chunk_rows):
+        stop = min(start + chunk_rows, len(ids))
+        chunk = np.empty((stop - start) * k, dtype=dtype)
+        chunk["destination_id"] = np.repeat(ids[start:stop], k)
+        chunk["rank"] = np.tile(np.arange(1, k + 1, dtype=np.int16), stop - start)
+        chunk["neighbor_id"] = ids[neighbor_ids[start:stop].ravel()]
+        chunk["score"] = neighbor_scores[start:stop].ravel()
+        yield chunk
+
+def _copy_payload(chunk):
+    buffer = io.StringIO()
+    columns = [chunk[name] for name in NEIGHBOR_COLUMNS]
+    np.savetxt(buffer, np.column_stack(columns), fmt=["%d", "%d", "%d", "%.6g"], delimiter=",")
+    buffer.seek(0)
+    return buffer
+
+def _load_postgres(engine, chunks, shadow):
+    rows = 0
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute(f"DROP TABLE IF EXISTS {shadow}")
+        cursor.execute(neighbors_ddl(shadow, "postgresql"))
+        for chunk in chunks:
+            with stage("neighbors_copy"):
+                cursor.copy_expert(
+                    f"COPY {shadow} ({', '.join(NEIGHBOR_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                    _copy_payload(chunk),
+                )
+            rows += len(chunk)
+        # Index dibangun sekali setelah semua data masuk, lebih cepat daripada per baris
+        with stage("neighbors_index"):
+            cursor.execute(_primary_key_ddl(shadow))
+            cursor.execute(f"ANALYZE {shadow}")
+        raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+    return rows
+
+def _load_executemany(engine, chunks, shadow):
+    rows = 0
+    insert = text(f"""
+        INSERT INTO {shadow} ({', '.join(NEIGHBOR_COLUMNS)})
+        VALUES (:destination_id, :rank, :neighbor_id, :score)
+    """)
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {shadow}"))
+        conn.execute(text(neighbors_ddl(shadow, engine.dialect.name)))
+        for chunk in chunks:
+            with stage("neighbors_executemany"):
+                records = [
+                    {"destination_id": int(d), "rank": int(r), "neighbor_id": int(n), "score": float(s)}
+                    for d, r, n, s in chunk.tolist()
+                ]
+                conn.execute(insert, records)
+            rows += len(records)
+    return rows
+
+def _swap_tables(engine, table_name, shadow):
+    # Rename dalam satu transaksi: pembaca melihat tabel lama atau tabel baru yang utuh
+    retired = f"{table_name}_old"
+    is_postgres = engine.dialect.name == "postgresql"
+    exists = table_name in inspect(engine).get_table_names()
+
+    statements = [f"DROP TABLE IF EXISTS {retired}"]
+    if exists:
+        statements.append(f"ALTER TABLE {table_name} RENAME TO {retired}")
+    statements.append(f"ALTER TABLE {shadow} RENAME TO {table_name}")
+    statements.append(f"DROP TABLE IF EXISTS {retired}")
+    if is_postgres:
+        # Nama index bersifat global per schema; kembalikan ke nama tabel utama
+        statements.append(f"ALTER INDEX {shadow}_pkey RENAME TO {table_name}_pkey")
+
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        if not is_postgres:
+            # Driver sqlite3 tidak membuka transaksi sendiri untuk DDL
+            cursor.execute("BEGIN")
+        for statement in statements:
+            cursor.execute(statement)
+        raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+def materialize_neighbors(snapshot, top_k=None, engine=None, table_name=NEIGHBOR_TABLE, source_table='destinations',
+                          chunk_rows=10000):
+    """
+    Tulis top-K tetangga setiap destinasi ke tabel tetangga
+
+    Data dimuat ke tabel bayangan lalu ditukar dengan tabel aktif dalam satu
+    transaksi. Index lower(title) pada tabel sumber juga dipastikan ada,
+    karena dipakai read_recommendations untuk mencari destinasi asal.
+
+    Parameters:
+    -----------
+    snapshot : IndexSnapshot
+        Snapshot index yang baru dibangun
+    top_k : int, optional
+        Jumlah tetangga per destinasi (default: lebar tetangga snapshot, atau 20)
+    engine : sqlalchemy.Engine, optional
+        Engine tujuan; default-nya engine bersama db_connection
+    table_name : str, optional
+        Nama tabel tetangga (default: destination_neighbors)
+    source_table : str, optional
+        Tabel destinasi yang dirujuk id-nya (default: destinations)
+    chunk_rows : int, optional
+        Jumlah destinasi per batch muat (default: 10000)
+
+    Returns:
+    --------
+    dict or None
+        {"destinations", "rows", "top_k", "seconds", "method"}, atau None jika gagal
+    """
+    try:
+        if engine is None:
+            from .db_connection import get_engine
+            engine = get_engine()
+
+        started = time.perf_counter()
+        shadow = f"{table_name}_shadow"
+        chunks = neighbor_chunks(snapshot, top_k, chunk_rows)
+
+        use_copy = engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2"
+        if use_copy:
+            rows = _load_postgres(engine, chunks, shadow)
+        else:
+            rows = _load_executemany(engine, chunks, shadow)
+
+        with stage("neighbors_swap"):
+            _swap_tables(engine, table_name, shadow)
+        with engine.begin() as conn:
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS {source_table}_title_lower_idx ON {source_table} (lower(title))"
+            ))
+
+        stats = {
+            "destinations": len(snapshot),
+            "rows": rows,
+            "top_k": rows // len(snapshot) if len(snapshot) else 0,
+            "seconds": round(time.perf_counter() - started, 3),
+            "method": "copy" if use_copy else "executemany",
+        }
+        logger.info(
+            "Tabel %s ditulis: %s baris (%s tetangga x %s destinasi) dalam %.2fs (%s)",
+            table_name, stats["rows"], stats["top_k"], stats["destinations"], stats["seconds"], stats["method"],
+        )
+        return stats
+
+    except Exception as e:
+        logger.error("Error saat menulis tabel %s: %s", table_name, e)
+        return None
+
+def _suggestions(connection, key, source_table, limit=5):
+    # Hanya dipanggil saat destinasi tidak ditemukan
+    query = text(f"""
+        SELECT title FROM {source_table}
+        WHERE lower(title) LIKE :pattern
+        ORDER BY length(title), id
+        LIMIT :limit
+    """)
+    pattern = "%" + key.replace("\\", "").replace("%", "").replace("_", "") + "%"
+    return [title for title, in connection.execute(query, {"pattern": pattern, "limit": limit})]
+
+def read_recommendations(destination_name, limit=5, category=None, district=None, table_name=NEIGHBOR_TABLE,
+                         source_table='destinations'):
+    """
+    Rekomendasi dari tabel tetangga dengan satu join terindeks
+
+    Judul dicocokkan lewat lower(title) seperti normalize_title (tidak peka
+    huruf besar/kecil dan spasi berlebih). Filter kategori/kabupaten hanya
+    menyaring top-K tetangga yang tersimpan, jadi hasilnya bisa lebih sedikit
+    daripada limit bila filternya sempit.
+
+    Parameters:
+    -----------
+    destination_name : str
+        Nama destinasi yang ingin dicari rekomendasinya
+    limit : int
+        Jumlah rekomendasi yang diinginkan (default: 5)
+    category : str, optional
+        Hanya rekomendasikan destinasi dengan kategori ini
+    district : str, optional
+        Hanya rekomendasikan destinasi di kabupaten ini
+    table_name : str, optional
+        Nama tabel tetangga (default: destination_neighbors)
+    source_table : str, optional
+        Tabel destinasi (default: destinations)
+
+    Returns:
+    --------
+    list or None
+        Format sama dengan get_recommendations_by_name, atau None jika database gagal
+
+    Raises:
+    -------
+    DestinationNotFoundError
+        Jika nama destinasi tidak ada di tabel sumber
+    """
+    from .db_connection import _checkout
+
+    key = normalize_title(destination_name)
+    filtered = bool(category or district)
+    query = f"""
+        SELECT d.title, d.district, d.categories
+        FROM {table_name} AS n
+        JOIN {source_table} AS d ON d.id = n.neighbor_id
+        WHERE n.destination_id = (
+            SELECT s.id FROM {source_table} AS s WHERE lower(s.title) = :key ORDER BY s.id LIMIT 1
+        )
+        ORDER BY n.rank
+    """
+    params = {"key": key}
+    if not filtered:
+        query += " LIMIT :limit"
+        params["limit"] = int(limit)
+
+    try:
+        with _checkout() as connection:
+            with stage("neighbors_read"):
+                rows = connection.execute(text(query), params).all()
+            if not rows:
+                exists = connection.execute(
+                    text(f"SELECT 1 FROM {source_table} WHERE lower(title) = :key LIMIT 1"), {"key": key}
+                ).first()
+                if exists is None:
+                    raise DestinationNotFoundError(destination_name, _suggestions(connection, key, source_table))
+    except DestinationNotFoundError:
+        raise
+    except Exception as e:
+        logger.error("Error reading recommendations from '%s': %s", table_name, e)
+        return None
+
+    result = []
+    for title, row_district, categories in rows:
+        categories = parse_categories(categories)
+        if category and category_key(category) not in {category_key(value) for value in categories}:
+            continue
+        if district and (not row_district or district_key(row_district) != district_key(district)):
+            continue
+        result.append({
+            "nama_destinasi": title,
+            "alamat": build_maps_url(title, row_district or None),
+            "kabupaten": row_district or "",
+            "categories": categories,
+        })
+        if len(result) >= limit:
+            break
+    return result
+
+def _merge_facets(counts, key_fn):
+    # Gabungkan nilai mentah yang kuncinya sama (mis. "Pantai" dan "pantai"),
+    # seperti FacetIndex; nama tampilan diambil dari nilai yang muncul pertama
+    merged = {}
+    for name, count in counts:
+        key = key_fn(name)
+        if key in merged:
+            merged[key][1] += count
+        else:
+            merged[key] = [name, count]
+    return [{"name": name, "count": int(count)} for _, (name, count) in sorted(merged.items())]
+
+def read_facets(source_table='destinations'):
+    """
+    Daftar kategori dan kabupaten beserta jumlah destinasinya, langsung dari database
+
+    Dipakai /categories di mode serving table, sebagai ganti FacetIndex di
+    memori. Kabupaten dihitung dengan GROUP BY; kategori dengan unnest(TEXT[])
+    di PostgreSQL, dan di backend lain dari string kategori yang dikelompokkan.
+
+    Parameters:
+    -----------
+    source_table : str, optional
+        Tabel destinasi (default: destinations)
+
+    Returns:
+    --------
+    dict or None
+        {"categories": [{"name", "count"}], "districts": [...]}, terurut
+        menurut nama, atau None jika database gagal
+    """
+    from .db_connection import _checkout
+
+    try:
+        with _checkout() as connection, stage("facets_read"):
+            districts = connection.execute(text(f"""
+                SELECT district, count(*) FROM {source_table}
+                WHERE district IS NOT NULL AND district <> ''
+                GROUP BY district
+                ORDER BY min(id)
+            """)).all()
+
+            if connection.dialect.name == "postgresql":
+                categories = connection.execute(text(f"""
+                    SELECT c.name, count(DISTINCT d.id)
+                    FROM {source_table} AS d, unnest(d.categories) AS c(name)
+                    WHERE btrim(c.name) <> ''
+                    GROUP BY c.name
+                    ORDER BY min(d.id)
+                """)).all()
+            else:
+                # Tanpa tipe array: kelompokkan string kategori, lalu pecah di Python
+                counts = {}
+                grouped = connection.execute(text(f"""
+                    SELECT categories, count(*) FROM {source_table}
+                    GROUP BY categories
+                    ORDER BY min(id)
+                """))
+                for value, count in grouped:
+                    for name in dict.fromkeys(parse_categories(value)):
+                        counts[name] = counts.get(name, 0) + count
+                categories = list(counts.items())
+    except Exception as e:
+        logger.error("Error reading facets from '%s': %s", source_table, e)
+        return None
+
+    return {
+        "categories": _merge_facets(categories, category_key),
+        "districts": _merge_facets(districts, district_key),
+    }
+
+def read_search(query, offset=0, limit=10, source_table='destinations'):
+    """
+    Pencarian destinasi langsung dari database untuk mode serving table
+
+    Judul yang mengandung kata kunci dicocokkan dengan ILIKE di PostgreSQL
+    (memakai index pg_trgm dari RAVELY_PG_TRGM bila ada) dan lower(title)
+    LIKE di backend lain; kabupaten yang mengandung kata kunci ikut dicocokkan.
+    Urutan skor: judul sama persis (8), judul diawali kata kunci (4), kata
+    kunci di judul (2), lalu hanya cocok di kabupaten (1). Tidak ada fallback
+    toleran typo seperti TitleIndex.search.
+
+    Parameters:
+    -----------
+    query : str
+        Input user
+    offset : int, optional
+        Jumlah hasil teratas yang dilewati (pagination)
+    limit : int, optional
+        Jumlah hasil maksimum (default: 10)
+    source_table : str, optional
+        Tabel destinasi (default: destinations)
+
+    Returns:
+    --------
+    tuple or None
+        (list of dict, int) - record {"id", "title", "district", "categories",
+        "url", "score"} dan total hasil, atau None jika database gagal
+    """
+    from .db_connection import _checkout
+
+    key = normalize_title(query)
+    if not key:
+        return [], 0
+    escaped = key.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    params = {
+        "key": key,
+        "prefix": escaped + "%",
+        "pattern": "%" + escaped + "%",
+        "limit": int(limit),
+        "offset": int(offset),
+    }
+
+    try:
+        with _checkout() as connection, stage("search_read"):
+            if connection.dialect.name == "postgresql":
+                title_like, district_like = "title ILIKE {} ESCAPE '\\'", "district ILIKE :pattern ESCAPE '\\'"
+            else:
+                title_like, district_like = "lower(title) LIKE {} ESCAPE '\\'", "lower(district) LIKE :pattern ESCAPE '\\'"
+            where = f"{title_like.format(':pattern')} OR {district_like}"
+            total = connection.execute(
+                text(f"SELECT count(*) FROM {source_table} WHERE {where}"), params
+            ).scalar()
+            rows = connection.execute(text(f"""
+                SELECT id, title, district, categories,
+                    CASE
+                        WHEN lower(title) = :key THEN 8
+                        WHEN {title_like.format(':prefix')} THEN 4
+                        WHEN {title_like.format(':pattern')} THEN 2
+                        ELSE 1
+                    END AS score
+                FROM {source_table}
+                WHERE {where}
+                ORDER BY score DESC, length(title), id
+                LIMIT :limit OFFSET :offset
+            """), params).all()
+    except Exception as e:
+        logger.error("Error searching '%s': %s", source_table, e)
+        return None
+
+    results = [
+        {
+            "id": int(row_id),
+            "title": title,
+            "district": district or "",
+            "categories": parse_categories(categories),
+            "url": build_maps_url(title, district or None),
+            "score": float(score),
+        }
+        for row_id, title, district, categories, score in rows
+    ]
+    return results, int(total)
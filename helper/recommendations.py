@@ -1,149 +1,403 @@
-import pandas as pd
+import logging
+import math
 
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.feature_extraction.text import TfidfVectorizer
+import numpy as np
 
-from .db_connection import (
-    connect_to_db, 
-    read_table, 
-    init_database,
-)
-from .functions import destination_recommendations
+# scikit-learn, pandas dan modul database hanya dibutuhkan saat membangun
+# index, jadi diimpor di dalam fungsi; jalur serving cukup numpy/scipy
+from .functions import batch_top_k, centroid_top_k, recommend_rows
+from .metrics import stage
+from .title_index import DestinationNotFoundError
 
-def load_data_and_compute_similarity():
+logger = logging.getLogger(__name__)
+
+def build_maps_url(title, district=None):
+    """
+    Buat URL pencarian Google Maps sederhana untuk sebuah destinasi
+
+    Parameters:
+    -----------
+    title : str
+        Nama destinasi
+    district : str, optional
+        Nama kabupaten/kota destinasi
+
+    Returns:
+    --------
+    str
+        URL pencarian Google Maps
+    """
+    query = str(title).replace(' ', '+')
+    if district is not None and not (isinstance(district, float) and math.isnan(district)):
+        query += f",{str(district).replace(' ', '+')}"
+    return f"https://www.google.com/maps/search/?api=1&query={query}"
+
+def prepare_destinations(df):
+    """
+    Lengkapi DataFrame destinasi dengan kolom 'url' dan 'description'
+
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        DataFrame hasil pembacaan tabel destinations
+
+    Returns:
+    --------
+    pandas.DataFrame
+        DataFrame yang sama dengan kolom 'url' dan 'description'
+    """
+    with stage("prepare"):
+        # Perbaiki URL yang terlalu panjang - hanya gunakan URL sederhana untuk Google Maps search
+        df['url'] = df.apply(lambda row: build_maps_url(row['title'], row.get('district')), axis=1)
+
+        # Buat fitur gabungan untuk perhitungan similarity dengan preprocessing yang lebih baik
+        df['description'] = df['title'].fillna('').str.lower()
+
+        if 'categories' in df.columns:
+            # ganti koma dengan spasi dan ubah ke lowercase
+            df['description'] += ' ' + df['categories'].fillna('').apply(
+                lambda x: ' '.join([item.lower().strip() for item in x]) if isinstance(x, list)
+                else str(x).lower().replace(',', ' ').replace('[', '').replace(']', '').replace("'", "")
+            )
+
+        # Tambahkan lokasi ke deskripsi
+        if 'district' in df.columns:
+            df['description'] += ' ' + df['district'].fillna('').str.lower()
+
+        return df
+
+def fit_tfidf(descriptions):
+    """
+    Latih TF-IDF vectorizer pada deskripsi destinasi
+
+    Parameters:
+    -----------
+    descriptions : pandas.Series
+        Deskripsi gabungan (judul, kategori, kabupaten) tiap destinasi
+
+    Returns:
+    --------
+    tuple
+        (TfidfVectorizer, scipy.sparse.csr_matrix) - (vectorizer, tfidf_matrix);
+        term yang dipangkas max_features/max_df disimpan di vectorizer.pruned_terms_
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    # Hitung TF-IDF dengan parameter yang lebih baik
+    tfidf = TfidfVectorizer(
+        dtype=np.float32,  # Skor similarity float32: separuh memori float64
+        stop_words=None,  # Tidak ada stop words untuk bahasa Indonesia
+        ngram_range=(1, 2),  # Gunakan unigram dan bigram
+        max_features=1000,  # Batasi fitur untuk performa
+        min_df=1,  # Minimal muncul di 1 dokumen
+        max_df=0.95  # Maksimal muncul di 95% dokumen
+    )
+    with stage("tfidf_fit"):
+        tfidf_matrix = tfidf.fit_transform(descriptions)
+        # scikit-learn tidak lagi menyimpan term yang dipangkas (stop_words_);
+        # drift vocabulary perlu tahu term mana yang sudah pernah terlihat
+        analyzer = tfidf.build_analyzer()
+        seen_terms = set()
+        for description in descriptions:
+            seen_terms.update(analyzer(description))
+        tfidf.pruned_terms_ = frozenset(seen_terms.difference(tfidf.vocabulary_))
+    return tfidf, tfidf_matrix
+
+def load_destinations():
     """
-    Memuat data dari database dan menghitung matriks similarity
-    
+    Memuat data destinasi dari database dan menyiapkan fitur teksnya
+
+    Inisialisasi skema/data (init_database) tidak dilakukan di sini; itu
+    dijalankan sekali saat startup aplikasi.
+
     Returns:
     --------
     tuple
-        (bool, DataFrame, DataFrame) - (success, destinations_df, similarity_matrix)
+        (bool, DataFrame) - (success, destinations_df)
     """
+    from .db_connection import read_table
+
     try:
-        # Mencoba koneksi ke database
-        if connect_to_db():
-            
-            # Inisialisasi tabel jika belum ada
-            init_status = init_database()
-
-            if not init_status:
-                print("Inisialisasi database gagal atau data tidak valid.")
-                return False, None, None
-            
-            # Membaca data dari tabel destinations
-            df = read_table("destinations")
-            if df is not None and not df.empty:
-                # Perbaiki URL yang terlalu panjang - hanya gunakan URL sederhana untuk Google Maps search
-                if 'url' in df.columns:
-                    # Update URL yang terlalu panjang menjadi format search sederhana
-                    df['url'] = df.apply(
-                        lambda row: f"https://www.google.com/maps/search/?api=1&query={row['title'].replace(' ', '+')},{row.get('district', '').replace(' ', '+')}" 
-                        if pd.notna(row.get('district')) else f"https://www.google.com/maps/search/?api=1&query={row['title'].replace(' ', '+')}", 
-                        axis=1
-                    )
-                else:
-                    # Buat URL Google Maps jika belum ada
-                    df['url'] = df.apply(
-                        lambda row: f"https://www.google.com/maps/search/?api=1&query={row['title'].replace(' ', '+')},{row.get('district', '').replace(' ', '+')}" 
-                        if pd.notna(row.get('district')) else f"https://www.google.com/maps/search/?api=1&query={row['title'].replace(' ', '+')}", 
-                        axis=1
-                    )
-                
-                # Buat fitur gabungan untuk perhitungan similarity dengan preprocessing yang lebih baik
-                df['description'] = df['title'].fillna('').str.lower()
-                
-                cat_column = None
-                if 'categories' in df.columns:
-                    cat_column = 'categories'
-                    
-                if cat_column:
-                    # ganti koma dengan spasi dan ubah ke lowercase
-                    df['description'] += ' ' + df[cat_column].fillna('').apply(
-                        lambda x: ' '.join([item.lower().strip() for item in x]) if isinstance(x, list) 
-                        else str(x).lower().replace(',', ' ').replace('[', '').replace(']', '').replace("'", "")
-                    )
-                
-                # Tambahkan lokasi ke deskripsi
-                if 'district' in df.columns:
-                    df['description'] += ' ' + df['district'].fillna('').str.lower()
-
-                # Hitung TF-IDF dan similarity matrix dengan parameter yang lebih baik
-                tfidf = TfidfVectorizer(
-                    stop_words=None,  # Tidak ada stop words untuk bahasa Indonesia
-                    ngram_range=(1, 2),  # Gunakan unigram dan bigram
-                    max_features=1000,  # Batasi fitur untuk performa
-                    min_df=1,  # Minimal muncul di 1 dokumen
-                    max_df=0.95  # Maksimal muncul di 95% dokumen
-                )
-                
-                # Tangani jika semua nilai kosong
-                if df['description'].str.strip().str.len().sum() == 0:
-                    print("Data tidak memiliki konten yang cukup untuk menghitung similarity.")
-                    return False, None, None
-                
-                tfidf_matrix = tfidf.fit_transform(df['description'])
-                similarity = cosine_similarity(tfidf_matrix)
-                
-                # Simpan similarity matrix
-                similarity_df = pd.DataFrame(similarity, index=df['title'], columns=df['title'])
-                
-                return True, df, similarity_df
-        
-        return False, None, None
-    
+        # Membaca data dari tabel destinations
+        df = read_table("destinations")
+        if df is None or df.empty:
+            return False, None
+
+        df = prepare_destinations(df)
+
+        # Tangani jika semua nilai kosong
+        if df['description'].str.strip().str.len().sum() == 0:
+            logger.warning("Data tidak memiliki konten yang cukup untuk menghitung similarity.")
+            return False, None
+
+        return True, df
+
     except Exception as e:
-        print(f"Error saat memuat data: {str(e)}")
-        return False, None, None
+        logger.error("Error saat memuat data: %s", e)
+        return False, None
+
+def recommendation_item(store, row):
+    """
+    Satu item rekomendasi untuk response API
+
+    Parameters:
+    -----------
+    store : DestinationStore
+        Metadata destinasi milik snapshot
+    row : int
+        Posisi baris destinasi
+
+    Returns:
+    --------
+    dict
+        {"nama_destinasi", "alamat", "kabupaten", "categories"}
+    """
+    district = store.district(row)
+    return {
+        "nama_destinasi": store.titles[row],
+        "alamat": build_maps_url(store.titles[row], district or None),
+        "kabupaten": district,
+        "categories": store.categories(row),
+    }
+
+def format_recommendations(store, rows):
+    """
+    Ubah baris rekomendasi menjadi list dictionary untuk response API
+
+    URL dibuat di sini dari judul dan kabupaten, bukan disimpan per destinasi.
+
+    Parameters:
+    -----------
+    store : DestinationStore
+        Metadata destinasi milik snapshot
+    rows : array-like
+        Posisi baris destinasi hasil rekomendasi
+
+    Returns:
+    --------
+    list
+        List dictionary dengan key nama_destinasi, alamat, kabupaten, categories
+    """
+    with stage("serialization"):
+        return [recommendation_item(store, int(row)) for row in rows]
 
-def get_recommendations_by_name(destination_name, limit=5):
+def recommend_rows_by_name(destination_name, limit, snapshot, category=None, district=None):
+    """
+    Posisi baris rekomendasi untuk satu nama destinasi (tanpa format response)
+
+    Parameters:
+    -----------
+    destination_name : str
+        Nama destinasi yang ingin dicari rekomendasinya
+    limit : int
+        Jumlah rekomendasi yang diinginkan
+    snapshot : IndexSnapshot
+        Snapshot index yang dipakai
+    category : str, optional
+        Hanya rekomendasikan destinasi dengan kategori ini
+    district : str, optional
+        Hanya rekomendasikan destinasi di kabupaten ini
+
+    Returns:
+    --------
+    numpy.ndarray
+        Posisi baris destinasi, terurut dari yang paling mirip
+
+    Raises:
+    -------
+    DestinationNotFoundError
+        Jika nama destinasi tidak ada di index; berisi saran nama yang mirip
+    """
+    # Lookup judul O(1); jika tidak ada, sertakan saran nama yang mirip
+    row = snapshot.titles.lookup(destination_name)
+    if row is None:
+        raise DestinationNotFoundError(destination_name, snapshot.titles.suggest(destination_name))
+
+    # Filter kategori/kabupaten diterapkan di dalam seleksi top-k
+    candidates = snapshot.facets.candidates(category, district)
+    return recommend_rows(row, snapshot.tfidf_matrix, limit, snapshot.neighbors, snapshot.ann, candidates)
+
+def get_recommendations_by_name(destination_name, limit=5, index=None, snapshot=None, category=None, district=None):
     """
     Mendapatkan rekomendasi destinasi berdasarkan nama destinasi
-    
+
     Parameters:
     -----------
     destination_name : str
         Nama destinasi yang ingin dicari rekomendasinya
     limit : int
         Jumlah rekomendasi yang diinginkan (default: 5)
-    
+    index : RecommendationIndex, optional
+        Index yang dipakai; default-nya index bersama milik proses
+    snapshot : IndexSnapshot, optional
+        Snapshot tertentu yang dipakai (misalnya agar hasil konsisten dengan
+        versi yang dipakai untuk ETag/cache); jika diisi, index diabaikan
+    category : str, optional
+        Hanya rekomendasikan destinasi dengan kategori ini
+    district : str, optional
+        Hanya rekomendasikan destinasi di kabupaten ini
+
     Returns:
     --------
     list
         List dictionary berisi rekomendasi destinasi dengan format:
         [{"nama_destinasi": str, "alamat": str, "kabupaten": str}, ...]
+
+    Raises:
+    -------
+    DestinationNotFoundError
+        Jika nama destinasi tidak ada di index; berisi saran nama yang mirip
     """
     try:
-        # Load data dan compute similarity
-        success, df_destinations, similarity_matrix = load_data_and_compute_similarity()
-        
-        if not success:
-            return []
-        
-        # Cari rekomendasi menggunakan fungsi yang sudah ada
-        recommendations = destination_recommendations(
-            destination_name, 
-            similarity_matrix, 
-            df_destinations, 
-            k=limit
-        )
-        
-        # Jika hasilnya adalah string error, return empty list
-        if isinstance(recommendations, str):
-            print(f"Error: {recommendations}")
-            return []
-        
+        if snapshot is None:
+            if index is None:
+                from .index import get_index
+                index = get_index()
+
+            # Ambil snapshot model yang sudah dibangun (dibangun sekali jika belum ada)
+            snapshot = index.ensure_built()
+            if snapshot is None:
+                return []
+
+        rows = recommend_rows_by_name(destination_name, limit, snapshot, category, district)
+
         # Format hasil sesuai permintaan
-        result = []
-        for _, row in recommendations.iterrows():
-            result.append({
-                "nama_destinasi": row.get('title', ''),
-                "alamat": row.get('url', ''),
-                "kabupaten": row.get('district', ''),
-                "categories": row.get('categories', []),
-            })
-        
-        return result
-        
+        return format_recommendations(snapshot.store, rows)
+
+    except DestinationNotFoundError:
+        raise
     except Exception as e:
-        print(f"Error getting recommendations: {str(e)}")
-        return []
\ No newline at end of file
+        logger.error("Error getting recommendations: %s", e)
+        return []
+
+def get_batch_recommendations(destination_names, limit=5, index=None):
+    """
+    Mendapatkan rekomendasi untuk banyak destinasi dalam satu operasi matriks
+
+    Parameters:
+    -----------
+    destination_names : list
+        Daftar nama destinasi yang ingin dicari rekomendasinya
+    limit : int
+        Jumlah rekomendasi per destinasi (default: 5)
+    index : RecommendationIndex, optional
+        Index yang dipakai; default-nya index bersama milik proses
+
+    Returns:
+    --------
+    list
+        Satu dictionary per nama, sesuai urutan input, dengan format:
+        {"query": str, "recommendations": [...], "total": int, "error": str or None,
+         "suggestions": [...]}
+    """
+    if index is None:
+        from .index import get_index
+        index = get_index()
+
+    snapshot = index.ensure_built()
+    if snapshot is None:
+        return [
+            {"query": name, "recommendations": [], "total": 0, "error": "Index rekomendasi belum tersedia", "suggestions": []}
+            for name in destination_names
+        ]
+
+    # Resolusi semua judul dalam satu lintasan
+    resolved = [snapshot.titles.lookup(name) for name in destination_names]
+    found_rows = sorted({row for row in resolved if row is not None})
+
+    neighbors = snapshot.neighbors
+    if neighbors is not None and neighbors[0].shape[1] >= limit:
+        neighbor_ids = {row: neighbors[0][row, :limit] for row in found_rows}
+    elif snapshot.ann is not None:
+        neighbor_ids = {row: snapshot.ann.query_row(row, limit) for row in found_rows}
+    else:
+        ids, _ = batch_top_k(found_rows, snapshot.tfidf_matrix, limit)
+        neighbor_ids = dict(zip(found_rows, ids))
+
+    results = []
+    for name, row in zip(destination_names, resolved):
+        if row is None:
+            results.append({
+                "query": name,
+                "recommendations": [],
+                "total": 0,
+                "error": f"'{name}' tidak ditemukan dalam database.",
+                "suggestions": snapshot.titles.suggest(name),
+            })
+            continue
+
+        recommendations = format_recommendations(snapshot.store, neighbor_ids[row])
+        results.append({
+            "query": name,
+            "recommendations": recommendations,
+            "total": len(recommendations),
+            "error": None,
+            "suggestions": [],
+        })
+
+    return results
+
+def get_recommendations_for_seeds(seeds, limit=10, index=None, snapshot=None, category=None, district=None):
+    """
+    Rekomendasi dari beberapa destinasi seed sekaligus (misalnya tempat yang disimpan user)
+
+    Baris TF-IDF seed digabung menjadi satu centroid berbobot dan katalog
+    dinilai sekali, sebagai ganti satu request /recommendations per seed
+    ditambah deduplikasi di sisi client. Seed tidak ikut direkomendasikan.
+
+    Parameters:
+    -----------
+    seeds : list
+        Daftar (nama destinasi, bobot); bobot harus positif
+    limit : int
+        Jumlah rekomendasi yang diinginkan (default: 10)
+    index : RecommendationIndex, optional
+        Index yang dipakai; default-nya index bersama milik proses
+    snapshot : IndexSnapshot, optional
+        Snapshot tertentu yang dipakai; jika diisi, index diabaikan
+    category : str, optional
+        Hanya rekomendasikan destinasi dengan kategori ini
+    district : str, optional
+        Hanya rekomendasikan destinasi di kabupaten ini
+
+    Returns:
+    --------
+    dict or None
+        {"recommendations": [...], "seeds": [judul seed yang ditemukan],
+         "not_found": [{"query": str, "suggestions": [...]}]}, atau None jika
+        index belum tersedia
+
+    Raises:
+    -------
+    DestinationNotFoundError
+        Jika tidak satu pun seed ada di index; berisi saran untuk seed pertama
+    """
+    if snapshot is None:
+        if index is None:
+            from .index import get_index
+            index = get_index()
+        snapshot = index.ensure_built()
+        if snapshot is None:
+            return None
+
+    rows, weights, found, not_found = [], [], [], []
+    for name, weight in seeds:
+        row = snapshot.titles.lookup(name)
+        if row is None:
+            not_found.append({"query": name, "suggestions": snapshot.titles.suggest(name)})
+            continue
+        rows.append(row)
+        weights.append(weight)
+        found.append(snapshot.store.titles[row])
+
+    if not rows:
+        raise DestinationNotFoundError(not_found[0]["query"], not_found[0]["suggestions"])
+
+    # Error lain tidak ditangkap di sini agar tidak tampak seperti index yang belum siap
+    candidates = snapshot.facets.candidates(category, district)
+    top, _ = centroid_top_k(rows, weights, snapshot.tfidf_matrix, limit, candidates)
+    return {
+        "recommendations": format_recommendations(snapshot.store, top),
+        "seeds": list(dict.fromkeys(found)),
+        "not_found": not_found,
+    }
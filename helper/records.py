@@ -0,0 +1,56 @@
+"""
+Helper record destinasi yang tidak membutuhkan database, pandas, atau SQLAlchemy.
+
+Modul ini sengaja ringan agar jalur serving (memuat index dari artifact)
+tidak perlu mengimpor driver database. db_connection mengekspor ulang
+semua nama di sini.
+"""
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+def parse_categories(value):
+    """
+    Normalisasi nilai kolom categories menjadi list string
+
+    PostgreSQL mengembalikan TEXT[] sebagai list, sedangkan backend tanpa
+    tipe array (misalnya SQLite) menyimpannya sebagai string dipisah koma.
+
+    Parameters:
+    -----------
+    value : list, str, or None
+        Nilai kolom categories dari database
+
+    Returns:
+    --------
+    list
+        Daftar kategori
+    """
+    if isinstance(value, (list, tuple)):
+        return [str(item).strip() for item in value if str(item).strip()]
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return []
+    return [item.strip() for item in str(value).strip('{}').split(',') if item.strip()]
+
+# Callback yang dipanggil setiap kali destinasi ditambahkan/diubah
+_change_listeners = []
+
+def register_change_listener(callback):
+    """
+    Daftarkan callback yang dipanggil setelah destinasi ditambahkan atau diubah
+
+    Parameters:
+    -----------
+    callback : callable
+        Fungsi yang menerima satu dict berisi id, title, district, categories, url
+    """
+    if callback not in _change_listeners:
+        _change_listeners.append(callback)
+
+def _notify_change(record):
+    for callback in list(_change_listeners):
+        try:
+            callback(record)
+        except Exception as e:
+            logger.error("Error pada listener perubahan destinasi: %s", e)
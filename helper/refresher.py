@@ -0,0 +1,215 @@
+import logging
+import threading
+import time
+
+from .config import env_float, env_str
+
+logger = logging.getLogger(__name__)
+
+class IndexRefresher:
+    """
+    Thread latar yang menjaga index rekomendasi tetap segar.
+
+    Setiap interval, refresher menjalankan probe murah ke tabel destinations
+    (jumlah baris + id maksimum, atau checksum isi tabel). Jika ada perubahan,
+    index dibangun ulang di thread ini, bukan di jalur request, lalu
+    snapshot baru dipasang secara atomik. Request yang sedang berjalan tetap
+    memakai snapshot lama sampai selesai.
+
+    Parameters:
+    -----------
+    index : RecommendationIndex
+        Index yang dijaga
+    interval : float, optional
+        Jeda antar pemeriksaan dalam detik (RAVELY_REFRESH_INTERVAL, default 300; 0 menonaktifkan)
+    probe : str, optional
+        "count" (jumlah baris + id maksimum) atau "checksum" (RAVELY_REFRESH_PROBE)
+    artifact_path : str, optional
+        Jika diisi, artifact index ditulis ulang setelah rebuild
+    shared : bool, optional
+        Mode index bersama antar worker: artifact_path adalah direktori induk
+        generasi. Worker memasang generasi baru yang dipublikasikan proses
+        lain, dan hanya pemegang leader lock yang membangun ulang.
+    """
+
+    def __init__(self, index, interval=None, probe=None, artifact_path=None, shared=False):
+        self.index = index
+        self.shared = shared and artifact_path is not None
+        self.interval = interval if interval is not None else env_float("RAVELY_REFRESH_INTERVAL", 300.0)
+        self.probe = probe or env_str("RAVELY_REFRESH_PROBE", "count")
+        self.artifact_path = artifact_path
+        self.last_check_at = None
+        self.last_change_at = None
+        self.last_error = None
+        self.rebuild_count = 0
+        self.attach_count = 0
+        self._last_state = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Jalankan thread refresher (tidak melakukan apa pun jika interval <= 0)."""
+        if self.interval <= 0 or self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="index-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Hentikan thread refresher dan tunggu sampai selesai."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check_once()
+
+    def has_changed(self, state, snapshot=None):
+        """
+        Bandingkan hasil probe dengan snapshot aktif
+
+        Parameters:
+        -----------
+        state : dict
+            Hasil probe_table_state
+        snapshot : IndexSnapshot, optional
+            Snapshot pembanding (default: snapshot aktif index)
+
+        Returns:
+        --------
+        bool
+            True jika index perlu dibangun ulang
+        """
+        if snapshot is None:
+            snapshot = self.index.snapshot
+        if snapshot is None:
+            return True
+
+        if self.probe == "checksum":
+            # Baseline dicatat saat snapshot/artifact dibangun, sehingga
+            # artifact yang basi terdeteksi pada probe pertama
+            expected = snapshot.table_checksum
+            last = self._last_state
+            if expected is None and last is not None and last.get("version") == snapshot.version:
+                expected = last["checksum"]
+            if expected is not None:
+                return state["checksum"] != expected
+            # Snapshot hasil upsert inkremental belum punya checksum: cocokkan
+            # seperti mode count, lalu checksum probe ini menjadi baseline-nya
+            # (lihat check_once), sehingga upsert tidak memicu rebuild penuh
+
+        # Mode count dibandingkan langsung dengan snapshot, sehingga destinasi
+        # yang sudah dilipat secara inkremental tidak memicu rebuild
+        return state["count"] != len(snapshot) or state["max_id"] != snapshot.max_id
+
+    def check_once(self):
+        """
+        Jalankan satu siklus probe dan rebuild jika ada perubahan
+
+        Returns:
+        --------
+        bool
+            True jika index dibangun ulang
+        """
+        from .db_connection import probe_table_state
+
+        self.last_check_at = time.time()
+        if self.shared and self.index.attach_generation(self.artifact_path):
+            # Worker lain sudah membangun ulang; cukup pasang generasi barunya
+            self.last_change_at = time.time()
+            self.attach_count += 1
+            # Generasi membawa checksum tabel saat build (table_checksum)
+            self._last_state = None
+            return True
+
+        state = probe_table_state(checksum=self.probe == "checksum")
+        if state is None:
+            self.last_error = "probe gagal"
+            return False
+
+        snapshot = self.index.snapshot
+        changed = self.has_changed(state, snapshot)
+        # Baseline berlaku untuk versi snapshot yang dibandingkan saja
+        self._last_state = dict(state, version=snapshot.version if snapshot is not None else None)
+        if not changed:
+            return False
+
+        self.last_change_at = time.time()
+        if self.shared:
+            return self._rebuild_shared(state)
+
+        logger.info("Perubahan terdeteksi pada tabel destinations (%s baris); membangun ulang index.", state['count'])
+        if not self.index.rebuild():
+            self.last_error = "rebuild gagal"
+            return False
+
+        self.last_error = None
+        self.rebuild_count += 1
+        if self.artifact_path:
+            from .artifact import save_index_artifact
+            try:
+                save_index_artifact(self.index.snapshot, self.artifact_path)
+            except Exception as e:
+                logger.warning("Artifact index gagal ditulis: %s", e)
+        return True
+
+    def _rebuild_shared(self, state):
+        from .shared_index import leader_lock, publish_generation
+
+        with leader_lock(self.artifact_path, blocking=False) as is_leader:
+            if not is_leader:
+                # Worker lain sedang membangun; generasinya dipasang di siklus berikutnya
+                logger.debug("Rebuild index dilewati: leader lock dipegang proses lain.")
+                return False
+            if self.index.attach_generation(self.artifact_path):
+                self.attach_count += 1
+                return True
+
+            logger.info("Perubahan terdeteksi pada tabel destinations (%s baris); membangun ulang index bersama.", state['count'])
+            if not self.index.rebuild():
+                self.last_error = "rebuild gagal"
+                return False
+            try:
+                self.index.generation = publish_generation(self.index.snapshot, self.artifact_path)
+            except Exception as e:
+                logger.warning("Generasi index gagal dipublikasikan: %s", e)
+
+        self.last_error = None
+        self.rebuild_count += 1
+        return True
+
+    def status(self):
+        """
+        Ringkasan kondisi index dan refresher untuk endpoint status
+
+        Returns:
+        --------
+        dict
+            Interval, waktu build terakhir, durasi build, dan hasil pemeriksaan terakhir
+        """
+        snapshot = self.index.snapshot
+        return {
+            "ready": snapshot is not None,
+            "version": snapshot.version if snapshot else None,
+            "rows": len(snapshot) if snapshot else 0,
+            "last_build_at": snapshot.built_at if snapshot else None,
+            "last_build_seconds": snapshot.build_seconds if snapshot else None,
+            "refresh_interval": self.interval,
+            "refresh_probe": self.probe,
+            "refresh_running": self.running,
+            "last_check_at": self.last_check_at,
+            "last_change_at": self.last_change_at,
+            "rebuild_count": self.rebuild_count,
+            "shared": self.shared,
+            "generation": self.index.generation,
+            "attach_count": self.attach_count,
+            "building": self.index.is_building,
+            "build_waiters": self.index.build_waiters,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,160 @@
+"""
+Index rekomendasi bersama untuk beberapa worker proses (uvicorn --workers N).
+
+Index dibangun sekali oleh satu proses (leader) lalu ditulis sebagai artifact
+berversi per generasi. Setiap worker memuat generasi aktif dengan memory
+mapping read-only, sehingga array besar (matriks TF-IDF dan tetangga) hanya
+ada satu kali di page cache OS, berapa pun jumlah worker-nya.
+
+Layout direktori:
+    root/CURRENT        nama generasi aktif, misalnya "gen-000003"
+    root/gen-000003/    artifact index (lihat artifact.py)
+    root/.leader.lock   flock; hanya pemegangnya yang boleh membangun dan mempublikasikan generasi
+"""
+import logging
+import os
+import re
+import shutil
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows tidak punya flock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CURRENT_NAME = "CURRENT"
+LOCK_NAME = ".leader.lock"
+GENERATION_PATTERN = re.compile(r"^gen-(\d+)$")
+
+def generation_path(root, generation):
+    """
+    Direktori artifact untuk satu generasi
+
+    Parameters:
+    -----------
+    root : str
+        Direktori induk index bersama
+    generation : int
+        Nomor generasi
+
+    Returns:
+    --------
+    str
+        Path direktori generasi
+    """
+    return os.path.join(os.path.abspath(root), f"gen-{generation:06d}")
+
+def current_generation(root):
+    """
+    Nomor generasi yang sedang aktif menurut file CURRENT
+
+    Parameters:
+    -----------
+    root : str
+        Direktori induk index bersama
+
+    Returns:
+    --------
+    int or None
+        Nomor generasi, atau None jika belum ada generasi yang dipublikasikan
+    """
+    try:
+        with open(os.path.join(root, CURRENT_NAME)) as f:
+            match = GENERATION_PATTERN.match(f.read().strip())
+    except OSError:
+        return None
+    return int(match.group(1)) if match else None
+
+def _existing_generations(root):
+    if not os.path.isdir(root):
+        return []
+    generations = []
+    for name in os.listdir(root):
+        match = GENERATION_PATTERN.match(name)
+        if match and os.path.isdir(os.path.join(root, name)):
+            generations.append(int(match.group(1)))
+    return sorted(generations)
+
+@contextmanager
+def leader_lock(root, blocking=True):
+    """
+    Kunci leader antar proses (flock pada root/.leader.lock)
+
+    Parameters:
+    -----------
+    root : str
+        Direktori induk index bersama
+    blocking : bool, optional
+        Tunggu sampai kunci bebas (default: True); jika False, langsung
+        kembali dengan False ketika proses lain memegang kunci
+
+    Yields:
+    -------
+    bool
+        True jika kunci didapat
+    """
+    os.makedirs(root, exist_ok=True)
+    if fcntl is None:
+        # Tanpa flock hanya satu proses yang diasumsikan membangun index
+        yield True
+        return
+
+    with open(os.path.join(root, LOCK_NAME), "a") as lock_file:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(lock_file.fileno(), flags)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def publish_generation(snapshot, root, keep=2):
+    """
+    Tulis snapshot sebagai generasi baru lalu jadikan generasi aktif
+
+    Harus dipanggil saat memegang leader_lock. File CURRENT diganti secara
+    atomik setelah artifact selesai ditulis, jadi worker tidak pernah
+    melihat generasi setengah jadi. Generasi lama yang melebihi `keep`
+    dihapus; worker yang masih memetakannya tetap aman karena mapping ke
+    file yang sudah di-unlink tetap valid sampai dilepas.
+
+    Parameters:
+    -----------
+    snapshot : IndexSnapshot
+        Snapshot yang dipublikasikan
+    root : str
+        Direktori induk index bersama
+    keep : int, optional
+        Jumlah generasi terbaru yang dipertahankan di disk (default: 2)
+
+    Returns:
+    --------
+    int
+        Nomor generasi baru
+    """
+    from .artifact import save_index_artifact
+
+    root = os.path.abspath(root)
+    os.makedirs(root, exist_ok=True)
+    existing = _existing_generations(root)
+    generation = max(existing + [current_generation(root) or 0]) + 1
+
+    save_index_artifact(snapshot, generation_path(root, generation))
+
+    tmp_path = os.path.join(root, f"{CURRENT_NAME}.tmp-{os.getpid()}")
+    with open(tmp_path, "w") as f:
+        f.write(f"gen-{generation:06d}\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(root, CURRENT_NAME))
+
+    for old in existing[:max(len(existing) + 1 - keep, 0)]:
+        shutil.rmtree(generation_path(root, old), ignore_errors=True)
+
+    logger.info("Generasi index %s dipublikasikan di %s", generation, root)
+    return generation
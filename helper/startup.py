@@ -0,0 +1,119 @@
+"""
+Laporan waktu import saat startup (berbasis ``python -X importtime``).
+
+Modul diimpor di proses Python baru sehingga hasilnya sama dengan cold start
+container. Laporan menampilkan total waktu import, paket teratas menurut
+waktu kumulatif, dan apakah paket berat (scikit-learn, pandas, SQLAlchemy)
+ikut terimpor; jalur serving seharusnya tidak membutuhkannya.
+
+Contoh:
+    python -m helper.startup
+    python -m helper.startup --module server --top 20 --fail-on-heavy
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Paket yang hanya dibutuhkan untuk build index atau akses database
+HEAVY_PACKAGES = ("sklearn", "pandas", "sqlalchemy")
+
+def parse_importtime(output):
+    """
+    Parse keluaran stderr ``-X importtime``
+
+    Parameters:
+    -----------
+    output : str
+        Isi stderr proses Python
+
+    Returns:
+    --------
+    list
+        Satu dictionary per modul: {"name", "depth", "self_ms", "cumulative_ms"}
+    """
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            modules.append({
+                "name": name.strip(),
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            })
+        except ValueError:
+            continue
+    return modules
+
+def import_report(module="server", top=15):
+    """
+    Ukur waktu import satu modul di proses baru
+
+    Parameters:
+    -----------
+    module : str, optional
+        Modul yang diimpor (default: server)
+    top : int, optional
+        Jumlah paket teratas yang dilaporkan (default: 15)
+
+    Returns:
+    --------
+    dict
+        {"module", "import_ms", "packages": [...], "heavy": {paket: bool}}
+
+    Raises:
+    -------
+    RuntimeError
+        Jika modul gagal diimpor
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True, env=os.environ.copy(),
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} gagal: {completed.stderr.strip()[-500:]}")
+
+    modules = parse_importtime(completed.stderr)
+    target = next((entry for entry in modules if entry["name"] == module), None)
+    imported = {entry["name"] for entry in modules}
+
+    # Paket tingkat atas (tanpa titik) dicatat sekali, saat pertama kali diimpor
+    packages = sorted(
+        (entry for entry in modules if "." not in entry["name"] and entry["name"] != module),
+        key=lambda entry: entry["cumulative_ms"],
+        reverse=True,
+    )[:top]
+
+    return {
+        "module": module,
+        "import_ms": round(target["cumulative_ms"], 1) if target else None,
+        "packages": [
+            {"name": entry["name"], "cumulative_ms": round(entry["cumulative_ms"], 1)} for entry in packages
+        ],
+        "heavy": {name: name in imported for name in HEAVY_PACKAGES},
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Laporan waktu import startup (python -X importtime)")
+    parser.add_argument("--module", default="server", help="Modul yang diukur (default: server)")
+    parser.add_argument("--top", type=int, default=15, help="Jumlah paket teratas yang ditampilkan")
+    parser.add_argument("--fail-on-heavy", action="store_true", help="Exit code 1 jika paket berat ikut terimpor")
+    args = parser.parse_args(argv)
+
+    report = import_report(args.module, args.top)
+    print(f"import {report['module']}: {report['import_ms']} ms")
+    print(f"{'package':<28} {'cumulative_ms':>13}")
+    for entry in report["packages"]:
+        print(f"{entry['name']:<28} {entry['cumulative_ms']:>13}")
+
+    heavy = [name for name, loaded in report["heavy"].items() if loaded]
+    print("Paket berat terimpor: " + (", ".join(heavy) if heavy else "tidak ada"))
+    return 1 if args.fail_on_heavy and heavy else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,362 @@
+"""
+Penyimpanan metadata destinasi berbentuk kolom yang ringkas.
+
+Saat melayani request, recommender hanya butuh id, judul, kabupaten, dan
+kategori setiap destinasi. DataFrame dengan kolom object (title, district,
+url, description, list categories) memakan ratusan byte per destinasi;
+DestinationStore menyimpannya sebagai:
+
+- judul: list string yang di-intern sekali (dipakai bersama TitleIndex)
+- kabupaten: kode integer kecil per baris + daftar nama unik
+- kategori: kode integer dalam layout CSR (offset per baris) + daftar nama unik
+- URL: tidak disimpan, dibuat saat serialisasi dari judul dan kabupaten
+
+Contoh laporan ukuran (katalog sintetis, tanpa database):
+    python -m helper.store --sizes 1000 10000 100000
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from .records import parse_categories
+
+def _code_dtype(n_values):
+    # Kode sekecil mungkin; -1 berarti tidak ada nilai
+    return np.int16 if n_values < np.iinfo(np.int16).max else np.int32
+
+def _encode(values):
+    # Dictionary encoding: nama unik (urutan kemunculan) + kode per nilai
+    codes = {}
+    encoded = [codes.setdefault(value, len(codes)) if value else -1 for value in values]
+    return np.asarray(encoded, dtype=_code_dtype(len(codes))), list(codes)
+
+def _strings_nbytes(values):
+    return sys.getsizeof(values) + sum(sys.getsizeof(value) for value in values)
+
+class DestinationStore:
+    """
+    Metadata destinasi per baris index dalam bentuk kolom ringkas.
+
+    Objek ini tidak diubah setelah dibuat; with_record() mengembalikan store
+    baru sehingga snapshot lama tetap konsisten.
+
+    Attributes:
+    -----------
+    ids : numpy.ndarray
+        Id destinasi (int64)
+    titles : list
+        Judul destinasi (string yang di-intern)
+    district_codes : numpy.ndarray
+        Kode kabupaten per baris (-1 jika kosong)
+    district_names : list
+        Nama kabupaten per kode
+    category_offsets : numpy.ndarray
+        Offset CSR: kategori baris i ada di category_codes[offsets[i]:offsets[i + 1]]
+    category_codes : numpy.ndarray
+        Kode kategori seluruh baris
+    category_names : list
+        Nama kategori per kode
+    """
+
+    def __init__(self, ids, titles, district_codes, district_names, category_offsets, category_codes, category_names):
+        self.ids = ids
+        self.titles = titles
+        self.district_codes = district_codes
+        self.district_names = district_names
+        self.category_offsets = category_offsets
+        self.category_codes = category_codes
+        self.category_names = category_names
+
+    @classmethod
+    def from_columns(cls, ids, titles, districts, categories):
+        """
+        Bangun store dari kolom biasa
+
+        Parameters:
+        -----------
+        ids : array-like
+            Id destinasi
+        titles : iterable
+            Judul destinasi
+        districts : iterable
+            Nama kabupaten (None/kosong jika tidak ada)
+        categories : iterable
+            Kategori per destinasi (list atau string dipisah koma)
+
+        Returns:
+        --------
+        DestinationStore
+            Store baru
+        """
+        titles = [sys.intern(str(title)) for title in titles]
+        district_codes, district_names = _encode(
+            district if isinstance(district, str) and district.strip() else None for district in districts
+        )
+
+        # Kategori ganda dalam satu destinasi disimpan sekali
+        category_lists = [list(dict.fromkeys(parse_categories(value))) for value in categories]
+        category_offsets = np.zeros(len(category_lists) + 1, dtype=np.int32)
+        np.cumsum([len(values) for values in category_lists], out=category_offsets[1:])
+        category_codes, category_names = _encode(value for values in category_lists for value in values)
+
+        return cls(
+            ids=np.asarray(ids, dtype=np.int64),
+            titles=titles,
+            district_codes=district_codes,
+            district_names=district_names,
+            category_offsets=category_offsets,
+            category_codes=category_codes,
+            category_names=category_names,
+        )
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Bangun store dari DataFrame destinasi (hasil read_table/prepare_destinations)
+
+        Parameters:
+        -----------
+        df : pandas.DataFrame
+            Kolom id, title, district, categories (kolom yang tidak ada dianggap kosong)
+
+        Returns:
+        --------
+        DestinationStore
+            Store baru
+        """
+        n_rows = len(df)
+        return cls.from_columns(
+            df['id'] if 'id' in df.columns else np.arange(n_rows),
+            df['title'],
+            df['district'] if 'district' in df.columns else [None] * n_rows,
+            df['categories'] if 'categories' in df.columns else [None] * n_rows,
+        )
+
+    def __len__(self):
+        return len(self.titles)
+
+    def district(self, row):
+        """Nama kabupaten baris row ("" jika kosong)."""
+        code = self.district_codes[row]
+        return self.district_names[code] if code >= 0 else ""
+
+    def categories(self, row):
+        """Daftar kategori baris row."""
+        codes = self.category_codes[self.category_offsets[row]:self.category_offsets[row + 1]]
+        return [self.category_names[code] for code in codes]
+
+    def url(self, row):
+        """URL Google Maps baris row, dibuat saat dibutuhkan."""
+        from .recommendations import build_maps_url
+        return build_maps_url(self.titles[row], self.district(row) or None)
+
+    def record(self, row):
+        """
+        Data lengkap satu destinasi
+
+        Parameters:
+        -----------
+        row : int
+            Posisi baris
+
+        Returns:
+        --------
+        dict
+            {"id", "title", "district", "categories", "url"}
+        """
+        row = int(row)
+        return {
+            "id": int(self.ids[row]),
+            "title": self.titles[row],
+            "district": self.district(row),
+            "categories": self.categories(row),
+            "url": self.url(row),
+        }
+
+    def districts(self):
+        """Nama kabupaten setiap baris (list)."""
+        names = self.district_names + [""]
+        return [names[code] for code in self.district_codes]
+
+    def category_lists(self):
+        """Daftar kategori setiap baris (list of list)."""
+        return [self.categories(row) for row in range(len(self))]
+
+    def with_record(self, record, row=None):
+        """
+        Store baru dengan satu destinasi ditambahkan atau diganti
+
+        Parameters:
+        -----------
+        record : dict
+            Data destinasi dengan key id, title, district, categories
+        row : int, optional
+            Posisi baris yang diganti; None untuk menambahkan di akhir
+
+        Returns:
+        --------
+        DestinationStore
+            Store baru (store ini tidak diubah)
+        """
+        district = record.get('district')
+        district_names = list(self.district_names)
+        if isinstance(district, str) and district.strip():
+            if district not in district_names:
+                district_names.append(district)
+            district_code = district_names.index(district)
+        else:
+            district_code = -1
+
+        category_names = list(self.category_names)
+        new_codes = []
+        for category in dict.fromkeys(parse_categories(record.get('categories'))):
+            if category not in category_names:
+                category_names.append(category)
+            new_codes.append(category_names.index(category))
+
+        n_rows = len(self)
+        row = n_rows if row is None else int(row)
+        ids = np.array(self.ids)
+        titles = list(self.titles)
+        district_codes = np.array(self.district_codes, dtype=_code_dtype(len(district_names)))
+        if row == n_rows:
+            ids = np.append(ids, np.int64(record.get('id', n_rows)))
+            titles.append(sys.intern(str(record['title'])))
+            district_codes = np.append(district_codes, district_code).astype(district_codes.dtype)
+        else:
+            ids[row] = record.get('id', ids[row])
+            titles[row] = sys.intern(str(record['title']))
+            district_codes[row] = district_code
+
+        # Sisipkan kode kategori baris ini ke layout CSR
+        start = self.category_offsets[row] if row < n_rows else self.category_offsets[-1]
+        stop = self.category_offsets[row + 1] if row < n_rows else start
+        category_codes = np.concatenate([
+            self.category_codes[:start],
+            np.asarray(new_codes, dtype=self.category_codes.dtype),
+            self.category_codes[stop:],
+        ]).astype(_code_dtype(len(category_names)))
+        lengths = np.diff(self.category_offsets)
+        lengths = np.append(lengths, 0) if row == n_rows else np.array(lengths)
+        lengths[row] = len(new_codes)
+        category_offsets = np.zeros(len(lengths) + 1, dtype=np.int32)
+        np.cumsum(lengths, out=category_offsets[1:])
+
+        return DestinationStore(
+            ids=ids,
+            titles=titles,
+            district_codes=district_codes,
+            district_names=district_names,
+            category_offsets=category_offsets,
+            category_codes=category_codes,
+            category_names=category_names,
+        )
+
+    @property
+    def nbytes(self):
+        """Perkiraan memori store dalam byte (array + string Python)."""
+        arrays = (self.ids, self.district_codes, self.category_offsets, self.category_codes)
+        return int(
+            sum(array.nbytes for array in arrays)
+            + _strings_nbytes(self.titles)
+            + _strings_nbytes(self.district_names)
+            + _strings_nbytes(self.category_names)
+        )
+
+def frame_nbytes(df):
+    """
+    Memori DataFrame destinasi dalam byte, termasuk isi list categories
+
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        DataFrame destinasi
+
+    Returns:
+    --------
+    int
+        Ukuran dalam byte
+    """
+    total = int(df.memory_usage(deep=True).sum())
+    if 'categories' in df.columns:
+        # memory_usage(deep=True) hanya menghitung objek list, bukan string di dalamnya
+        total += sum(
+            sum(sys.getsizeof(item) for item in value)
+            for value in df['categories'] if isinstance(value, (list, tuple))
+        )
+    return total
+
+def memory_report(df, neighbors_k=20):
+    """
+    Bandingkan memori per destinasi: DataFrame + TF-IDF float64 vs store ringkas + TF-IDF float32
+
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        DataFrame destinasi hasil prepare_destinations (dengan kolom description)
+    neighbors_k : int, optional
+        Jumlah tetangga prekomputasi yang ikut dihitung (default: 20)
+
+    Returns:
+    --------
+    dict
+        Byte per destinasi untuk metadata, matriks TF-IDF dan total, sebelum dan sesudah
+    """
+    from .recommendations import fit_tfidf
+
+    n_rows = max(len(df), 1)
+    _, matrix = fit_tfidf(df['description'])
+    # Ukuran matriks yang sama dengan data float64 (sebelum) dan float32 (sesudah)
+    structure = matrix.indices.nbytes + matrix.indptr.nbytes
+    matrix_before = structure + matrix.nnz * 8
+    matrix_after = structure + matrix.nnz * 4
+    neighbors = n_rows * neighbors_k * (4 + 4)
+
+    before_metadata = frame_nbytes(df)
+    after_metadata = DestinationStore.from_frame(df).nbytes
+    before = before_metadata + matrix_before + neighbors
+    after = after_metadata + matrix_after + neighbors
+    return {
+        "rows": len(df),
+        "before": {
+            "metadata": round(before_metadata / n_rows, 1),
+            "tfidf": round(matrix_before / n_rows, 1),
+            "neighbors": round(neighbors / n_rows, 1),
+            "total": round(before / n_rows, 1),
+        },
+        "after": {
+            "metadata": round(after_metadata / n_rows, 1),
+            "tfidf": round(matrix_after / n_rows, 1),
+            "neighbors": round(neighbors / n_rows, 1),
+            "total": round(after / n_rows, 1),
+        },
+        "ratio": round(after / before, 3) if before else None,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Laporan memori per destinasi: DataFrame vs store ringkas")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Ukuran katalog sintetis")
+    parser.add_argument("--top-k", type=int, default=20, help="Tetangga prekomputasi per destinasi")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from .recommendations import prepare_destinations
+    from .synthetic import generate_destinations
+
+    print(f"{'rows':>8} {'':>7} {'metadata':>9} {'tfidf':>8} {'neighbors':>9} {'total':>8}  (byte/destinasi)")
+    for n_rows in args.sizes:
+        df = generate_destinations(n_rows, seed=args.seed)
+        df["id"] = np.arange(1, n_rows + 1)
+        report = memory_report(prepare_destinations(df), args.top_k)
+        for label in ("before", "after"):
+            part = report[label]
+            print(
+                f"{n_rows:>8} {label:>7} {part['metadata']:>9} {part['tfidf']:>8} "
+                f"{part['neighbors']:>9} {part['total']:>8}"
+            )
+        print(f"{'':>8} {'ratio':>7} {report['ratio']:>38}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
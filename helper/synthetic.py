@@ -0,0 +1,146 @@
+"""
+Generator katalog destinasi sintetis untuk benchmark dan pengujian offline.
+
+Distribusi dibuat menyerupai data asli: jenis tempat (Candi, Pantai, Goa, ...)
+menentukan kategori yang mungkin, kabupaten mengikuti distribusi miring
+(sebagian besar destinasi ada di beberapa kabupaten populer), dan judul
+unik seperti pada tabel destinations.
+"""
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from .ingest import destinations_ddl
+
+# Jenis tempat -> kategori yang biasanya melekat padanya
+PLACE_TYPES = {
+    "Candi": ["sejarah", "budaya", "religi"],
+    "Pantai": ["pantai", "alam", "keluarga"],
+    "Goa": ["alam", "petualangan", "sejarah"],
+    "Air Terjun": ["alam", "petualangan"],
+    "Curug": ["alam", "petualangan"],
+    "Bukit": ["alam", "petualangan", "fotografi"],
+    "Puncak": ["alam", "fotografi"],
+    "Hutan Pinus": ["alam", "fotografi", "keluarga"],
+    "Telaga": ["alam", "keluarga"],
+    "Embung": ["alam", "fotografi"],
+    "Desa Wisata": ["budaya", "edukasi", "keluarga"],
+    "Museum": ["sejarah", "edukasi", "budaya"],
+    "Taman": ["keluarga", "rekreasi"],
+    "Kebun": ["alam", "edukasi", "keluarga"],
+    "Pasar": ["kuliner", "belanja", "budaya"],
+    "Kampung": ["budaya", "kuliner"],
+    "Masjid": ["religi", "sejarah"],
+    "Gereja": ["religi", "sejarah"],
+    "Pura": ["religi", "budaya"],
+    "Waterpark": ["rekreasi", "keluarga"],
+}
+
+# Bobot kira-kira: tempat alam dan sejarah lebih banyak daripada tempat ibadah
+PLACE_WEIGHTS = np.array([6, 9, 6, 5, 4, 6, 3, 3, 3, 2, 7, 4, 5, 3, 3, 3, 2, 1, 1, 2], dtype=np.float64)
+
+NAME_WORDS = [
+    "Sambisari", "Prambanan", "Ratu Boko", "Plaosan", "Kalasan", "Parangtritis", "Indrayanti",
+    "Timang", "Pindul", "Jomblang", "Merapi", "Kaliurang", "Sermo", "Nglanggeran", "Kalibiru",
+    "Mangunan", "Becici", "Seribu Batu", "Imogiri", "Kotagede", "Malioboro", "Tamansari",
+    "Sri Gethuk", "Kedung Pedut", "Suroloyo", "Breksi", "Ijo", "Banyu Sumilir", "Wediombo",
+    "Siung", "Baron", "Kukup", "Sundak", "Glagah", "Depok", "Cemoro Sewu", "Turgo", "Tritis",
+    "Kembang Soka", "Grojogan", "Watu Lumbung", "Pengilon", "Gumuk Pasir", "Kiskendo",
+]
+
+# Kabupaten DIY (populer) diikuti kabupaten sekitar untuk katalog yang lebih besar
+DISTRICTS = [
+    "Kabupaten Sleman", "Kabupaten Bantul", "Kabupaten Gunungkidul", "Kabupaten Kulon Progo",
+    "Kota Yogyakarta", "Kabupaten Magelang", "Kabupaten Klaten", "Kabupaten Purworejo",
+    "Kabupaten Wonogiri", "Kabupaten Boyolali", "Kota Magelang", "Kabupaten Sukoharjo",
+]
+
+def _zipf_weights(n, exponent=1.1):
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+def generate_destinations(n_rows, seed=0):
+    """
+    Buat katalog destinasi sintetis
+
+    Parameters:
+    -----------
+    n_rows : int
+        Jumlah destinasi
+    seed : int, optional
+        Seed agar katalog dapat direproduksi (default: 0)
+
+    Returns:
+    --------
+    pandas.DataFrame
+        Kolom title (unik), district, categories (list)
+    """
+    rng = np.random.default_rng(seed)
+    place_types = list(PLACE_TYPES)
+
+    type_choice = rng.choice(len(place_types), size=n_rows, p=PLACE_WEIGHTS / PLACE_WEIGHTS.sum())
+    name_choice = rng.choice(len(NAME_WORDS), size=n_rows, p=_zipf_weights(len(NAME_WORDS), 0.8))
+    district_choice = rng.choice(len(DISTRICTS), size=n_rows, p=_zipf_weights(len(DISTRICTS)))
+    category_counts = rng.integers(1, 4, size=n_rows)
+
+    titles = []
+    categories = []
+    seen = {}
+    for i in range(n_rows):
+        place_type = place_types[type_choice[i]]
+        base = f"{place_type} {NAME_WORDS[name_choice[i]]}"
+        # Judul harus unik; tambahkan nomor jika kombinasi sudah dipakai
+        count = seen.get(base, 0)
+        seen[base] = count + 1
+        titles.append(base if count == 0 else f"{base} {count + 1}")
+
+        typical = PLACE_TYPES[place_type]
+        picked = list(rng.choice(typical, size=min(category_counts[i], len(typical)), replace=False))
+        # Sesekali kategori di luar kebiasaan jenis tempatnya
+        if rng.random() < 0.1:
+            picked.append(str(rng.choice(["keluarga", "fotografi", "kuliner", "edukasi"])))
+        categories.append(sorted(set(str(item) for item in picked)))
+
+    return pd.DataFrame({
+        "title": titles,
+        "district": [DISTRICTS[i] for i in district_choice],
+        "categories": categories,
+    })
+
+def write_catalog(df, engine, table_name='destinations'):
+    """
+    Tulis katalog ke database (menggantikan tabel yang ada)
+
+    Backend tanpa tipe array (misalnya SQLite) menyimpan categories sebagai string
+    dipisah koma; db_connection.parse_categories mengembalikannya ke list.
+
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        Katalog dari generate_destinations
+    engine : sqlalchemy.Engine
+        Engine database tujuan
+    table_name : str, optional
+        Nama tabel destinasi
+
+    Returns:
+    --------
+    int
+        Jumlah baris yang ditulis
+    """
+    from .recommendations import build_maps_url
+
+    rows = df.copy()
+    rows["url"] = [build_maps_url(title, district) for title, district in zip(rows["title"], rows["district"])]
+    if engine.dialect.name != "postgresql":
+        rows["categories"] = rows["categories"].apply(",".join)
+
+    with engine.connect() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {table_name}"))
+        conn.execute(text(destinations_ddl(table_name, engine.dialect.name)))
+        conn.commit()
+
+    rows[["title", "district", "url", "categories"]].to_sql(
+        table_name, engine, if_exists='append', index=False, chunksize=10000
+    )
+    return len(rows)
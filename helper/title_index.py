@@ -0,0 +1,380 @@
+import bisect
+import re
+
+import numpy as np
+
+from .functions import top_k_indices
+
+_WHITESPACE = re.compile(r"\s+")
+
+class DestinationNotFoundError(LookupError):
+    """
+    Nama destinasi tidak ada di index.
+
+    Attributes:
+    -----------
+    title : str
+        Nama yang dicari
+    suggestions : list
+        Nama destinasi yang mirip, terurut dari yang paling relevan
+    """
+
+    def __init__(self, title, suggestions=None):
+        self.title = title
+        self.suggestions = suggestions or []
+        super().__init__(f"'{title}' tidak ditemukan dalam database.")
+
+def normalize_title(title):
+    """
+    Kunci pencarian judul: huruf kecil (casefold) dan spasi dirapikan
+
+    Parameters:
+    -----------
+    title : str
+        Judul destinasi atau input user
+
+    Returns:
+    --------
+    str
+        Judul yang sudah dinormalisasi, misalnya "  Candi  SAMBISARI" -> "candi sambisari"
+    """
+    return _WHITESPACE.sub(" ", str(title)).strip().casefold()
+
+def trigrams(key):
+    """
+    Himpunan trigram karakter dari kunci yang sudah dinormalisasi
+
+    Kunci diberi padding seperti pg_trgm agar awal dan akhir kata ikut
+    berkontribusi pada skor.
+
+    Parameters:
+    -----------
+    key : str
+        Kunci hasil normalize_title
+
+    Returns:
+    --------
+    set
+        Trigram karakter
+    """
+    if not key:
+        return set()
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _prefix_mask(vocabulary, postings, prefix, mask):
+    # Tandai baris yang punya token berawalan prefix (vocabulary terurut)
+    start = bisect.bisect_left(vocabulary, prefix)
+    stop = bisect.bisect_left(vocabulary, prefix + "\uffff")
+    for token in vocabulary[start:stop]:
+        mask[postings[token]] = True
+    return mask
+
+def _build_postings(postings):
+    return {key: np.asarray(rows, dtype=np.int32) for key, rows in postings.items()}
+
+def _update_postings(postings, vocabulary, row, removed, added):
+    # Salinan postings (dan vocabulary terurut) dengan baris row dipindah dari
+    # key di removed ke key di added; array posting yang tidak terdampak dipakai bersama
+    postings = dict(postings)
+    vocabulary = list(vocabulary) if vocabulary is not None else None
+    for key in removed - added:
+        rows = postings[key]
+        rows = rows[rows != row]
+        if rows.size:
+            postings[key] = rows
+        else:
+            del postings[key]
+            if vocabulary is not None:
+                del vocabulary[bisect.bisect_left(vocabulary, key)]
+    for key in added - removed:
+        rows = postings.get(key)
+        if rows is None:
+            postings[key] = np.asarray([row], dtype=np.int32)
+            if vocabulary is not None:
+                bisect.insort(vocabulary, key)
+        else:
+            postings[key] = np.insert(rows, np.searchsorted(rows, row), row).astype(np.int32)
+    return postings, vocabulary
+
+class TitleIndex:
+    """
+    Index judul destinasi untuk lookup exact O(1), saran "did you mean", dan pencarian.
+
+    Lookup exact memakai hash map dari judul yang dinormalisasi. Saran
+    dihitung dari inverted index trigram: hanya destinasi yang berbagi
+    trigram dengan query yang disentuh, lalu diurutkan dengan koefisien Dice.
+    Pencarian memakai inverted index token (prefix) ditambah trigram untuk
+    kecocokan substring, sehingga tidak ada scan seluruh katalog per query.
+
+    Parameters:
+    -----------
+    titles : iterable
+        Judul destinasi, sesuai urutan baris di index rekomendasi
+    terms : iterable, optional
+        Teks tambahan per baris (misalnya kabupaten dan kategori) yang ikut
+        dicari dengan bobot lebih rendah daripada judul
+    """
+
+    def __init__(self, titles, terms=None):
+        self._titles = list(titles)
+        self._keys = []
+        self._rows = {}
+        postings = {}
+        title_tokens = {}
+        term_tokens = {}
+        sizes = np.zeros(len(self._titles), dtype=np.int32)
+        terms = list(terms) if terms is not None else [""] * len(self._titles)
+
+        for row, (title, extra) in enumerate(zip(self._titles, terms)):
+            key = normalize_title(title)
+            self._keys.append(key)
+            self._rows.setdefault(key, row)
+            grams = trigrams(key)
+            sizes[row] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(row)
+            for token in set(key.split()):
+                title_tokens.setdefault(token, []).append(row)
+            for token in set(normalize_title(extra).split()):
+                term_tokens.setdefault(token, []).append(row)
+
+        self._postings = _build_postings(postings)
+        self._sizes = sizes
+        self._title_tokens = _build_postings(title_tokens)
+        self._title_vocabulary = sorted(self._title_tokens)
+        self._term_tokens = _build_postings(term_tokens)
+        self._term_vocabulary = sorted(self._term_tokens)
+        # Judul terurut untuk mencari "judul diawali query" dengan bisect
+        order = sorted(range(len(self._keys)), key=self._keys.__getitem__)
+        self._sorted_keys = [self._keys[row] for row in order]
+        self._sorted_rows = np.asarray(order, dtype=np.int32)
+        self._lengths = np.fromiter((len(key) for key in self._keys), dtype=np.int32, count=len(self._keys))
+
+    def __len__(self):
+        return len(self._titles)
+
+    def with_row(self, row, title, terms="", old_terms=""):
+        """
+        Index baru dengan satu judul ditambahkan atau diganti, tanpa membangun ulang
+
+        Hanya posting trigram/token milik baris tersebut yang diperbarui;
+        index ini tidak diubah sehingga snapshot lama tetap konsisten.
+
+        Parameters:
+        -----------
+        row : int
+            Posisi baris; sama dengan len(self) untuk menambahkan di akhir
+        title : str
+            Judul destinasi
+        terms : str, optional
+            Teks tambahan baris tersebut (kabupaten dan kategori)
+        old_terms : str, optional
+            Teks tambahan lama jika baris diganti
+
+        Returns:
+        --------
+        TitleIndex
+            Index baru
+        """
+        appended = row == len(self._titles)
+        key = normalize_title(title)
+        term_tokens = set(normalize_title(terms).split())
+        old_key = None if appended else self._keys[row]
+        old_term_tokens = set() if appended else set(normalize_title(old_terms).split())
+
+        index = TitleIndex.__new__(TitleIndex)
+        index._titles = list(self._titles)
+        index._keys = list(self._keys)
+        index._rows = dict(self._rows)
+        if appended:
+            index._titles.append(title)
+            index._keys.append(key)
+            index._sizes = np.append(self._sizes, 0).astype(np.int32)
+            index._lengths = np.append(self._lengths, 0).astype(np.int32)
+        else:
+            index._titles[row] = title
+            index._keys[row] = key
+            index._sizes = self._sizes.copy()
+            index._lengths = self._lengths.copy()
+        grams = trigrams(key)
+        index._sizes[row] = len(grams)
+        index._lengths[row] = len(key)
+
+        # Lookup exact: baris pertama dengan kunci yang sama menang, seperti saat build
+        if old_key is not None and old_key != key and index._rows.get(old_key) == row:
+            del index._rows[old_key]
+            try:
+                index._rows[old_key] = index._keys.index(old_key)
+            except ValueError:
+                pass
+        if index._rows.get(key, row) >= row:
+            index._rows[key] = row
+
+        old_grams = trigrams(old_key) if old_key is not None else set()
+        old_tokens = set(old_key.split()) if old_key is not None else set()
+        index._postings, _ = _update_postings(self._postings, None, row, old_grams, grams)
+        index._title_tokens, index._title_vocabulary = _update_postings(
+            self._title_tokens, self._title_vocabulary, row, old_tokens, set(key.split())
+        )
+        index._term_tokens, index._term_vocabulary = _update_postings(
+            self._term_tokens, self._term_vocabulary, row, old_term_tokens, term_tokens
+        )
+
+        # Judul terurut: lepas posisi lama lalu sisipkan kunci baru
+        sorted_keys = list(self._sorted_keys)
+        sorted_rows = self._sorted_rows
+        if old_key is not None:
+            start = bisect.bisect_left(sorted_keys, old_key)
+            stop = bisect.bisect_right(sorted_keys, old_key)
+            position = start + int(np.flatnonzero(sorted_rows[start:stop] == row)[0])
+            del sorted_keys[position]
+            sorted_rows = np.delete(sorted_rows, position)
+        position = bisect.bisect_right(sorted_keys, key)
+        sorted_keys.insert(position, key)
+        index._sorted_keys = sorted_keys
+        index._sorted_rows = np.insert(sorted_rows, position, row).astype(np.int32)
+        return index
+
+    def __contains__(self, title):
+        return normalize_title(title) in self._rows
+
+    def lookup(self, title):
+        """
+        Cari posisi baris destinasi berdasarkan judul (tidak peka huruf/spasi)
+
+        Parameters:
+        -----------
+        title : str
+            Judul destinasi
+
+        Returns:
+        --------
+        int or None
+            Posisi baris, atau None jika tidak ditemukan
+        """
+        return self._rows.get(normalize_title(title))
+
+    def _dice_scores(self, key):
+        grams = trigrams(key)
+        lists = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not lists:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+        rows, shared = np.unique(np.concatenate(lists), return_counts=True)
+        return rows, 2.0 * shared / (len(grams) + self._sizes[rows])
+
+    def suggest(self, query, limit=5, min_score=0.3):
+        """
+        Saran judul yang mirip dengan query, terurut dari yang paling mirip
+
+        Parameters:
+        -----------
+        query : str
+            Input user
+        limit : int, optional
+            Jumlah saran maksimum (default: 5)
+        min_score : float, optional
+            Skor Dice minimum agar sebuah judul disarankan (default: 0.3)
+
+        Returns:
+        --------
+        list
+            Judul destinasi yang disarankan
+        """
+        rows, scores = self._dice_scores(normalize_title(query))
+        keep = scores >= min_score
+        rows, scores = rows[keep], scores[keep]
+
+        return [self._titles[rows[i]] for i in top_k_indices(scores, limit)]
+
+    def _substring_mask(self, key, mask):
+        # Kandidat dari irisan posting trigram (tanpa padding), lalu diverifikasi
+        grams = {key[i:i + 3] for i in range(len(key) - 2)}
+        lists = []
+        for gram in grams:
+            rows = self._postings.get(gram)
+            if rows is None:
+                return mask
+            lists.append(rows)
+        lists.sort(key=len)
+        candidates = lists[0]
+        for rows in lists[1:]:
+            candidates = np.intersect1d(candidates, rows, assume_unique=True)
+            if candidates.size == 0:
+                return mask
+        if len(grams) > 1:
+            keys = self._keys
+            candidates = candidates[np.fromiter((key in keys[row] for row in candidates), dtype=bool, count=candidates.size)]
+        mask[candidates] = True
+        return mask
+
+    def search(self, query, offset=0, limit=10, min_score=0.3):
+        """
+        Cari destinasi yang cocok dengan query, terurut dari yang paling relevan
+
+        Urutan skor: judul sama persis, judul diawali query, query muncul
+        sebagai substring judul, lalu setiap kata query cocok sebagai awalan
+        token judul (atau kabupaten/kategori, dengan bobot lebih rendah).
+        Jika tidak ada yang cocok, dipakai kemiripan trigram (toleran typo).
+
+        Parameters:
+        -----------
+        query : str
+            Input user
+        offset : int, optional
+            Jumlah hasil teratas yang dilewati (pagination)
+        limit : int, optional
+            Jumlah hasil maksimum (default: 10)
+        min_score : float, optional
+            Skor Dice minimum untuk hasil fallback toleran typo (default: 0.3)
+
+        Returns:
+        --------
+        tuple
+            (numpy.ndarray, numpy.ndarray, int) - (posisi baris, skor, total hasil)
+        """
+        key = normalize_title(query)
+        n_rows = len(self._keys)
+        if not key or n_rows == 0:
+            return np.empty(0, dtype=np.int32), np.empty(0), 0
+
+        # Setiap kata harus cocok sebagai awalan token judul atau token tambahan
+        words = key.split()
+        title_words = np.zeros(n_rows, dtype=np.float64)
+        matched = np.ones(n_rows, dtype=bool)
+        for word in words:
+            in_title = _prefix_mask(self._title_vocabulary, self._title_tokens, word, np.zeros(n_rows, dtype=bool))
+            title_words += in_title
+            matched &= _prefix_mask(self._term_vocabulary, self._term_tokens, word, in_title.copy())
+
+        scores = np.where(matched, 0.5 + 0.5 * title_words / len(words), 0.0)
+        if len(key) >= 3:
+            scores += 2.0 * self._substring_mask(key, np.zeros(n_rows, dtype=bool))
+        # Judul diawali query (termasuk sama persis) adalah rentang di judul terurut
+        start = bisect.bisect_left(self._sorted_keys, key)
+        stop = bisect.bisect_left(self._sorted_keys, key + "\uffff")
+        scores[self._sorted_rows[start:stop]] += 2.0
+        exact = self._rows.get(key)
+        if exact is not None:
+            scores[exact] += 4.0
+
+        rows = np.flatnonzero(scores).astype(np.int32)
+        scores = scores[rows]
+        if rows.size == 0:
+            rows, scores = self._dice_scores(key)
+            keep = scores >= min_score
+            rows, scores = rows[keep].astype(np.int32), scores[keep]
+
+        total = int(rows.size)
+        if total == 0 or offset >= total:
+            return np.empty(0, dtype=np.int32), np.empty(0), total
+
+        # Skor tertinggi dulu; seri diurutkan judul terpendek lalu urutan baris
+        wanted = offset + limit
+        if total > 4 * wanted:
+            # Cukup urutkan kandidat dengan skor setidaknya skor ke-`wanted`
+            threshold = np.partition(scores, total - wanted)[total - wanted]
+            keep = scores >= threshold
+            rows, scores = rows[keep], scores[keep]
+        order = np.lexsort((rows, self._lengths[rows], -scores))[offset:wanted]
+        return rows[order], scores[order], total
@@ -1,13 +1,107 @@
-import pandas as pd
-from fastapi import FastAPI, HTTPException, Query
+import json
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Dict, Optional
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Dict, Literal, Optional
 
-from helper.db_connection import connect_to_db, read_table, init_database
-from helper.recommendations import get_recommendations_by_name
+from helper.artifact import default_artifact_path
+from helper.cache import TTLCache, etag_matches
+from helper.config import configure_logging, env_bool, env_float, env_int, env_str
+from helper import data_access
+from helper.facets import category_key, district_key
+from helper.fast_json import JSONBytesResponse, dumps, json_object
+from helper.index import get_index
+from helper import metrics
+from helper.recommendations import get_batch_recommendations, get_recommendations_for_seeds, recommend_rows_by_name
+from helper.records import register_change_listener
+from helper.refresher import IndexRefresher
+from helper.title_index import DestinationNotFoundError, normalize_title
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+# Browser/CDN boleh menyimpan response, tetapi wajib revalidasi dengan ETag
+RECOMMENDATION_CACHE_CONTROL = "public, no-cache"
+
+# memory: index rekomendasi di memori proses; table: baca tabel destination_neighbors
+SERVING_MODES = ("memory", "table")
+
+# Header Retry-After untuk 503 saat index masih dibangun
+BUILD_RETRY_AFTER_SECONDS = 5
+
+def serving_mode():
+    mode = env_str("RAVELY_SERVING_MODE", "memory").lower()
+    if mode not in SERVING_MODES:
+        logger.warning("RAVELY_SERVING_MODE=%r tidak dikenal, memakai memory", mode)
+        return "memory"
+    return mode
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_logging()
+
+    # Inisialisasi skema/data database sekali saat startup, bukan per request.
+    # RAVELY_INIT_DB=false melewatinya (database sudah terisi) sehingga startup
+    # dengan index siap pakai tidak perlu mengimpor SQLAlchemy sama sekali.
+    if env_bool("RAVELY_INIT_DB", True):
+        from helper.db_connection import init_database
+        if not await run_in_threadpool(init_database):
+            logger.warning("Inisialisasi database gagal atau data tidak valid.")
+    # Opsional: index GIN pg_trgm untuk pencarian ILIKE di database
+    if env_bool("RAVELY_PG_TRGM", False):
+        from helper.db_connection import ensure_trigram_index
+        await run_in_threadpool(ensure_trigram_index)
+
+    index = get_index()
+    # Fit TF-IDF dan tetangga berjalan di proses build, bukan di thread request
+    index.use_build_processes(env_int("RAVELY_BUILD_PROCESSES", 1))
+    artifact_path = default_artifact_path()
+    # Mode bersama: satu leader membangun, semua worker memetakan generasi yang sama
+    shared = env_bool("RAVELY_SHARED_INDEX", False)
+    refresher = IndexRefresher(index, artifact_path=artifact_path, shared=shared)
+    mode = serving_mode()
+    if mode == "memory":
+        # Muat index rekomendasi dari artifact (atau bangun sekali) saat startup,
+        # lalu dipakai ulang oleh semua request
+        load = index.load_or_build_shared if shared else index.load_or_build
+        if not await run_in_threadpool(load, artifact_path):
+            # Build dicoba lagi di latar; request menunggu build yang sama atau mendapat 503
+            logger.warning("Index rekomendasi belum tersedia, dibangun ulang di latar.")
+            index.start_build()
+        # Destinasi baru/berubah dilipat ke index tanpa refit penuh
+        register_change_listener(index.upsert_destination)
+
+        # Refresher latar mendeteksi perubahan tabel dan membangun ulang index di luar jalur request
+        refresher.start()
+    else:
+        # Mode table: rekomendasi dibaca dari tabel destination_neighbors yang
+        # ditulis oleh job build (python -m helper.build_index --neighbors-table)
+        logger.info("Mode serving table: index rekomendasi tidak dimuat ke memori.")
+
+    app.state.serving_mode = mode
+    app.state.recommendation_index = index
+    # Kebijakan saat index belum siap: tunggu build yang sedang berjalan paling
+    # lama sekian detik, dengan jumlah penunggu terbatas, lalu jawab 503
+    app.state.build_wait_timeout = env_float("RAVELY_BUILD_WAIT_TIMEOUT", 10.0)
+    app.state.build_max_waiters = env_int("RAVELY_BUILD_MAX_WAITERS", 16)
+    app.state.index_refresher = refresher
+    # Cache response /recommendations; kunci memuat versi index sehingga rebuild otomatis membatalkan entri lama
+    app.state.recommendation_cache = TTLCache(
+        maxsize=env_int("RAVELY_CACHE_SIZE", 1024),
+        ttl=env_float("RAVELY_CACHE_TTL", 300.0),
+    )
+    yield
+    refresher.stop()
+    index.close()
+    await data_access.close()
+
+app = FastAPI(lifespan=lifespan)
+
+# Latensi setiap request per endpoint untuk /metrics
+app.add_middleware(metrics.MetricsMiddleware)
 
 # Add CORS middleware
 app.add_middleware(
@@ -29,6 +123,41 @@ class RecommendationResponse(BaseModel):
     total: int
     query: str
 
+class BatchRecommendationRequest(BaseModel):
+    destination_names: List[str] = Field(..., min_length=1, max_length=100, description="Daftar nama destinasi (maks. 100)")
+    limit: int = Field(5, ge=1, le=20, description="Jumlah rekomendasi per destinasi (1-20)")
+
+class BatchRecommendationResult(BaseModel):
+    query: str
+    recommendations: List[RecommendationItem]
+    total: int
+    error: Optional[str] = None
+    suggestions: List[str] = []
+
+class BatchRecommendationResponse(BaseModel):
+    results: List[BatchRecommendationResult]
+    total: int
+
+class SeedDestination(BaseModel):
+    title: str = Field(..., min_length=1, max_length=200, description="Nama destinasi seed")
+    weight: float = Field(1.0, gt=0, le=100, description="Bobot seed dalam centroid (default: 1)")
+
+class SeedRecommendationRequest(BaseModel):
+    seeds: List[SeedDestination] = Field(..., min_length=1, max_length=50, description="Destinasi yang disukai/disimpan user (maks. 50)")
+    limit: int = Field(10, ge=1, le=20, description="Jumlah rekomendasi (1-20)")
+    category: Optional[str] = Field(None, description="Hanya rekomendasikan destinasi dengan kategori ini")
+    district: Optional[str] = Field(None, description="Hanya rekomendasikan destinasi di kabupaten ini")
+
+class SeedNotFound(BaseModel):
+    query: str
+    suggestions: List[str] = []
+
+class SeedRecommendationResponse(BaseModel):
+    recommendations: List[RecommendationItem]
+    total: int
+    seeds: List[str]
+    not_found: List[SeedNotFound] = []
+
 class DestinationItem(BaseModel):
     id: Optional[int]
     title: str
@@ -39,7 +168,44 @@ class DestinationItem(BaseModel):
 class DestinationsResponse(BaseModel):
     destinations: List[DestinationItem]
     total: int
+    next_after_id: Optional[int] = None
+
+class FacetCount(BaseModel):
+    name: str
+    count: int
+
+class CategoriesResponse(BaseModel):
+    categories: List[FacetCount]
+    districts: List[FacetCount]
+    total: int
+
+class SearchResult(DestinationItem):
+    score: float
+
+class SearchResponse(BaseModel):
+    query: str
+    results: List[SearchResult]
+    total: int
+    offset: int
+    limit: int
     
+def _ready_snapshot():
+    # Snapshot aktif, atau 503 cepat jika build belum selesai dalam batas kebijakan
+    if app.state.serving_mode == "table":
+        # Mode table tidak pernah membangun index di memori
+        raise HTTPException(status_code=501, detail="Endpoint ini tidak tersedia di mode serving table")
+    snapshot = app.state.recommendation_index.ensure_built(
+        timeout=app.state.build_wait_timeout,
+        max_waiters=app.state.build_max_waiters,
+    )
+    if snapshot is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Index destinasi belum tersedia",
+            headers={"Retry-After": str(BUILD_RETRY_AFTER_SECONDS)},
+        )
+    return snapshot
+
 @app.get("/")
 def read_root():
     return {
@@ -47,49 +213,138 @@ def read_root():
         "version": "1.0.0",
         "endpoints": {
             "/destinations": "Get list of destinations",
-            "/recommendations": "Get recommendations based on destination name using cosine similarity"
+            "/search": "Search destinations by name, district or category (ranked, paginated)",
+            "/recommendations": "Get recommendations based on destination name using cosine similarity (optional category/district filters)",
+            "/categories": "Get categories and districts with destination counts",
+            "/recommendations/batch": "Get recommendations for many destinations in one request",
+            "/recommendations/seeds": "Get one recommendation list for a set of liked destinations (weighted centroid)",
+            "/index/status": "Get recommendation index build and refresh status",
+            "/health": "Get database and recommendation index health",
+            "/cache/stats": "Get /recommendations response cache counters",
+            "/metrics": "Get Prometheus metrics (latency, stage timings, index, cache, pool)"
         }
     }
 
+@app.get("/cache/stats")
+def get_cache_stats():
+    """
+    Endpoint untuk melihat counter cache response /recommendations
+
+    Returns:
+    - JSON berisi hits, misses, hit_rate, evictions, expirations, size, maxsize, dan ttl
+    """
+    return app.state.recommendation_cache.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Endpoint metrik dalam format teks Prometheus
+
+    Returns:
+    - Histogram latensi request per endpoint, durasi tiap tahap pipeline,
+      durasi build index, waktu tunggu checkout pool, counter hit/miss cache,
+      serta ukuran index (baris dan byte) dan status connection pool
+    """
+    snapshot = app.state.recommendation_index.snapshot
+    metrics.INDEX_ROWS.set(len(snapshot) if snapshot else 0)
+    metrics.INDEX_BYTES.set(snapshot.nbytes if snapshot else 0)
+    try:
+        for state, value in data_access.pool_stats().items():
+            metrics.POOL_CONNECTIONS.set(value, state=state)
+    except Exception as e:
+        logger.warning("Status connection pool tidak dapat dibaca: %s", e)
+
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/health")
+async def get_health():
+    """
+    Endpoint untuk memeriksa kesehatan layanan
+
+    Returns:
+    - 200 jika database dapat dijangkau dan index rekomendasi siap, 503 jika tidak.
+      Body berisi latensi query database, status connection pool, dan status index.
+    """
+    database = await data_access.check_database_health()
+    database["mode"] = data_access.db_mode()
+    index = app.state.recommendation_index
+    snapshot = index.snapshot
+    # Mode table tidak butuh index di memori; rekomendasi datang dari database
+    healthy = database["ok"] and (snapshot is not None or app.state.serving_mode == "table")
+
+    return JSONResponse(
+        status_code=200 if healthy else 503,
+        content={
+            "status": "ok" if healthy else "degraded",
+            "database": database,
+            "serving_mode": app.state.serving_mode,
+            "index": {
+                "ready": snapshot is not None,
+                "version": snapshot.version if snapshot else None,
+                "rows": len(snapshot) if snapshot else 0,
+            },
+        },
+    )
+
+@app.get("/index/status")
+def get_index_status():
+    """
+    Endpoint untuk melihat status index rekomendasi
+
+    Returns:
+    - JSON berisi versi index, jumlah destinasi, waktu dan durasi build terakhir,
+      serta konfigurasi dan hasil pemeriksaan refresher
+    """
+    return {**app.state.index_refresher.status(), "serving_mode": app.state.serving_mode}
+
 @app.get("/destinations", response_model=DestinationsResponse)
-def get_destinations(limit: int = Query(50, ge=1, le=100, description="Jumlah destinasi yang ditampilkan")):
+async def get_destinations(
+    limit: int = Query(50, ge=1, le=100, description="Jumlah destinasi yang ditampilkan"),
+    after_id: Optional[int] = Query(None, ge=0, description="Cursor: tampilkan destinasi dengan id setelah nilai ini"),
+    format: Literal["json", "ndjson"] = Query("json", description="json (satu halaman) atau ndjson (streaming seluruh katalog)"),
+    fields: Optional[str] = Query(None, description="Kolom untuk format ndjson, dipisah koma (id, title, district, categories, url)"),
+):
     """
     Endpoint untuk mendapatkan daftar semua destinasi
     
     Parameters:
-    - limit: Jumlah destinasi yang ditampilkan (default: 50, max: 100)
+    - limit: Jumlah destinasi yang ditampilkan (default: 50, max: 100; hanya untuk format json)
+    - after_id: Cursor halaman berikutnya, ambil dari field next_after_id response sebelumnya
+    - format: json untuk satu halaman, ndjson untuk ekspor seluruh destinasi (satu objek JSON per baris)
+    - fields: Proyeksi kolom untuk format ndjson
     
     Returns:
-    - JSON response berisi list destinasi
+    - JSON response berisi list destinasi dan next_after_id (null jika sudah halaman terakhir),
+      atau stream NDJSON jika format=ndjson
     """
     try:
-        # Cek koneksi database
-        if not connect_to_db():
-            raise HTTPException(status_code=500, detail="Tidak dapat terhubung ke database")
-        
-        # Inisialisasi database jika diperlukan
-        init_database()
-        
-        # Baca data dari tabel
-        df = read_table("destinations", limit=limit)
-        
-        if df is None or df.empty:
+        if format == "ndjson":
+            columns = [field.strip() for field in fields.split(",")] if fields else None
+            return StreamingResponse(
+                _stream_destinations_ndjson(after_id, columns),
+                media_type="application/x-ndjson",
+            )
+
+        # Baca satu halaman dengan keyset pagination pada id; satu baris ekstra
+        # menandakan masih ada halaman berikutnya
+        rows = await data_access.read_destinations_page(after_id=after_id, limit=limit + 1)
+
+        if rows is None:
+            raise HTTPException(status_code=500, detail="Tidak dapat membaca data dari database")
+
+        if not rows and after_id is None:
             raise HTTPException(status_code=404, detail="Tidak ada data destinasi ditemukan")
-        
-        # Convert DataFrame ke list of dict
-        destinations = []
-        for _, row in df.iterrows():
-            destinations.append(DestinationItem(
-                id=row.get('id'),
-                title=row.get('title', ''),
-                district=row.get('district', ''),
-                categories=row.get('categories', []) if isinstance(row.get('categories'), list) else [],
-                url=row.get('url', '')
-            ))
-        
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        for row in rows:
+            if not isinstance(row.get('categories'), list):
+                row['categories'] = []
+
         return DestinationsResponse(
-            destinations=destinations,
-            total=len(destinations)
+            destinations=rows,
+            total=len(rows),
+            next_after_id=rows[-1]['id'] if has_more else None,
         )
         
     except HTTPException:
@@ -100,10 +355,125 @@ def get_destinations(limit: int = Query(50, ge=1, le=100, description="Jumlah de
             detail=f"Terjadi kesalahan saat mengambil data destinasi: {str(e)}"
         )
 
+async def _stream_destinations_ndjson(after_id, columns, rows_per_chunk=500):
+    # Baris dikirim per potongan agar jumlah write ke socket tetap kecil
+    lines = []
+    async for row in data_access.iter_destinations(after_id=after_id, columns=columns):
+        lines.append(json.dumps(row, ensure_ascii=False, default=str))
+        if len(lines) >= rows_per_chunk:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+@app.get("/categories", response_model=CategoriesResponse)
+def get_categories():
+    """
+    Endpoint daftar kategori dan kabupaten beserta jumlah destinasinya
+
+    Dilayani dari index kategori/kabupaten yang dibangun bersama index
+    rekomendasi, sehingga tidak ada query database per request. Nilai di
+    sini dapat dipakai sebagai filter category/district di /recommendations.
+
+    Dengan RAVELY_SERVING_MODE=table jumlahnya dihitung langsung di database
+    (GROUP BY), tanpa index di memori.
+
+    Returns:
+    - JSON response {"categories": [{"name", "count"}], "districts": [...], "total": int}
+    """
+    if app.state.serving_mode == "table":
+        from helper.neighbor_table import read_facets
+
+        facets = read_facets()
+        if facets is None:
+            raise HTTPException(status_code=503, detail="Tabel destinasi tidak dapat dibaca")
+        return JSONBytesResponse({**facets, "total": len(facets["categories"])})
+
+    try:
+        snapshot = _ready_snapshot()
+
+        categories = snapshot.facets.categories()
+        # Data index sudah berbentuk CategoriesResponse; tanpa validasi ulang per item
+        return JSONBytesResponse({
+            "categories": categories,
+            "districts": snapshot.facets.districts(),
+            "total": len(categories),
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Terjadi kesalahan saat mengambil kategori: {str(e)}"
+        )
+
+@app.get("/search", response_model=SearchResponse)
+def search(
+    q: str = Query(..., min_length=1, max_length=200, description="Kata kunci pencarian"),
+    limit: int = Query(10, ge=1, le=50, description="Jumlah hasil yang ditampilkan"),
+    offset: int = Query(0, ge=0, le=1000, description="Jumlah hasil teratas yang dilewati"),
+):
+    """
+    Endpoint pencarian destinasi berdasarkan nama, kabupaten, atau kategori
+
+    Pencarian memakai inverted index token dan trigram yang dibangun bersama
+    index rekomendasi, sehingga tidak ada scan tabel per request. Hasil
+    diurutkan berdasarkan relevansi: judul sama persis, judul diawali kata
+    kunci, kata kunci muncul di judul, lalu setiap kata cocok sebagai awalan
+    kata di judul/kabupaten/kategori. Jika tidak ada yang cocok, dipakai
+    kemiripan trigram sehingga salah ketik kecil tetap menemukan hasil.
+
+    Parameters:
+    - q: Kata kunci pencarian
+    - limit: Jumlah hasil (default: 10, max: 50)
+    - offset: Jumlah hasil yang dilewati untuk pagination
+
+    Dengan RAVELY_SERVING_MODE=table pencarian dijalankan di database (ILIKE
+    pada judul dan kabupaten, memakai index pg_trgm bila ada), tanpa fallback
+    toleran typo.
+
+    Returns:
+    - JSON response berisi hasil terurut beserta skor relevansi dan total hasil
+    """
+    if app.state.serving_mode == "table":
+        from helper.neighbor_table import read_search
+
+        found = read_search(q, offset=offset, limit=limit)
+        if found is None:
+            raise HTTPException(status_code=503, detail="Tabel destinasi tidak dapat dibaca")
+        results, total = found
+        return JSONBytesResponse({"query": q, "results": results, "total": total, "offset": offset, "limit": limit})
+
+    try:
+        snapshot = _ready_snapshot()
+
+        with metrics.stage("search"):
+            rows, scores, total = snapshot.titles.search(q, offset=offset, limit=limit)
+
+        # Record dari store sudah berbentuk SearchResult; tanpa validasi ulang per item
+        results = [
+            {**snapshot.store.record(row), "score": round(float(score), 4)}
+            for row, score in zip(rows, scores)
+        ]
+
+        return JSONBytesResponse({"query": q, "results": results, "total": total, "offset": offset, "limit": limit})
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Terjadi kesalahan saat mencari destinasi: {str(e)}"
+        )
+
 @app.get("/recommendations", response_model=RecommendationResponse)
 def get_recommendations(
     destination_name: str = Query(..., description="Nama destinasi untuk mencari rekomendasi"),
-    limit: int = Query(5, ge=1, le=20, description="Jumlah rekomendasi (1-20)")
+    limit: int = Query(5, ge=1, le=20, description="Jumlah rekomendasi (1-20)"),
+    category: Optional[str] = Query(None, description="Hanya rekomendasikan destinasi dengan kategori ini"),
+    district: Optional[str] = Query(None, description="Hanya rekomendasikan destinasi di kabupaten ini"),
+    if_none_match: Optional[str] = Header(None),
 ):
     """
     Endpoint untuk mendapatkan rekomendasi destinasi berdasarkan cosine similarity
@@ -111,6 +481,8 @@ def get_recommendations(
     Parameters:
     - destination_name: Nama destinasi yang ingin dicari rekomendasinya
     - limit: Jumlah rekomendasi yang diinginkan (default: 5, max: 20)
+    - category: Opsional, hanya destinasi dengan kategori ini (mis. "pantai")
+    - district: Opsional, hanya destinasi di kabupaten ini (mis. "Sleman" atau "Kabupaten Sleman")
     
     Returns:
     - JSON response berisi list rekomendasi dengan format:
@@ -125,25 +497,70 @@ def get_recommendations(
     "total": int,
     "query": "string"
     }
+
+    Jika destinasi tidak ditemukan (pencocokan tidak peka huruf besar/kecil
+    dan spasi), response 404 berisi saran nama yang mirip:
+    {"detail": {"message": "string", "suggestions": ["string"]}}
+
+    Response memiliki header ETag yang diturunkan dari versi index; kirim
+    If-None-Match untuk mendapatkan 304 selama index belum dibangun ulang.
+    Item rekomendasi dirangkai dari fragmen JSON yang di-cache bersama index,
+    tanpa validasi ulang lewat response_model.
+    Dengan RAVELY_SERVING_MODE=table rekomendasi dibaca dari tabel
+    destination_neighbors (tanpa ETag dan cache response).
     """
+    if app.state.serving_mode == "table":
+        return _table_recommendations(destination_name, limit, category, district)
+
     try:
-        # Dapatkan rekomendasi dari helper function
-        recommendations = get_recommendations_by_name(destination_name, limit)
+        # Semua langkah memakai snapshot yang sama agar ETag, cache, dan hasil konsisten
+        snapshot = _ready_snapshot()
+        etag = f'W/"{snapshot.version}"'
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": RECOMMENDATION_CACHE_CONTROL})
+
+        cache = app.state.recommendation_cache
+        filters = (category_key(category) if category else None, district_key(district) if district else None)
+        cache_key = (snapshot.version, normalize_title(destination_name), limit, filters)
+        # Entri cache: (array JSON item rekomendasi, jumlah item)
+        cached = cache.get(cache_key)
+        metrics.CACHE_REQUESTS.inc(result="hit" if cached is not None else "miss")
+
+        try:
+            if cached is None:
+                rows = recommend_rows_by_name(destination_name, limit, snapshot, category, district)
+                if len(rows):
+                    with metrics.stage("serialization"):
+                        cached = (snapshot.fragments.encode_rows(rows), len(rows))
+                    cache.set(cache_key, cached)
+        except DestinationNotFoundError as e:
+            raise HTTPException(
+                status_code=404,
+                detail={
+                    "message": f"Destinasi '{destination_name}' tidak ditemukan",
+                    "suggestions": e.suggestions,
+                }
+            )
         
-        if not recommendations:
+        if cached is None:
+            if category or district:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Tidak ada rekomendasi untuk destinasi '{destination_name}' yang cocok dengan filter"
+                )
             raise HTTPException(
                 status_code=404, 
                 detail=f"Tidak dapat menemukan rekomendasi untuk destinasi '{destination_name}'"
             )
-        
-        # Format response
-        response = RecommendationResponse(
-            recommendations=recommendations,
-            total=len(recommendations),
-            query=destination_name,
+
+        # Format response (urutan field sama dengan RecommendationResponse)
+        items, total = cached
+        body = json_object(
+            ("recommendations", items),
+            ("total", dumps(total)),
+            ("query", dumps(destination_name)),
         )
-        
-        return response
+        return JSONBytesResponse(body, headers={"ETag": etag, "Cache-Control": RECOMMENDATION_CACHE_CONTROL})
         
     except HTTPException:
         raise
@@ -151,4 +568,149 @@ def get_recommendations(
         raise HTTPException(
             status_code=500, 
             detail=f"Terjadi kesalahan saat mencari rekomendasi: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+def _table_recommendations(destination_name, limit, category, district):
+    from helper.neighbor_table import read_recommendations
+
+    try:
+        recommendations = read_recommendations(destination_name, limit, category=category, district=district)
+    except DestinationNotFoundError as e:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "message": f"Destinasi '{destination_name}' tidak ditemukan",
+                "suggestions": e.suggestions,
+            }
+        )
+
+    if recommendations is None:
+        raise HTTPException(status_code=503, detail="Tabel rekomendasi tidak dapat dibaca")
+    if not recommendations:
+        if category or district:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Tidak ada rekomendasi untuk destinasi '{destination_name}' yang cocok dengan filter"
+            )
+        raise HTTPException(
+            status_code=404,
+            detail=f"Tidak dapat menemukan rekomendasi untuk destinasi '{destination_name}'"
+        )
+
+    return JSONBytesResponse({
+        "recommendations": recommendations,
+        "total": len(recommendations),
+        "query": destination_name,
+    })
+
+def _table_batch_recommendations(destination_names, limit):
+    from helper.neighbor_table import read_recommendations
+
+    results = []
+    for name in destination_names:
+        try:
+            recommendations = read_recommendations(name, limit)
+            error = None if recommendations is not None else "Tabel rekomendasi tidak dapat dibaca"
+            suggestions = []
+        except DestinationNotFoundError as e:
+            recommendations, error, suggestions = None, f"'{name}' tidak ditemukan dalam database.", e.suggestions
+        results.append({
+            "query": name,
+            "recommendations": recommendations or [],
+            "total": len(recommendations or []),
+            "error": error,
+            "suggestions": suggestions,
+        })
+    return results
+
+@app.post("/recommendations/batch", response_model=BatchRecommendationResponse)
+def get_recommendations_batch(request: BatchRecommendationRequest):
+    """
+    Endpoint untuk mendapatkan rekomendasi banyak destinasi sekaligus
+
+    Body:
+    - destination_names: Daftar nama destinasi (maks. 100)
+    - limit: Jumlah rekomendasi per destinasi (default: 5, max: 20)
+
+    Returns:
+    - JSON response berisi satu hasil per nama destinasi, sesuai urutan input.
+      Nama yang tidak ditemukan dilaporkan lewat field "error" tanpa
+      menggagalkan seluruh batch.
+    """
+    if app.state.serving_mode != "table":
+        # 503 cepat jika index belum siap, sebelum blok error 500 di bawah
+        _ready_snapshot()
+
+    try:
+        if app.state.serving_mode == "table":
+            results = _table_batch_recommendations(request.destination_names, request.limit)
+        else:
+            results = get_batch_recommendations(
+                request.destination_names,
+                request.limit,
+                index=app.state.recommendation_index,
+            )
+        # Hasil sudah berbentuk BatchRecommendationResult; tanpa validasi ulang per item
+        return JSONBytesResponse({"results": results, "total": len(results)})
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Terjadi kesalahan saat mencari rekomendasi batch: {str(e)}"
+        )
+
+@app.post("/recommendations/seeds", response_model=SeedRecommendationResponse)
+def get_recommendations_from_seeds(request: SeedRecommendationRequest):
+    """
+    Endpoint rekomendasi dari sekumpulan destinasi yang disukai user
+
+    Vektor TF-IDF semua seed digabung menjadi satu centroid berbobot, lalu
+    seluruh katalog dinilai sekali terhadap centroid tersebut. Seed tidak ikut
+    direkomendasikan, dan tidak perlu deduplikasi di sisi client.
+
+    Body:
+    - seeds: [{"title": str, "weight": float (default 1)}, ...] (maks. 50)
+    - limit: Jumlah rekomendasi (default: 10, max: 20)
+    - category, district: Filter opsional seperti di /recommendations
+
+    Returns:
+    - JSON response berisi rekomendasi, judul seed yang dipakai, dan seed yang
+      tidak ditemukan beserta saran nama. 404 jika tidak ada seed yang ditemukan.
+      501 dengan RAVELY_SERVING_MODE=table: centroid butuh matriks TF-IDF di
+      memori, yang sengaja tidak dimuat di mode table.
+    """
+    if app.state.serving_mode == "table":
+        raise HTTPException(
+            status_code=501,
+            detail="Rekomendasi dari beberapa seed tidak tersedia di mode serving table",
+        )
+
+    snapshot = _ready_snapshot()
+    try:
+        result = get_recommendations_for_seeds(
+            [(seed.title, seed.weight) for seed in request.seeds],
+            request.limit,
+            snapshot=snapshot,
+            category=request.category,
+            district=request.district,
+        )
+    except DestinationNotFoundError as e:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "message": "Tidak ada destinasi seed yang ditemukan",
+                "suggestions": e.suggestions,
+            }
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Terjadi kesalahan saat mencari rekomendasi seed: {str(e)}"
+        )
+
+    return JSONBytesResponse({
+        "recommendations": result["recommendations"],
+        "total": len(result["recommendations"]),
+        "seeds": result["seeds"],
+        "not_found": result["not_found"],
+    })
@@ -1,5 +1,8 @@
+from helper.db_connection import init_database
 from helper.recommendations import get_recommendations_by_name
 
+init_database()
+
 print('=== Testing Recommendations ===')
 result = get_recommendations_by_name('Candi Sambisari', 5)
 print(f'Recommendations for Candi Sambisari ({len(result)} items):')